@@ -28,6 +28,6 @@ from runtime.processor import __Processor__, __StopCriterium__
 from runtime.processor import ProcessorStopCriterium
 from runtime.procedure import __Procedure__, EMPTY_PROCEDURE
 from helperfunc import *
-from caching.cache import cache
+from caching.cache import cache, cache_statistics, reset_cache_statistics, set_cache_size_limit
 from config.tree import *
 from types_list import TypedList, TypedListProperty
@@ -19,26 +19,228 @@
 # 
 # Contact: ipkiss@intec.ugent.be
 
-import hashlib
-import pickle
-from itertools import chain
 
+from collections import OrderedDict
+import weakref
 
-def cache():
-    """caching decorator: caches the result of a function called on an object"""
+__all__ = ["cache",
+           "CacheStatistics",
+           "cache_statistics",
+           "reset_cache_statistics",
+           "set_cache_size_limit",
+           "get_cache_size_limit",
+           "clear_cache",
+           "invalidate_cache"]
+
+# Property name recorded when a memoized function or a getter (define_...) function reads a calculated value of which
+# the dependencies are not known. The cached result is then dropped on every property change.
+DEPENDS_ON_ALL = None
+
+# (object, set of property names) for each memoized function and each getter function which is being evaluated
+__PROPERTY_READ_FRAMES__ = []
+
+__MEMOIZED_FUNCTIONS__ = []
+
+# least recently used results over all memoized functions, only maintained when a global size limit is set
+__GLOBAL_LRU__ = OrderedDict()
+__GLOBAL_SIZE_LIMIT__ = [None]
+
+
+class CacheStatistics(object):
+    """ usage statistics of a memoized function """
+    def __init__(self, name):
+        self.name = name
+        self.reset()
+
+    def reset(self):
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self.uncacheable = 0  # calls with unhashable arguments, which are not cached
+
+    def __repr__(self):
+        return "<CacheStatistics %s: %d hits, %d misses, %d evictions, %d invalidations, %d uncacheable>" % (self.name, self.hits, self.misses, self.evictions, self.invalidations, self.uncacheable)
+
+
+class __MemoizedFunction__(object):
+    def __init__(self, function, max_size = None):
+        self.function = function
+        self.max_size = max_size
+        self.lru = OrderedDict()  # only maintained when max_size is set
+        code = function.func_code
+        self.statistics = CacheStatistics("%s.%s (line %d)" % (function.__module__, function.func_name, code.co_firstlineno))
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+    def is_bounded(self):
+        return (not self.max_size is None) or (not __GLOBAL_SIZE_LIMIT__[0] is None)
+
+
+def __weak_reference__(obj):
+    try:
+        return weakref.ref(obj)
+    except TypeError:
+        return lambda : obj
+
+
+def __evict__(lru_key, ref, memo):
+    obj = ref()
+    if not obj is None:
+        obj.__IPCORE_CACHE__.pop(lru_key[1], None)
+    memo.lru.pop(lru_key, None)
+    __GLOBAL_LRU__.pop(lru_key, None)
+    memo.statistics.evictions += 1
+
+
+def __register_bounded__(memo, obj, key):
+    lru_key = (id(obj), key)
+    ref = __weak_reference__(obj)
+    if not memo.max_size is None:
+        memo.lru[lru_key] = ref
+        while len(memo.lru) > memo.max_size:
+            (k, r) = memo.lru.popitem(last = False)
+            __evict__(k, r, memo)
+    limit = __GLOBAL_SIZE_LIMIT__[0]
+    if not limit is None:
+        __GLOBAL_LRU__[lru_key] = (ref, memo)
+        while len(__GLOBAL_LRU__) > limit:
+            (k, (r, m)) = __GLOBAL_LRU__.popitem(last = False)
+            __evict__(k, r, m)
+
+
+def __touch_bounded__(memo, obj, key):
+    lru_key = (id(obj), key)
+    if lru_key in memo.lru:
+        memo.lru[lru_key] = memo.lru.pop(lru_key)
+    if lru_key in __GLOBAL_LRU__:
+        __GLOBAL_LRU__[lru_key] = __GLOBAL_LRU__.pop(lru_key)
+
+
+def __forget_bounded__(obj, key):
+    lru_key = (id(obj), key)
+    key[0].lru.pop(lru_key, None)
+    __GLOBAL_LRU__.pop(lru_key, None)
+
+
+def record_property_read(obj, name):
+    """ records that a property of obj is read during the evaluation of memoized functions of obj """
+    for (o, reads) in __PROPERTY_READ_FRAMES__:
+        if o is obj:
+            reads.add(name)
+
+
+def record_property_reads(obj, names):
+    """ records that the properties of obj with the given names are read during the evaluation of memoized functions of obj """
+    for (o, reads) in __PROPERTY_READ_FRAMES__:
+        if o is obj:
+            reads.update(names)
+
+
+def cache(max_size = None):
+    """caching decorator: caches the result of a function called on an object, per combination of arguments. 
+    
+    The properties of the object which are read during the evaluation are recorded, so that the result
+    is only dropped when one of these is changed. 
+    max_size limits the number of cached results of the function (over all objects): the least recently used
+    results are evicted first."""
     def _cache(function):
+        memo = __MemoizedFunction__(function, max_size)
+        __MEMOIZED_FUNCTIONS__.append(memo)
+        
         def __cache(*args, **kw):
-            key = hashlib.sha1(function.func_name).hexdigest()
             obj = args[0]
-            if not hasattr(obj, "__IPCORE_CACHE__"):
-                obj.__IPCORE_CACHE__ = dict()
+            if kw:
+                key = (memo, args[1:], tuple(sorted(kw.items())))
+            else:
+                key = (memo, args[1:])
+            try:
+                store = obj.__IPCORE_CACHE__
+            except AttributeError:
+                store = obj.__IPCORE_CACHE__ = dict()
+            try:
+                entry = store.get(key)
+            except TypeError:
+                memo.statistics.uncacheable += 1
+                return function(*args, **kw)
 
-            if key in obj.__IPCORE_CACHE__:
-                return obj.__IPCORE_CACHE__[key]
+            if not entry is None:
+                memo.statistics.hits += 1
+                if __PROPERTY_READ_FRAMES__:
+                    for (o, reads) in __PROPERTY_READ_FRAMES__:
+                        if o is obj: 
+                            reads.update(entry[1])
+                if memo.lru or __GLOBAL_LRU__:
+                    __touch_bounded__(memo, obj, key)
+                return entry[0]
 
-            #not in cache... call the underlying function, then case the result
-            result = function(*args, **kw)
-            obj.__IPCORE_CACHE__[key] = result
+            #not in cache... call the underlying function while recording the properties it reads, then cache the result
+            memo.statistics.misses += 1
+            reads = set()
+            __PROPERTY_READ_FRAMES__.append((obj, reads))
+            try:
+                result = function(*args, **kw)
+            finally:
+                __PROPERTY_READ_FRAMES__.pop()
+            store[key] = (result, reads)
+            if memo.is_bounded():
+                __register_bounded__(memo, obj, key)
             return result
+        
+        __cache.__name__ = function.__name__
+        __cache.__doc__ = function.__doc__
+        __cache.__memoized__ = memo
         return __cache
     return _cache
+
+
+def clear_cache(obj):
+    """ drops all cached results of memoized functions of obj """
+    store = getattr(obj, "__IPCORE_CACHE__", None)
+    if store:
+        for key in store:
+            if key[0].lru or __GLOBAL_LRU__:
+                __forget_bounded__(obj, key)
+        store.clear()
+
+
+def invalidate_cache(obj, property_name):
+    """ drops the cached results of memoized functions of obj which depend on the given property """
+    store = getattr(obj, "__IPCORE_CACHE__", None)
+    if store:
+        for (key, (value, reads)) in store.items():
+            if (property_name in reads) or (DEPENDS_ON_ALL in reads):
+                del store[key]
+                key[0].statistics.invalidations += 1
+                if key[0].lru or __GLOBAL_LRU__:
+                    __forget_bounded__(obj, key)
+
+
+def set_cache_size_limit(max_size):
+    """ sets the maximum number of results cached by all memoized functions together (None for no limit).
+        The limit applies to results cached after it has been set. """
+    __GLOBAL_SIZE_LIMIT__[0] = max_size
+    if max_size is None:
+        __GLOBAL_LRU__.clear()
+    else:
+        while len(__GLOBAL_LRU__) > max_size:
+            (k, (r, m)) = __GLOBAL_LRU__.popitem(last = False)
+            __evict__(k, r, m)
+
+
+def get_cache_size_limit():
+    return __GLOBAL_SIZE_LIMIT__[0]
+
+
+def cache_statistics():
+    """ returns the statistics of all memoized functions, sorted by decreasing number of misses """
+    return sorted([m.statistics for m in __MEMOIZED_FUNCTIONS__], key = lambda s: (s.misses, s.hits), reverse = True)
+
+
+def reset_cache_statistics():
+    for m in __MEMOIZED_FUNCTIONS__:
+        m.statistics.reset()
@@ -0,0 +1,103 @@
+# IPKISS - Parametric Design Framework
+# Copyright (C) 2002-2012  Ghent University - imec
+# 
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 2
+# of the License, or (at your option) any later version.
+# 
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+# 
+# i-depot BBIE 7396, 7556, 7748
+# 
+# Contact: ipkiss@intec.ugent.be
+
+
+""" Content keys: hashable representations of values, such that two values with the same key are equivalent. 
+    They are used to recognize objects which are constructed again with the same property values. """
+
+from ipcore.exceptions.exc import IpcoreException
+from types import FunctionType, ClassType
+import hashlib
+import numpy
+
+__all__ = ["ContentKeyException",
+           "content_key",
+           "property_values",
+           "property_content_key",
+           "content_hash"]
+
+MAX_CONTENT_KEY_DEPTH = 64
+
+
+class ContentKeyException(IpcoreException):
+    """ Raised when no content key can be determined for a value """
+    def __init__(self, Msg):
+        super(ContentKeyException, self).__init__(Msg)
+
+
+def __class_path__(cls):
+    return "%s.%s" % (cls.__module__, cls.__name__)
+
+
+def property_values(obj):
+    """ list of (name, value) of the externally set properties of a property initializer, sorted by name. 
+        Function properties of which the getter fails because they were never set are left out. """
+    values = []
+    for p in sorted(obj.__externally_set_properties__()):
+        try:
+            values.append((p, getattr(obj, p)))
+        except AttributeError:
+            pass
+    return values
+
+
+def property_content_key(obj, depth = 0):
+    """ content key of a property initializer: its class and the values of its externally set properties """
+    return (__class_path__(type(obj)), tuple([(p, content_key(v, depth + 1)) for (p, v) in property_values(obj)]))
+
+
+def content_key(value, depth = 0):
+    """ returns a hashable key which represents the content of value. 
+        Objects can define their own key through a __content_key__() method. 
+        Raises ContentKeyException for values of an unsupported type. """
+    from ipcore.properties.initializer import PropertyInitializer
+    if depth > MAX_CONTENT_KEY_DEPTH:
+        raise ContentKeyException("Content key nested too deep: circular reference?")
+    if value is None:
+        return None
+    t = type(value)
+    if t in (bool, int, long, float, complex, str, unicode):
+        return (t.__name__, value)
+    if isinstance(value, numpy.generic):
+        return content_key(value.item(), depth + 1)
+    if isinstance(value, numpy.ndarray):
+        data = numpy.ascontiguousarray(value)
+        return ("ndarray", str(data.dtype), data.shape, hashlib.sha1(data.tostring()).hexdigest())
+    if isinstance(value, (type, ClassType)):
+        return ("class", __class_path__(value))
+    if hasattr(value, "__content_key__"):
+        return (__class_path__(t), content_key(value.__content_key__(), depth + 1))
+    if isinstance(value, (list, tuple)):
+        return (__class_path__(t), tuple([content_key(v, depth + 1) for v in value]))
+    if isinstance(value, dict):
+        return (__class_path__(t), tuple(sorted([(content_key(k, depth + 1), content_key(v, depth + 1)) for k, v in value.items()])))
+    if isinstance(value, (set, frozenset)):
+        return (__class_path__(t), tuple(sorted([content_key(v, depth + 1) for v in value])))
+    if isinstance(value, PropertyInitializer):
+        return property_content_key(value, depth)
+    if isinstance(value, FunctionType) and value.func_closure is None:
+        return ("function", __class_path__(value), value.func_code.co_firstlineno)
+    raise ContentKeyException("Cannot determine a content key for a value of type %s" % str(t))
+
+
+def content_hash(value):
+    """ returns a stable hash (hexadecimal SHA1 digest) of the content key of value """
+    return hashlib.sha1(repr(content_key(value))).hexdigest()
@@ -20,7 +20,18 @@
 # Contact: ipkiss@intec.ugent.be
 
 
-__all__ = ["mixin", "MixinBowl", "MixinIngredient"]
+__all__ = ["mixin", "MixinBowl", "MixinIngredient", "mixin_generation"]
+
+__MIXIN_GENERATION__ = 0
+
+def mixin_generation():
+    """ counter which is incremented each time a mixin changes the bases of a class. Tables which
+        cache lookups over the method resolution order of classes are only valid for one generation. """
+    return __MIXIN_GENERATION__
+
+def __bases_changed__():
+    global __MIXIN_GENERATION__
+    __MIXIN_GENERATION__ += 1
 
 
 class MixinIngredient(object):
@@ -34,6 +45,7 @@ class MetaMixinBowl(type):
                 cls.__bases__ = (mixin_class,)
             else:
                 cls.__bases__ = (mixin_class,) + cls.__bases__
+            __bases_changed__()
 
     def mixin_last(cls, mixin_class):
         if not mixin_class in cls.__bases__:
@@ -41,6 +53,7 @@ class MetaMixinBowl(type):
                 cls.__bases__ = (mixin_class,)
             else:
                 cls.__bases__ = cls.__bases__ + (mixin_class,)
+            __bases_changed__()
 
     def mixin(cls, mixin_class, first=True):
         if first:
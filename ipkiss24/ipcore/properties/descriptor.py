@@ -24,12 +24,14 @@ from .restrictions import RestrictTypeList
 from .processors import PropertyProcessor, ProcessorException
 
 from types import NoneType
+from inspect import isroutine
 
 from ipcore.log import IPCORE_LOG as LOG
 from ipcore.exceptions.exc import *
 from ipcore.helperfunc import *
 
-from ipcore.mixin.mixin import MixinBowl
+from ipcore.mixin.mixin import MixinBowl, mixin_generation
+from ipcore.caching.cache import __PROPERTY_READ_FRAMES__, record_property_read, record_property_reads, DEPENDS_ON_ALL
 
 from numpy import ndarray
 
@@ -80,6 +82,10 @@ class __BasePropertyDescriptor__(object):
 SET_EXTERNALLY = 0
 CACHED = 1
 
+# the result of a restriction check is cached per property for values of these types
+IMMUTABLE_VALUE_TYPES = frozenset([int, long, float, bool, str, unicode, NoneType])
+MAX_RESTRICTION_CACHE_SIZE = 1024
+
 
 class DefinitionProperty(__BasePropertyDescriptor__):
     __allowed_keyword_arguments__ = ["required", "default", "locked", "preprocess", "allow_none", "fdef_name", "restriction"]
@@ -92,7 +98,11 @@ class DefinitionProperty(__BasePropertyDescriptor__):
         self.allow_none = False
         self.preprocess = PropertyProcessor()
         self.restriction = RestrictNothing()
+        self.__getter_names__ = {}
+        self.__getter_names_generation__ = mixin_generation()
+        self.__restriction_results__ = {}
         __BasePropertyDescriptor__.__init__(self, **kwargs) #FIXME: why set the arguments before valiate it?
+        self.__default_is_routine__ = isroutine(getattr(self, "default", None))
         if ("fdef_name" not in kwargs):
             if ("default" not in kwargs):
                 if ((("allow_none" not in kwargs) or (not kwargs["allow_none"]))
@@ -109,27 +119,31 @@ class DefinitionProperty(__BasePropertyDescriptor__):
                 raise IpcorePropertyDescriptorException("Property is both specified as 'required' and having an 'fdef_name' : this is not allowed !")
 
     def __get_default__(self):
-        import inspect
-        if inspect.isroutine(self.default):
+        if self.__default_is_routine__:
             return self.default()
         else:
             return self.default
 
     def __externally_set_property_value_on_object__(self, obj, value):  # FIXME : add subscribe new value / unsubscribe old value
+        store = obj.__store__
+        if obj.flag_busy_initializing:
+            # validation and clearing of the cached values are done when the initialization is finished
+            store[self.__name__] = (value, SET_EXTERNALLY)
+            return
         clear_cached_values_in_store = True
-        if self.__value_was_stored__(obj):
-            old_value = obj.__store__[self.__name__][0]
+        stored = store.get(self.__name__, None)
+        if stored is not None:
+            old_value = stored[0]
             try:
                 clear_cached_values_in_store = (type(old_value) != type(value)) or (old_value != value)
                 if type(clear_cached_values_in_store) == ndarray:
                     clear_cached_values_in_store = clear_cached_values_in_store.all()
             except ValueError, e:  # precaution... if exceptionally this would occur because the comparison between old_value and value cannot be done, then clear caches anyway...
                 clear_cached_values_in_store = True
-        obj.__store__[self.__name__] = (value, SET_EXTERNALLY)
-        if not(obj.flag_busy_initializing):
-            obj.__do_validation__()
-            if (clear_cached_values_in_store):
-                obj.__clear_cached_values_in_store__()
+        store[self.__name__] = (value, SET_EXTERNALLY)
+        obj.__do_validation__()
+        if (clear_cached_values_in_store):
+            obj.__clear_cached_values_in_store__(self.name)
 
     def __get_property_value_origin__(self, obj):
         (value, origin) = obj.__store__[self.__name__]
@@ -145,46 +159,105 @@ class DefinitionProperty(__BasePropertyDescriptor__):
         '''Check if a value was set by the user : in that case, return the value, otherwise invoke the getter function to retrieve the value'''
         if obj is None:
             return self
-        #check if a value was set by the user
-        if not self.__value_was_stored__(obj):
-            #no value was set in the store by the user, return the value calculated by the getter-function
-            #if there a getter-method ?
-            f = self.__get_getter_function__(obj)
-            if f is None:
-                #is there a default ?
-                if hasattr(self, "default"):
-                    value = self.preprocess(self.__get_default__(), obj)
-                else:
-                    #no default and no getter method
-                    value = None
+        if __PROPERTY_READ_FRAMES__:
+            self.__record_read__(obj)
+        #check if a value was set by the user (or cached)
+        stored = obj.__store__.get(self.__name__, None)
+        if stored is not None:
+            return stored[0]
+        #no value was set in the store by the user, return the value calculated by the getter-function
+        #if there a getter-method ?
+        if self.__get_getter_name__(obj) is None:
+            #is there a default ?
+            if hasattr(self, "default"):
+                value = self.preprocess(self.__get_default__(), obj)
             else:
-                #there is a getter method and no locally stored value
-                value = self.__call_getter_function__(obj)  #FIXME: use f
-            #check if the value is compatible with the property's restriction
-            if not self.restriction(value, obj):
-                if value is None:
-                    if not self.allow_none:
-                        raise IpcorePropertyDescriptorException("Cannot set property '%s' of '%s' to None." % (self.name, obj.__class__.__name__))
-                else:
-                    raise IpcorePropertyDescriptorException("Cannot set value '%s' to property '%s' of '%s' because it is incompatible with the restriction %s of the property." % (str(value), self.name, obj.__class__.__name__, str(self.restriction)))
-            return value
+                #no default and no getter method
+                value = None
         else:
-            stored_value = self.__get_property_value_of_object__(obj)
-            return stored_value
+            #there is a getter method and no locally stored value
+            value = self.__call_recorded_getter_function__(obj)
+        #check if the value is compatible with the property's restriction
+        if not self.__restriction_allows__(value, obj):
+            if value is None:
+                if not self.allow_none:
+                    raise IpcorePropertyDescriptorException("Cannot set property '%s' of '%s' to None." % (self.name, obj.__class__.__name__))
+            else:
+                raise IpcorePropertyDescriptorException("Cannot set value '%s' to property '%s' of '%s' because it is incompatible with the restriction %s of the property." % (str(value), self.name, obj.__class__.__name__, str(self.restriction)))
+        return value
+
+    def __record_read__(self, obj):
+        """ records the read for the memoized functions and getter functions of obj which are being evaluated """
+        stored = obj.__store__.get(self.__name__, None)
+        if (stored is not None) and (stored[1] == CACHED):
+            # a cached value depends on the properties read by its getter function
+            reads = getattr(obj, "__store_reads__", {}).get(self.__name__, None)
+            if reads is None:
+                record_property_read(obj, DEPENDS_ON_ALL)
+            else:
+                record_property_reads(obj, reads)
+        # if the value still has to be calculated, the getter function records its own reads
+        record_property_read(obj, self.name)
+
+    def __call_recorded_getter_function__(self, obj):
+        """ calls the getter function, and records the properties of obj it reads with the calculated value """
+        reads = set()
+        __PROPERTY_READ_FRAMES__.append((obj, reads))
+        try:
+            value = self.__call_getter_function__(obj)
+        finally:
+            __PROPERTY_READ_FRAMES__.pop()
+        if self.__name__ in obj.__store__:
+            try:
+                store_reads = obj.__store_reads__
+            except AttributeError:
+                store_reads = obj.__store_reads__ = {}
+            store_reads[self.__name__] = frozenset(reads)
+        return value
 
     def __get_getter_function__(self, obj):
+        name = self.__get_getter_name__(obj)
+        if name is None:
+            return None
+        return getattr(obj, name)
+
+    def __get_getter_name__(self, obj):
+        """ returns the name of the getter method of the class of obj, or None if it has none """
+        if self.__getter_names_generation__ != mixin_generation():
+            self.__getter_names__.clear()
+            self.__getter_names_generation__ = mixin_generation()
+        try:
+            return self.__getter_names__[obj.__class__]
+        except KeyError:
+            return self.__resolve_getter_name__(obj.__class__)
+
+    def __resolve_getter_name__(self, cls):
         if self.fdef_name is None:
-            if hasattr(self, "autogenerated_fdef_name") and hasattr(obj, self.autogenerated_fdef_name):
-                result = getattr(obj, self.autogenerated_fdef_name)
-                return result
-            else:
-                return None
+            name = getattr(self, "autogenerated_fdef_name", None)
+            if (name is not None) and not hasattr(cls, name):
+                name = None
         else:
-            return getattr(obj, self.fdef_name)
+            name = self.fdef_name
+        self.__getter_names__[cls] = name
+        return name
+
+    def __restriction_allows__(self, value, obj):
+        """ checks the value against the restriction. The result is cached for immutable values """
+        if type(value) in IMMUTABLE_VALUE_TYPES:
+            key = (self.restriction, type(value), value)
+            results = self.__restriction_results__
+            try:
+                return results[key]
+            except KeyError:
+                result = self.restriction(value, obj)
+                if len(results) < MAX_RESTRICTION_CACHE_SIZE:
+                    results[key] = result
+                return result
+        return self.restriction(value, obj)
 
     def __check_restriction__(self, obj, value):
             """ check if the value is compatible with the restriction """
-            if self.restriction(value, obj) or (self.allow_none and value is None):
+            if self.__restriction_allows__(value, obj) or (self.allow_none and value is None):
                 return True
             else:
                 raise IpcorePropertyDescriptorException("Invalid assignment for Property '%s' of '%s' with value %s: not compatible with restriction %s." % (self.name, obj.__class__.__name__, str(value), str(self.restriction)))
@@ -194,6 +267,8 @@ class DefinitionProperty(__BasePropertyDescriptor__):
             new_value = self.preprocess(value, obj)
             self.__check_restriction__(obj, new_value)
             obj.__store__[self.__name__] = (new_value, CACHED)
+            # the dependencies are recorded by __call_recorded_getter_function__, if the value is calculated there 
+            getattr(obj, "__store_reads__", {}).pop(self.__name__, None)
             return new_value
         else:
             return value
@@ -229,6 +304,8 @@ class DefinitionProperty(__BasePropertyDescriptor__):
         # autogenerate the name of the fdef-function if it was not set
         if self.fdef_name is None:
             self.autogenerated_fdef_name = "define_" + name
+        self.__resolve_getter_name__(host_cls)
+        self.__default_is_routine__ = isroutine(getattr(self, "default", None))
         #derive "required" automatically
         if (not hasattr(self, "default")) and ((self.fdef_name is None) and (not hasattr(host_cls, self.autogenerated_fdef_name))):
             if (not hasattr(self, "allow_none")) or (not self.allow_none):
@@ -251,11 +328,12 @@ class ListDefinitionProperty(DefinitionProperty):
     def __get__(self, obj, type=None):
         if obj is None:
             return self
-        if (self.__value_was_stored__(obj)):
-            value = self.__get_property_value_of_object__(obj)
-        else:
-            value = self.__call_getter_function__(obj)
-        return value
+        if __PROPERTY_READ_FRAMES__:
+            self.__record_read__(obj)
+        stored = obj.__store__.get(self.__name__, None)
+        if stored is not None:
+            return stored[0]
+        return self.__call_recorded_getter_function__(obj)
 
 
 class PropertyDescriptor(DefinitionProperty):
@@ -359,8 +437,7 @@ class SetFunctionProperty(__BasePropertyDescriptor__):
         super(SetFunctionProperty, self).__init__(**kwargs)
 
     def __get_default__(self):
-        import inspect
-        if inspect.isroutine(self.default):
+        if isroutine(self.default):
             return self.default()
         else:
             return self.default
@@ -19,17 +19,21 @@
 # 
 # Contact: ipkiss@intec.ugent.be
 
-from .descriptor import __BasePropertyDescriptor__, CACHED, SET_EXTERNALLY
+from .descriptor import __BasePropertyDescriptor__, CACHED, SET_EXTERNALLY, IMMUTABLE_VALUE_TYPES
 from ..mixin.mixin import MetaMixinBowl
 from time import *
 from ipcore.mixin.mixin import MixinBowl
 from ipcore.properties.descriptor import *
 from ipcore.helperfunc import *
 from ipcore.exceptions.exc import IpcoreAttributeException
+from ipcore.caching.cache import clear_cache, invalidate_cache, DEPENDS_ON_ALL, __PROPERTY_READ_FRAMES__, record_property_read, record_property_reads
 import inspect
 
 SUPPRESSED = (None,)
 
+# attributes which are not copied when cloning an object: the calculated values and the initialization flags
+__CLONE_SKIPPED_ATTRIBUTES__ = frozenset(["__store__", "__store_reads__", "__IPCORE_CACHE__", "flag_busy_initializing", "is_static"])
+
 _REGISTERED_CLASSES = set()
 
 
@@ -69,6 +73,10 @@ class MetaPropertyInitializer(MetaMixinBowl):
         cls.__required_props__ = req_props
         cls.__locked_props__ = locked_props
         cls.__unlocked_props__ = unlocked_props
+        cls.__property_names__ = frozenset(cls.__all_props__)
+        # (name, store key) of the unlocked properties, the store key is None if the property does not use the store
+        cls.__unlocked_store_keys__ = [(p, a.__name__ if isinstance(a, DefinitionProperty) else None) 
+                                       for p, a in [(p, getattr(cls, p)) for p in unlocked_props]]
         cls.compile_doc()
 
     def mixin_first(cls, mixin_class):
@@ -167,6 +175,10 @@ def is_suppressed(propvalue):
 class PropertyInitializer(MixinBowl):
     __metaclass__ = MetaPropertyInitializer
 
+    # Set to True on classes of which the constructor does nothing else than assigning the properties: the
+    # copies of their objects are then cloned from the property values, without running the constructor again.
+    __fast_copy__ = False
+
     def __init__(self, **kwargs):
         self.flag_busy_initializing = True
 
@@ -227,33 +239,97 @@ class PropertyInitializer(MixinBowl):
     def __is_unlocked__(cls, item):
         return not getattr(cls, item).locked
 
-    def __clear_cached_values_in_store__(self):  # FIXME: improve performance?
+    def __clear_cached_values_in_store__(self, changed_property = None):
+        """ clears the values calculated by getter functions, and the cached results of memoized functions 
+            which depend on changed_property (all of them if it is None) """
         if (not self.flag_busy_initializing):
-            store_content_flattened = self.__store__.items()
-            for (key, item) in store_content_flattened:
-                origin = item[1]
-                if origin == CACHED:
-                    del self.__store__[key]
-            if hasattr(self, "__IPCORE_CACHE__"):
-                self.__IPCORE_CACHE__.clear()
-
-    def __externally_set_properties__(self):  # FIXME: improve performance?
+            store = self.__store__
+            store_reads = getattr(self, "__store_reads__", {})
+            for key in [key for (key, item) in store.iteritems() if item[1] == CACHED]:
+                # the recorded reads of a calculated value include those of the calculated values it depends on
+                reads = store_reads.get(key, None)
+                if (changed_property is None) or (reads is None) or (changed_property in reads) or (DEPENDS_ON_ALL in reads):
+                    del store[key]
+                    store_reads.pop(key, None)
+            if "__IPCORE_CACHE__" in self.__dict__:
+                if changed_property is None:
+                    clear_cache(self)
+                else:
+                    invalidate_cache(self, changed_property)
+
+    def __externally_set_properties__(self):
+        store = self.__store__
+        if __PROPERTY_READ_FRAMES__:
+            # the result changes when any of the unlocked properties is set
+            record_property_reads(self, [p for (p, key) in self.__class__.__unlocked_store_keys__])
         es_props = []
-        for p in self.__unlocked_properties__():
-            prop = getattr(self.__class__, p)
-            if isinstance(prop, DefinitionProperty):
-                if (prop.__value_was_stored__(self)) and (prop.__get_property_value_origin__(self) == SET_EXTERNALLY):
-                    es_props.append(p)
-            else:
+        for (p, key) in self.__class__.__unlocked_store_keys__:
+            if key is None:
                 es_props.append(p)
+            else:
+                stored = store.get(key, None)
+                if (stored is not None) and (stored[1] == SET_EXTERNALLY):
+                    es_props.append(p)
         return es_props
 
+    def property_dependencies(self):
+        """ returns, for each property of which a calculated value is cached, the names of the properties
+            that value depends on. None means that the value is dropped on any property change. 
+            This is meant for debugging the invalidation of calculated values. """
+        store = self.__store__
+        store_reads = getattr(self, "__store_reads__", {})
+        result = {}
+        for p in self.__properties__():
+            prop = getattr(self.__class__, p)
+            if isinstance(prop, DefinitionProperty):
+                stored = store.get(prop.__name__, None)
+                if (stored is not None) and (stored[1] == CACHED):
+                    reads = store_reads.get(prop.__name__, None)
+                    if (reads is None) or (DEPENDS_ON_ALL in reads):
+                        result[p] = None
+                    else:
+                        result[p] = sorted(reads - set([p]))
+        return result
+
     def __init_property_default__(self, item):
         P = getattr(type(self), item)
         if hasattr(P, 'default'):
             setattr(self, item, P.__get_default__())
 
+    def __can_clone__(self):
+        return self.__fast_copy__ and (not self.flag_busy_initializing)
+
+    def __clone__(self, memo = None):
+        """ returns a copy with the same externally set property values and attributes, without running
+            the constructor and the validation again: the values were already valid for this object.
+            Calculated values are not copied. With a memo dictionary, the values are deep-copied. """
+        from copy import deepcopy
+        def copy_value(value):
+            if (memo is None) or (type(value) in IMMUTABLE_VALUE_TYPES):
+                return value
+            return deepcopy(value, memo)
+
+        cls = self.__class__
+        C = cls.__new__(cls)
+        if not memo is None:
+            memo[id(self)] = C
+        store = dict()
+        for (key, item) in self.__store__.iteritems():
+            if item[1] == SET_EXTERNALLY:
+                store[key] = (copy_value(item[0]), SET_EXTERNALLY)
+        attributes = C.__dict__
+        for (key, value) in self.__dict__.iteritems():
+            if not key in __CLONE_SKIPPED_ATTRIBUTES__:
+                attributes[key] = copy_value(value)
+        attributes["__store__"] = store
+        attributes["flag_busy_initializing"] = False
+        if "is_static" in self.__dict__:
+            attributes["is_static"] = False
+        return C
+
     def __copy__(self):
+        if self.__can_clone__():
+            return self.__clone__()
         req_props = self.__externally_set_properties__()
         kwargs = {}
         for p in req_props:
@@ -261,6 +337,8 @@ class PropertyInitializer(MixinBowl):
         return self.__class__(**kwargs)
 
     def __deepcopy__(self, memo):
+        if self.__can_clone__():
+            return self.__clone__(memo)
         from copy import deepcopy
         req_props = self.__externally_set_properties__()
         kwargs = {}
@@ -355,13 +433,46 @@ class StrongPropertyInitializer(PropertyInitializer):
             del kwargs["allow_unmatched_kwargs"]
         else:
             allow_unmatched_kwargs = False
-        props = self.__properties__()
-        for (key, value) in kwargs.items():
+        props = self.__class__.__property_names__
+        for (key, value) in kwargs.iteritems():
             if (not key in props) and (not allow_unmatched_kwargs):
                 raise IpcoreAttributeException("Keyword argument '%s' does not match a property of %s." % (key, str(type(self))))
             if not is_suppressed(value):
                 setattr(self, key, value)
 
+    def set_bulk(self, **kwargs):
+        """Assign several properties at once.
+
+        The properties are assigned as in the constructor: the combination of properties is validated
+        and the cached values are cleared once, after all the properties have been assigned.
+
+        Example:
+            wg.set_bulk(wg_width = 0.5, trench_width = 2.0)
+        """
+        busy = self.flag_busy_initializing
+        self.flag_busy_initializing = True
+        try:
+            self.__assign_properties__(kwargs)
+        finally:
+            self.flag_busy_initializing = busy
+        if not busy:
+            self.__do_validation__()
+            if len(kwargs) == 1:
+                self.__clear_cached_values_in_store__(kwargs.keys()[0])
+            else:
+                self.__clear_cached_values_in_store__()
+
+    def modified_copy(self, **override_kwargs):
+        """ returns a copy of the object, but where the user can
+            override properties using **override_kwargs
+            """
+        if self.__can_clone__() and self.__class__.__property_names__.issuperset(override_kwargs):
+            # only the overridden properties need to be assigned and validated
+            C = self.__clone__()
+            C.set_bulk(**override_kwargs)
+            return C
+        return super(StrongPropertyInitializer, self).modified_copy(**override_kwargs)
+
     def __do_validation__(self):
         if not self.validate_properties():
             from ipcore.exceptions.exc import IpcorePropertyDescriptorException
@@ -377,9 +488,9 @@ class StrongPropertyInitializer(PropertyInitializer):
         self.is_static = False
         self.__clear_cached_values_in_store__()
 
-    def __clear_cached_values_in_store__(self):
+    def __clear_cached_values_in_store__(self, changed_property = None):
         if (not self.is_static):
-            super(StrongPropertyInitializer, self).__clear_cached_values_in_store__()
+            super(StrongPropertyInitializer, self).__clear_cached_values_in_store__(changed_property)
 
     def validate_properties(self):
         """Check whether a combination of properties is valid.
@@ -396,5 +507,8 @@ class StrongPropertyInitializer(PropertyInitializer):
         return True
 
     def __property_was_externally_set__(self, property_name):
+        if __PROPERTY_READ_FRAMES__:
+            # getter functions which test this depend on the property, even if they don't read its value
+            record_property_read(self, property_name)
         property_name = "__prop_%s__" % property_name
         return (property_name in self.__store__) and (self.__store__[property_name][1] == 0)  # 0=SET_EXTERNALLY
@@ -59,6 +59,7 @@ from primitives.structure import *
 
 from io.import_hpgl import *
 from io.input_gdsii import *
+from io.input_gdsii_lazy import *
 from io.output import OutputBasic
 from io.output_gdsii import *
 from io.output_object import *
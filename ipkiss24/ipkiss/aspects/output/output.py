@@ -28,7 +28,9 @@ TECH = get_technology()
 class StructureOutputAspect(object):
 
     #mixin for convenient export of a Structure to GDS2
-    def write_gdsii(self, filename_or_stream, unit = TECH.METRICS.UNIT, grid = TECH.METRICS.GRID, layer_map = None):
+    def write_gdsii(self, filename_or_stream, unit = TECH.METRICS.UNIT, grid = TECH.METRICS.GRID, layer_map = None, clip_box = None, layers = None):
+        """ writes the structure and its child structures to GDS2. With clip_box, only the part of the structure within the box 
+            is written; with layers, only the elements on these layers """
         from ipkiss.primitives import Library
         from ipkiss.io.output_gdsii import FileOutputGdsii, OutputGdsii
         from ipkiss.log import IPKISS_LOG as LOG
@@ -37,9 +39,9 @@ class StructureOutputAspect(object):
         if layer_map is None:
             layer_map = TECH.GDSII.EXPORT_LAYER_MAP #bind only at this moment, because TECH.GDSII.EXPORT_LAYER_MAP could have been assigned a different value since original loading of this module
         if isinstance(filename_or_stream, str):
-            OP = FileOutputGdsii(filename_or_stream, layer_map = layer_map)
+            OP = FileOutputGdsii(filename_or_stream, layer_map = layer_map, clip_box = clip_box, layers = layers)
         elif (filename_or_stream == sys.stdout):
-            OP = OutputGdsii(sys.stdout, layer_map = layer_map)
+            OP = OutputGdsii(sys.stdout, layer_map = layer_map, clip_box = clip_box, layers = layers)
         OP.write(my_lib)
         LOG.debug("Finished writing structure to GDS2.")
         
@@ -21,7 +21,7 @@
 
 from ipkiss.aspects.aspect import __Aspect__
 from ipkiss.primitives.elements.basic import ElementList, ElementListProperty
-from ipkiss.all import Layer, Boundary, Path, Structure, get_technology
+from ipkiss.all import Layer, Boundary, Path, Structure, Shape, SRef, ARef, MRef, Translation, get_technology, get_grids_per_unit
 from ipkiss.primitives.layer import __GeneratedLayerAnd__, __GeneratedLayerNot__, __GeneratedLayerOr__, __GeneratedLayerXor__, __GeneratedLayer_2Layer__, __GeneratedLayer__
 from ipkiss.boolean_ops.boolean_ops_elements import *
 from dependencies.shapely_wrapper import shapely_geom_to_shape, flatten_shapely_geom, Polygon, cascaded_union, MultiPolygon
@@ -31,82 +31,446 @@ from ipkiss.primitives.filters.path_to_boundary_filter import PathToBoundaryFilt
 from ipkiss.primitives.filters.boundary_cut_filter import BoundaryCutFilter
 #from ipkiss.constants import GDSII_MAX_COORDINATES 
 from ipkiss.primitives.elements.basic import __LayerElement__
+from ipkiss.primitives.elements.store import BoundaryStore
+import numpy
 
 
 
 TECH = get_technology()
 
 
+def __shapely_polygons_for_elements__(elements):
+    """
+    Convert flat Boundary and Path elements into a list of Shapely polygons. Paths are cut and converted to boundaries,
+    boundaries with too many vertices are cut, and all the points are snapped to the grid.
+    """
+    boundaries = []
+    fp = PathCutFilter(max_path_length = TECH.GDSII.MAX_PATH_LENGTH, grids_per_unit=int(1.0 / TECH.METRICS.GRID), overlap=1)            
+    fp += PathToBoundaryFilter()	    
+    fb = BoundaryCutFilter()
+    for elem in __boundaries_of_stores__(elements):
+        if isinstance(elem, Path):
+            for e in fp(elem):
+                if isinstance(e, __LayerElement__):
+                    boundaries.append(e)
+        elif isinstance(elem, Boundary):
+            boundaries.extend(fb(elem.flat_copy()))
+    shapely_polygons = []
+    for b in boundaries:
+        if b.transformation is not None:
+            tr_sh = b.shape.transform_copy(b.transformation)
+            tr_sh.snap_to_grid() #otherwise Shapely numerical errors occur 
+            p = Polygon(tr_sh.points)
+        else:
+            sh = Shape(b.shape.points)
+            sh.snap_to_grid()
+            p = Polygon(sh.points)
+        if p.is_valid:
+            shapely_polygons.append(p)
+        else:
+            raise Exception("Boundary could not be converted to a valid Shapely polygon.")	
+    return shapely_polygons
+
+
+def __boundaries_of_stores__(elements):
+    """Iterates over the elements, with the boundaries of a BoundaryStore in place of the store."""
+    for e in elements:
+        if isinstance(e, BoundaryStore):
+            for b in e:
+                yield b
+        else:
+            yield e
+
+
+def __reference_transformations__(elem):
+    """
+    Returns the list of transformations with which the structure of a SRef, ARef or MRef is placed (as in the flat_copy of the reference).
+    Returns None for other elements, including references which flatten in a different way.
+    """
+    flat_copy = getattr(type(elem).flat_copy, "im_func", None)
+    if flat_copy is SRef.flat_copy.im_func:
+        return [elem.transformation + Translation(elem.position)]
+    elif flat_copy is MRef.flat_copy.im_func:
+        # also for ARef, which places its structure with the same flattening engine
+        T = elem.transformation - Translation(elem.transformation.translation)
+        return [T + Translation((t[0], t[1])) for t in elem.__placement_translations__()]
+    return None
+
+
+def __is_grid_preserving__(transformation):
+    """
+    True if the transformation maps grid points exactly onto grid points (rotation over a multiple of 90 degrees, no magnification, 
+    translation on the grid). Snapping to the grid then commutes with the transformation, so that geometry of a structure can be 
+    evaluated in its own coordinate frame and reused for every placement.
+    """
+    if transformation.is_identity():
+        return True
+    try:
+        if (transformation.rotation % 90.0 != 0.0) or (transformation.magnification != 1.0) or transformation.absolute_rotation or transformation.absolute_magnification:
+            return False
+        t = numpy.array([transformation.translation.x, transformation.translation.y]) * get_grids_per_unit()
+    except AttributeError:
+        return False
+    return bool(numpy.all(numpy.abs(t - numpy.floor(t + 0.5)) < 1e-6))
+
+
+def __transform_shapely_polygons__(geom, transformation):
+    """Returns the polygons of a Shapely geometry, transformed with the given (orthogonal) transformation."""
+    polygons = []
+    for p in flatten_shapely_geom(geom):
+        if p.is_empty: 
+            continue
+        exterior = transformation.apply_to_array(numpy.array(p.exterior.coords)[:, :2])
+        interiors = [transformation.apply_to_array(numpy.array(i.coords)[:, :2]) for i in p.interiors]
+        polygons.append(Polygon(exterior, interiors))
+    return polygons
+
+
+def __union__(polygons):
+    if len(polygons) > 0:
+        return cascaded_union(polygons)
+    else:
+        return Polygon()
+
+
+def __box__(size_info, transformation = None):
+    """Returns the bounding box (west, south, east, north) of a size_info, optionally transformed, or None if the size_info is empty."""
+    if not size_info.__is_initialized__():
+        return None
+    corners = numpy.array([[size_info.west, size_info.south], [size_info.east, size_info.north], 
+                           [size_info.west, size_info.north], [size_info.east, size_info.south]], dtype = numpy.float64)
+    if transformation is not None:
+        corners = transformation.apply_to_array(corners)
+    return numpy.hstack([numpy.min(corners, 0), numpy.max(corners, 0)])
+
+
+def __overlapping_boxes__(boxes):
+    """
+    Given an array of boxes (west, south, east, north), returns a boolean array which is True for the boxes that overlap 
+    with at least one other box. Boxes which only touch do not overlap.
+    """
+    boxes = numpy.asarray(boxes, dtype = numpy.float64).reshape(-1, 4)
+    n = len(boxes)
+    order = numpy.argsort(boxes[:, 0], kind = "mergesort")
+    b = boxes[order]
+    # for box i, only the boxes j > i with west_j < east_i can overlap in x
+    ends = numpy.searchsorted(b[:, 0], b[:, 2], side = "left")
+    overlapping = numpy.zeros(n, dtype = bool)
+    for i in numpy.nonzero(ends > numpy.arange(1, n + 1))[0]:
+        j = numpy.arange(i + 1, ends[i])
+        o = (b[j, 2] > b[i, 0]) & (b[j, 1] < b[i, 3]) & (b[j, 3] > b[i, 1])
+        if numpy.any(o):
+            overlapping[i] = True
+            overlapping[j[o]] = True
+    result = numpy.zeros(n, dtype = bool)
+    result[order] = overlapping
+    return result
+
+
+class __GeneratedLayerBooleanEngine__(object):
+    """
+    Evaluates generated layers on a list of elements without flattening the full hierarchy for every layer.
+    
+    The elements of every referenced structure are collected only once, and the geometry of a (generated) layer is calculated
+    once per structure, in the coordinate frame of that structure, and reused for all its placements:
+    -placements which do not overlap with other geometry of the parent structure contribute the generated layer of the
+     referenced structure, as the boolean operations only depend on the local geometry.
+    -placements which overlap with other geometry contribute the union of the layers, on which the boolean operations 
+     are done in the frame of the parent structure.
+    Placements with a transformation that does not preserve the grid are flattened, as the grid snapping of the geometry would 
+    otherwise differ. All results are memoized, so that a layer which occurs multiple times in the generated layer expressions 
+    is only evaluated once. One engine can be used to evaluate several generated layers on the same elements.
+    """
+    def __init__(self, elements):
+        self.elements = elements
+        self.__cells__ = dict()         # id(structure) -> (structure, cell)
+        self.__geometries__ = dict()    # (id(structure), id(generated_layer), isolated_only) -> (generated_layer, geometry)
+        self.__root__ = self.__collect__(elements)
+
+    def __collect__(self, elements):
+        """
+        Sort the elements of a structure into a cell : a dictionary with the flat boundaries and paths per layer, and two lists of 
+        (structure, transformations), for the references which overlap with other geometry and for the isolated references.
+        """
+        flat_elements = ElementList()
+        references = []
+        for e in elements:
+            transformations = __reference_transformations__(e)
+            if transformations is None:
+                flat_elements += e.flat_copy()
+                continue
+            hierarchical = [T for T in transformations if __is_grid_preserving__(T)]
+            if len(hierarchical) > 0:
+                references.append((e.reference, hierarchical))
+            if len(hierarchical) < len(transformations):
+                el = e.reference.elements.flat_copy()
+                for T in transformations:
+                    if not __is_grid_preserving__(T):
+                        flat_elements += el.transform_copy(T)
+        layer_elements = dict()
+        boxes = []
+        for e in __boundaries_of_stores__(flat_elements):
+            if isinstance(e, (Boundary, Path)):
+                layer_elements.setdefault(id(e.layer), (e.layer, []))[1].append(e)
+                box = __box__(e.size_info())
+                if box is not None:
+                    boxes.append(box)
+        n_o_element_boxes = len(boxes)
+        placements = []
+        for structure, transformations in references:
+            size_info = structure.size_info()
+            for T in transformations:
+                box = __box__(size_info, T)
+                if box is not None:
+                    boxes.append(box)
+                    placements.append((structure, T))
+        overlapping = __overlapping_boxes__(boxes)[n_o_element_boxes:]
+        interacting_references = [p for p, o in zip(placements, overlapping) if o]
+        isolated_references = [p for p, o in zip(placements, overlapping) if not o]
+        return (layer_elements, interacting_references, isolated_references)
+
+    def __cell__(self, structure):
+        key = id(structure)
+        if not key in self.__cells__:
+            self.__cells__[key] = (structure, self.__collect__(structure.elements))
+        return self.__cells__[key][1]
+
+    def __geometry__(self, key, cell, generated_layer, isolated_only = False):
+        """
+        Geometry of the generated layer in the coordinate frame of the cell. With isolated_only = True, the isolated references 
+        are not taken into account.
+        """
+        memo_key = (key, id(generated_layer), isolated_only)
+        if memo_key in self.__geometries__:
+            return self.__geometries__[memo_key][1]
+        (layer_elements, interacting_references, isolated_references) = cell
+        if isinstance(generated_layer, Layer):
+            #lowest level of the recursion
+            result_p = __union__(self.__layer_polygons__(layer_elements, interacting_references, generated_layer))
+        elif isinstance(generated_layer, __GeneratedLayer_2Layer__):
+            p1 = self.__geometry__(key, cell, generated_layer.layer1, True)
+            p2 = self.__geometry__(key, cell, generated_layer.layer2, True)
+            if isinstance(generated_layer, __GeneratedLayerAnd__):
+                result_p = p1.intersection(p2)
+            elif isinstance(generated_layer, __GeneratedLayerOr__):
+                result_p = p1.union(p2)
+            elif isinstance(generated_layer, __GeneratedLayerXor__):
+                result_p = p1.symmetric_difference(p2)
+        else:
+            raise Exception("Unexpected type for parameter 'generated_layer' : %s" % str(type(generated_layer)))
+        if not isolated_only and len(isolated_references) > 0:
+            polygons = flatten_shapely_geom(result_p) if not result_p.is_empty else []
+            for structure, T in isolated_references:
+                polygons.extend(__transform_shapely_polygons__(self.__geometry__(id(structure), self.__cell__(structure), generated_layer), T))
+            result_p = __union__(polygons)
+        self.__geometries__[memo_key] = (generated_layer, result_p)
+        return result_p
+
+    def __layer_polygons__(self, layer_elements, references, layer):
+        polygons = []
+        for l, elems in layer_elements.values():
+            if l == layer:
+                polygons.extend(__shapely_polygons_for_elements__(elems))
+        for structure, T in references:
+            polygons.extend(__transform_shapely_polygons__(self.__geometry__(id(structure), self.__cell__(structure), layer), T))
+        return polygons
+
+    def geometry(self, generated_layer):
+        """Returns the Shapely geometry of the (generated) layer"""
+        return self.__geometry__(None, self.__root__, generated_layer)
+
+    def layer_polygons(self, layer):
+        """
+        Returns the polygons on a layer as a list, without calculating their union. Every placement of a referenced structure 
+        contributes the (transformed) union of the layer in that structure.
+        """
+        (layer_elements, interacting_references, isolated_references) = self.__root__
+        return self.__layer_polygons__(layer_elements, interacting_references + isolated_references, layer)
+
+
+# -----------------------------------------------------------------------------------------
+# Tiled evaluation of generated layers
+# -----------------------------------------------------------------------------------------
+
+def __expression__(generated_layer, layers):
+    """
+    Convert a generated layer to a nested tuple (operation, expression1, expression2), with as leafs the index of the 
+    layer in the list 'layers' (which is extended with new layers). Such an expression can be passed to another process.
+    """
+    if isinstance(generated_layer, Layer):
+        for i, l in enumerate(layers):
+            if l is generated_layer:
+                return i
+        layers.append(generated_layer)
+        return len(layers) - 1
+    elif isinstance(generated_layer, __GeneratedLayerAnd__):
+        return ("intersection", __expression__(generated_layer.layer1, layers), __expression__(generated_layer.layer2, layers))
+    elif isinstance(generated_layer, __GeneratedLayerOr__):
+        return ("union", __expression__(generated_layer.layer1, layers), __expression__(generated_layer.layer2, layers))
+    elif isinstance(generated_layer, __GeneratedLayerXor__):
+        return ("symmetric_difference", __expression__(generated_layer.layer1, layers), __expression__(generated_layer.layer2, layers))
+    else:
+        raise Exception("Unexpected type for parameter 'generated_layer' : %s" % str(type(generated_layer)))
+
+
+def __polygon_to_coords__(p):
+    return (numpy.array(p.exterior.coords)[:, :2], [numpy.array(i.coords)[:, :2] for i in p.interiors])
+
+
+def __box_polygon__(box):
+    (west, south, east, north) = box
+    return Polygon([(west, south), (east, south), (east, north), (west, north)])
+
+
+def __evaluate_tile__(task):
+    """
+    Evaluates the expressions of generated layers on one tile. The task is a tuple (tile box, halo box, polygon coordinates per layer, 
+    expressions). The union of every layer is calculated within the halo box, and the results are clipped to the tile box.
+    Returns the polygon coordinates of the result, per expression.
+    """
+    (tile_box, halo_box, layer_coords, expressions) = task
+    halo = __box_polygon__(halo_box)
+    tile = __box_polygon__(tile_box)
+    layer_geometries = [__union__([Polygon(e, i) for e, i in coords]).intersection(halo) for coords in layer_coords]
+    def evaluate(expression):
+        if isinstance(expression, tuple):
+            (operation, e1, e2) = expression
+            return getattr(evaluate(e1), operation)(evaluate(e2))
+        return layer_geometries[expression]
+    results = []
+    for expression in expressions:
+        geom = evaluate(expression).intersection(tile)
+        results.append([__polygon_to_coords__(g) for g in flatten_shapely_geom(geom) if isinstance(g, Polygon) and not g.is_empty])
+    return results
+
+
+def __remove_seam_vertices__(polygon, x_borders, y_borders, tolerance):
+    """Removes the vertices on the tile borders which are not corners : these are introduced by clipping to the tiles."""
+    def clean(coords):
+        c = numpy.array(coords)[:-1, :2]
+        if len(c) <= 3:
+            return coords
+        previous = c - numpy.roll(c, 1, 0)
+        following = numpy.roll(c, -1, 0) - c
+        cross = previous[:, 0] * following[:, 1] - previous[:, 1] * following[:, 0]
+        norm = numpy.sqrt(numpy.sum(previous ** 2, 1) * numpy.sum(following ** 2, 1))
+        straight = (numpy.abs(cross) <= 1e-9 * norm) & (numpy.sum(previous * following, 1) > 0.0)
+        on_border = numpy.zeros(len(c), dtype = bool)
+        for x in x_borders:
+            on_border |= numpy.abs(c[:, 0] - x) < tolerance
+        for y in y_borders:
+            on_border |= numpy.abs(c[:, 1] - y) < tolerance
+        keep = numpy.logical_not(straight & on_border)
+        if numpy.sum(keep) < 3:
+            return coords
+        return c[keep]
+    return Polygon(clean(polygon.exterior.coords), [clean(i.coords) for i in polygon.interiors])
+
+
+def __get_tiled_shapely_geometries_for_generated_layers__(elements, generated_layers, tile_size, tile_halo = 0.0, n_o_workers = 1):
+    """
+    Evaluates the generated layers on a grid of tiles of (at most) tile_size x tile_size, in a pool of n_o_workers processes, 
+    and returns a list of Shapely polygons per generated layer.
+    The polygons of every layer are distributed over the tiles, extended with tile_halo. The boolean operations are done per tile and the 
+    results are clipped to the tiles. The pieces which touch a tile border are merged again. The tiles are sent to the workers and 
+    stitched in a fixed order, so the result does not depend on the number of workers.
+    """
+    engine = __GeneratedLayerBooleanEngine__(elements)
+    layers = []
+    expressions = [__expression__(gl, layers) for gl in generated_layers]
+    layer_polygons = [engine.layer_polygons(l) for l in layers]
+    layer_bounds = [numpy.array([p.bounds for p in polygons]).reshape(-1, 4) for polygons in layer_polygons]
+    all_bounds = numpy.vstack(layer_bounds)
+    if len(all_bounds) == 0:
+        return [[] for gl in generated_layers]
+
+    # tile borders on the grid
+    grids_per_unit = get_grids_per_unit()
+    tile_size = max(numpy.floor(tile_size * grids_per_unit + 0.5), 1.0) / grids_per_unit
+    west = numpy.floor(numpy.min(all_bounds[:, 0]) * grids_per_unit) / grids_per_unit
+    south = numpy.floor(numpy.min(all_bounds[:, 1]) * grids_per_unit) / grids_per_unit
+    n_o_tiles_x = max(int(numpy.ceil((numpy.max(all_bounds[:, 2]) - west) / tile_size)), 1)
+    n_o_tiles_y = max(int(numpy.ceil((numpy.max(all_bounds[:, 3]) - south) / tile_size)), 1)
+    x_borders = west + tile_size * numpy.arange(n_o_tiles_x + 1)
+    y_borders = south + tile_size * numpy.arange(n_o_tiles_y + 1)
+
+    tasks = []
+    for i in range(n_o_tiles_x):
+        for j in range(n_o_tiles_y):
+            tile_box = (x_borders[i], y_borders[j], x_borders[i + 1], y_borders[j + 1])
+            halo_box = (tile_box[0] - tile_halo, tile_box[1] - tile_halo, tile_box[2] + tile_halo, tile_box[3] + tile_halo)
+            layer_coords = []
+            for polygons, bounds in zip(layer_polygons, layer_bounds):
+                selection = numpy.nonzero((bounds[:, 0] < halo_box[2]) & (bounds[:, 2] > halo_box[0]) & 
+                                          (bounds[:, 1] < halo_box[3]) & (bounds[:, 3] > halo_box[1]))[0]
+                layer_coords.append([__polygon_to_coords__(polygons[k]) for k in selection])
+            tasks.append((tile_box, halo_box, layer_coords, expressions))
+
+    if n_o_workers > 1 and len(tasks) > 1:
+        import multiprocessing
+        pool = multiprocessing.Pool(n_o_workers)
+        try:
+            tile_results = pool.map(__evaluate_tile__, tasks, chunksize = 1)
+        finally:
+            pool.close()
+            pool.join()
+    else:
+        tile_results = [__evaluate_tile__(t) for t in tasks]
+
+    # stitch : merge the pieces which touch an inner tile border
+    tolerance = 0.5 / grids_per_unit
+    inner_x = x_borders[1:-1]
+    inner_y = y_borders[1:-1]
+    result = []
+    for n in range(len(expressions)):
+        polygons = []
+        border_polygons = []
+        for tile_result in tile_results:
+            for exterior, interiors in tile_result[n]:
+                p = Polygon(exterior, interiors)
+                (x0, y0, x1, y1) = p.bounds
+                if (numpy.any((inner_x > x0 - tolerance) & (inner_x < x1 + tolerance)) or 
+                    numpy.any((inner_y > y0 - tolerance) & (inner_y < y1 + tolerance))):
+                    border_polygons.append(p)
+                else:
+                    polygons.append(p)
+        if len(border_polygons) > 0:
+            polygons.extend([__remove_seam_vertices__(g, inner_x, inner_y, tolerance) 
+                             for g in flatten_shapely_geom(__union__(border_polygons)) if isinstance(g, Polygon) and not g.is_empty])
+        result.append(polygons)
+    return result
+
+
 def __get_composite_shapely_polygon_for_elements_on_generated_layer__(elements, generated_layer):
     """
     Recursive algorithm : 
     -give a Generated Layer, apply the corresponding Shapely boolean operations, then recursively call the function.
     -lowest level : given a Layer, create a Shapely Multipolygon spanning all the elements.
     """    
-    if isinstance(generated_layer, Layer):
-        #lowest level of the recursion
-        boundaries = []
-        elements_flattened = elements.flat_copy()	    
-        fp = PathCutFilter(max_path_length = TECH.GDSII.MAX_PATH_LENGTH, grids_per_unit=int(1.0 / TECH.METRICS.GRID), overlap=1)            
-        fp += PathToBoundaryFilter()	    
-        fb = BoundaryCutFilter()
-        for elem in elements_flattened:
-            if (isinstance(elem, Path)) and (elem.layer == generated_layer):        
-                for e in fp(elem):
-                    if isinstance(e, __LayerElement__):
-                        boundaries.append(e)
-            elif (isinstance(elem, Boundary)) and (elem.layer == generated_layer):		
-                boundaries.extend(fb(elem.flat_copy()))
-        shapely_polygons = []
-        for b in boundaries:
-            if b.transformation is not None:
-                tr_sh = b.shape.transform_copy(b.transformation)
-                tr_sh.snap_to_grid() #otherwise Shapely numerical errors occur 
-                p = Polygon(tr_sh.points)
-            else:
-                sh = Shape(b.shape.points)
-                sh.snap_to_grid()
-                p = Polygon(sh.points)
-            if p.is_valid:
-                shapely_polygons.append(p)
-            else:
-                raise Exception("Boundary could not be converted to a valid Shapely polygon.")	
-        if len(shapely_polygons) > 0:
-            shapely_polygon = cascaded_union(MultiPolygon(shapely_polygons))
-        else:
-            shapely_polygon = Polygon()			
-        return shapely_polygon   
-    elif isinstance(generated_layer, __GeneratedLayer_2Layer__):
-        p1 = __get_composite_shapely_polygon_for_elements_on_generated_layer__(elements, generated_layer.layer1)
-        p2 = __get_composite_shapely_polygon_for_elements_on_generated_layer__(elements, generated_layer.layer2)
-        if isinstance(generated_layer, __GeneratedLayerAnd__):
-            result_p = p1.intersection(p2)
-        elif isinstance(generated_layer, __GeneratedLayerOr__):
-            result_p = p1.union(p2)
-        elif isinstance(generated_layer, __GeneratedLayerXor__):
-            result_p = p1.symmetric_difference(p2)
-        return result_p
-    else:
-        raise Exception("Unexpected type for parameter 'generated_layer' : %s" % str(type(generated_layer)))
+    return __GeneratedLayerBooleanEngine__(elements).geometry(generated_layer)
 
 
-def get_elements_for_generated_layers(elements, mapping):
+def get_elements_for_generated_layers(elements, mapping, tile_size = None, tile_halo = 0.0, n_o_workers = 1):
     """
     Given a list of elements and a list of tuples (GeneratedLayer, PPLayer), create new elements according to the boolean
     operations of the GeneratedLayer and place these elements on the specified PPLayer.
+    
+    If tile_size is given, the layout is divided in tiles of tile_size x tile_size, which are evaluated in a pool of n_o_workers
+    processes. The boolean operations are local, so no halo is needed (tile_halo = 0.0), but each tile can be extended with tile_halo. 
+    The results are clipped to the tiles and the pieces on the tile borders are merged again. The result does not depend on 
+    the number of workers.
     """
     generated_layers = mapping.keys()
     export_layers = mapping.values()
     elems = ElementList()
-    process_processelems_dict = dict()
-    for generated_layer, export_layer in zip(generated_layers, export_layers):
-        shapely_geom = __get_composite_shapely_polygon_for_elements_on_generated_layer__(elements = elements, generated_layer = generated_layer)		    		
-        for geom in flatten_shapely_geom(shapely_geom):    
+    if tile_size is None:
+        engine = __GeneratedLayerBooleanEngine__(elements)
+        geometries = [flatten_shapely_geom(engine.geometry(generated_layer)) for generated_layer in generated_layers]
+    else:
+        geometries = __get_tiled_shapely_geometries_for_generated_layers__(elements, generated_layers, tile_size = tile_size, 
+                                                                           tile_halo = tile_halo, n_o_workers = n_o_workers)
+    for geoms, export_layer in zip(geometries, export_layers):
+        for geom in geoms:    
             shape = shapely_geom_to_shape(geom)			    
             elems += Boundary(layer = export_layer, shape = shape)
     return elems
-
-
-
-
-
@@ -49,6 +49,12 @@ class Coord2(Coord):
         elif len(args) == 1:
             self.x, self.y = args[0][0], args[0][1]
     
+    def __copy__(self):
+        return Coord2(self.x, self.y)
+
+    def __deepcopy__(self, memo):
+        return Coord2(self.x, self.y)
+
     def __getitem__(self, index):
         if index == 0: return self.x
         if index == 1: return self.y
@@ -168,6 +174,9 @@ class Coord2(Coord):
         
     def id_string(self):
         return "%d_%d" % (self.x * 1000, self.y * 1000)
+
+    def __content_key__(self):
+        return (self.x, self.y)
     
     def convert_to_array(self):
         return [self.x, self.y]
@@ -350,6 +359,9 @@ class Coord3(Coord):
         
     def id_string(self):
         return "%d_%d_%d" % (self.x * 1000, self.y * 1000, self.z * 1000)
+
+    def __content_key__(self):
+        return (self.x, self.y, self.z)
     
     def convert_to_array(self):
         return [self.x, self.y, self.z]  
@@ -0,0 +1,214 @@
+# IPKISS - Parametric Design Framework
+# Copyright (C) 2002-2012  Ghent University - imec
+# 
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 2
+# of the License, or (at your option) any later version.
+# 
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+# 
+# i-depot BBIE 7396, 7556, 7748
+# 
+# Contact: ipkiss@intec.ugent.be
+
+
+
+import numpy
+
+__all__ = ["fracture_polygon"]
+
+# maximum number of times a polygon is split in slabs before it is cut in trapezoids
+__MAX_SPLIT_DEPTH__ = 8
+
+
+def fracture_polygon(points, max_vertex_count):
+    """ splits a polygon into polygons which have at most max_vertex_count points each, and returns their 
+        points as a list of arrays. Holes can be connected to the outline as keyholes. 
+        
+        The polygon is cut by lines parallel to an axis, placed between the vertices such that each slab holds 
+        about half the maximum number of vertices, and the pieces within each slab are traced. Pieces which are 
+        still too large are split along the other axis. If the cut polygon can not be traced consistently 
+        (e.g. because it intersects itself), it is cut in trapezoids instead. The result only depends on the 
+        points, and the number of splits is bounded. """
+    P = __ring__(points)
+    if len(P) <= max_vertex_count:
+        return [P]
+    # start with the axis along which the vertices are most spread
+    axis = int(len(numpy.unique(P[:, 1])) >= len(numpy.unique(P[:, 0])))
+    return __fracture__(P, max_vertex_count, axis, 0)
+
+
+def __ring__(points):
+    """ the points as an array, without consecutive identical points and without closing point """
+    P = numpy.asarray(points, dtype = numpy.float64).reshape(-1, 2)
+    if len(P) < 2:
+        return P
+    keep = numpy.any(P != numpy.roll(P, -1, 0), 1)
+    if not keep.any():
+        return P[:1]
+    return P[keep]
+
+
+def __fracture__(P, max_vertex_count, axis, depth):
+    if len(P) <= max_vertex_count:
+        return [P]
+    if depth < __MAX_SPLIT_DEPTH__:
+        for a in (axis, 1 - axis):
+            pieces = __split_in_slabs__(P, max_vertex_count, a)
+            if pieces is not None:
+                result = []
+                for Q in pieces:
+                    result.extend(__fracture__(Q, max_vertex_count, 1 - a, depth + 1))
+                return result
+    return __trapezoids__(P)
+
+
+def __cut_values__(u, max_vertex_count):
+    """ coordinates of the cut lines: between the vertex coordinates, such that every slab 
+        holds about half the maximum number of vertices """
+    values, counts = numpy.unique(u, return_counts = True)
+    if len(values) < 2:
+        return values[:0]
+    target = max(max_vertex_count // 2, 1)
+    slabs = (numpy.cumsum(counts) - counts) // target
+    k = numpy.flatnonzero(numpy.diff(slabs) > 0)
+    if len(k) == 0:
+        # all the vertices fit in one slab: cut in the middle
+        k = numpy.array([len(values) // 2 - 1])
+    cuts = 0.5 * (values[k] + values[k + 1])
+    return cuts[(cuts > values[k]) & (cuts < values[k + 1])]
+
+
+def __split_in_slabs__(P, max_vertex_count, axis):
+    """ splits a polygon by lines perpendicular to axis. Returns the pieces, or None if the polygon 
+        can not be cut or the pieces can not be traced consistently """
+    u = P[:, axis]
+    c = __cut_values__(u, max_vertex_count)
+    if len(c) == 0:
+        return None
+    n = len(P)
+    nxt = numpy.roll(numpy.arange(n), -1)
+    slab = numpy.searchsorted(c, u)
+    steps = slab[nxt] - slab
+    n_o_crossings = numpy.abs(steps)
+    K = n_o_crossings.sum()
+    if K == 0:
+        return None
+
+    # the crossings of the edges with the cut lines, in the order of the ring
+    E = numpy.repeat(numpy.arange(n), n_o_crossings)
+    first = numpy.cumsum(n_o_crossings) - n_o_crossings
+    step = numpy.arange(K) - numpy.repeat(first, n_o_crossings)
+    up = steps[E] > 0
+    line = numpy.where(up, slab[E] + step, slab[E] - 1 - step)
+    p0, p1 = P[E], P[nxt[E]]
+    cu = c[line]
+    cv = p0[:, 1 - axis] + (cu - p0[:, axis]) * (p1[:, 1 - axis] - p0[:, 1 - axis]) / (p1[:, axis] - p0[:, axis])
+
+    # the ring with the crossings inserted after the start point of their edge
+    N = n + K
+    vertex_position = numpy.arange(n) + first
+    crossing_position = vertex_position[E] + 1 + step
+    Q = numpy.zeros((N, 2), dtype = numpy.float64)
+    Q[vertex_position] = P
+    Q[crossing_position, axis] = cu
+    Q[crossing_position, 1 - axis] = cv
+
+    # arc m runs from crossing m to crossing m + 1, on the side of the line towards which crossing m goes
+    arc_slab = numpy.where(up, line + 1, line)
+    partner = __pair_crossings__(line, cv, up)
+    if partner is None:
+        return None
+
+    pieces = []
+    visited = numpy.zeros((K,), dtype = bool)
+    for m0 in range(K):
+        if visited[m0]:
+            continue
+        indices = []
+        m = m0
+        while not visited[m]:
+            visited[m] = True
+            e = (m + 1) % K
+            end = crossing_position[e] if e > m else crossing_position[e] + N
+            indices.append(numpy.arange(crossing_position[m], end + 1) % N)
+            m = partner[e]
+            if arc_slab[m] != arc_slab[m0]:
+                return None
+        if m != m0:
+            return None
+        piece = __ring__(Q[numpy.concatenate(indices)])
+        if len(piece) >= 3:
+            pieces.append(piece)
+    return pieces
+
+
+def __pair_crossings__(line, cv, up):
+    """ pairs the crossings on each line which bound the same interval inside the polygon: along the line,
+        the crossings alternate in direction. Crossings at the same position are ordered to keep alternating. 
+        Returns None if they do not alternate. """
+    partner = numpy.zeros((len(line),), dtype = numpy.int64)
+    order = numpy.lexsort((cv, line))
+    starts = numpy.flatnonzero(numpy.hstack(([True], line[order][1:] != line[order][:-1], [True])))
+    for s, t in zip(starts[:-1], starts[1:]):
+        crossings = list(order[s:t])
+        if len(crossings) % 2:
+            return None
+        paired = []
+        expected = up[crossings[0]]
+        i = 0
+        while i < len(crossings):
+            # the group of crossings at the same position
+            j = i + 1
+            while j < len(crossings) and cv[crossings[j]] == cv[crossings[i]]:
+                j += 1
+            group = crossings[i:j]
+            while group:
+                match = [g for g in group if up[g] == expected]
+                g = match[0] if match else group[0]
+                group.remove(g)
+                paired.append(g)
+                expected = not up[g]
+            i = j
+        paired = numpy.array(paired)
+        if numpy.any(up[paired[0::2]] == up[paired[1::2]]):
+            return None
+        partner[paired[0::2]] = paired[1::2]
+        partner[paired[1::2]] = paired[0::2]
+    return partner
+
+
+def __trapezoids__(P):
+    """ cuts a polygon in trapezoids between horizontal lines through all its vertices, with even-odd filling """
+    n = len(P)
+    nxt = numpy.roll(numpy.arange(n), -1)
+    x0, y0, x1, y1 = P[:, 0], P[:, 1], P[nxt, 0], P[nxt, 1]
+    Y = numpy.unique(y0)
+    k0 = numpy.searchsorted(Y, numpy.minimum(y0, y1))
+    k1 = numpy.searchsorted(Y, numpy.maximum(y0, y1))
+    n_o_slabs = k1 - k0
+    E = numpy.repeat(numpy.arange(n), n_o_slabs)
+    S = k0[E] + numpy.arange(len(E)) - numpy.repeat(numpy.cumsum(n_o_slabs) - n_o_slabs, n_o_slabs)
+
+    def x_at(y):
+        # exact at the end points of the edges
+        xi = x0[E] + (y - y0[E]) * (x1[E] - x0[E]) / (y1[E] - y0[E])
+        return numpy.where(y == y0[E], x0[E], numpy.where(y == y1[E], x1[E], xi))
+    yb, yt = Y[S], Y[S + 1]
+    xb, xt = x_at(yb), x_at(yt)
+    # in each slab, the edges are ordered along x and bound the trapezoids two by two
+    order = numpy.lexsort((xb + xt, S))
+    l, r = order[0::2], order[1::2]
+    nonempty = (xb[l] != xb[r]) | (xt[l] != xt[r])
+    l, r = l[nonempty], r[nonempty]
+    corners = numpy.dstack((numpy.column_stack((xb[l], xb[r], xt[r], xt[l])),
+                            numpy.column_stack((yb[l], yb[r], yt[r], yt[l]))))
+    return [__ring__(T) for T in corners]
@@ -0,0 +1,253 @@
+# IPKISS - Parametric Design Framework
+# Copyright (C) 2002-2012  Ghent University - imec
+# 
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 2
+# of the License, or (at your option) any later version.
+# 
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+# 
+# i-depot BBIE 7396, 7556, 7748
+# 
+# Contact: ipkiss@intec.ugent.be
+
+
+
+from .coord import Coord2
+import numpy
+
+__all__ = ["segment_ends",
+           "segment_pairs",
+           "segments_cross",
+           "segments_coincide",
+           "segments_intersection",
+           "intersection_points",
+           "unique_points",
+           "winding_numbers"]
+
+# maximum number of candidate pairs which are tested in one array operation
+__MAX_PAIRS_PER_PASS__ = 1000000
+
+
+def segment_ends(points, closed):
+    """ (begins, ends) arrays of the segments of a list of points, in the order of Shape.segments """
+    P = numpy.asarray(points, dtype = numpy.float64).reshape(-1, 2)
+    if len(P) < 2:
+        return (P[:0], P[:0])
+    if closed:
+        return (P, numpy.roll(P, 1, 0))
+    else:
+        return (P[:-1], P[1:])
+
+
+def __boxes__(begins, ends):
+    return (numpy.minimum(begins[:, 0], ends[:, 0]), numpy.minimum(begins[:, 1], ends[:, 1]),
+            numpy.maximum(begins[:, 0], ends[:, 0]), numpy.maximum(begins[:, 1], ends[:, 1]))
+
+
+def __sweep_axis__(boxes1, boxes2):
+    """ sweeps along the axis on which the segments are shortest compared to the span of all segments, 
+        so that few of them overlap in their projection """
+    def relative_extent(lo1, hi1, lo2, hi2):
+        span = max(hi1.max(), hi2.max()) - min(lo1.min(), lo2.min())
+        if span <= 0.0:
+            return 0.0
+        return ((hi1 - lo1).sum() + (hi2 - lo2).sum()) / span
+    w1, s1, e1, n1 = boxes1
+    w2, s2, e2, n2 = boxes2
+    return int(relative_extent(s1, n1, s2, n2) < relative_extent(w1, e1, w2, e2))
+
+
+def __ranges__(owners, lo, hi, order):
+    """ expands the ranges order[lo:hi] of each owner to arrays of pairs, in chunks of limited size """
+    counts = hi - lo
+    ends = numpy.cumsum(counts)
+    first = 0
+    while first < len(owners):
+        last = numpy.searchsorted(ends, ends[first] - counts[first] + __MAX_PAIRS_PER_PASS__, "right")
+        last = max(last, first + 1)
+        c = counts[first:last]
+        n = c.sum()
+        if n:
+            starts = numpy.cumsum(c) - c
+            I = numpy.repeat(owners[first:last], c)
+            J = order[numpy.repeat(lo[first:last], c) + numpy.arange(n) - numpy.repeat(starts, c)]
+            yield (I, J)
+        first = last
+
+
+def segment_pairs(begins1, ends1, begins2 = None, ends2 = None, margin = 0.0):
+    """ pairs (I, J) of the segments of the first and the second set of which the bounding boxes overlap 
+        (or are no further apart than margin), sorted on I and then J. The boxes are swept along one axis, 
+        so only the segments which overlap in their projection on that axis are compared. 
+        If no second set is given, the pairs I < J of the first set with itself are returned. """
+    self_pairs = begins2 is None
+    if self_pairs:
+        begins2, ends2 = begins1, ends1
+    if len(begins1) == 0 or len(begins2) == 0:
+        return (numpy.zeros((0,), dtype = numpy.int64), numpy.zeros((0,), dtype = numpy.int64))
+    boxes1 = __boxes__(begins1, ends1)
+    boxes2 = __boxes__(begins2, ends2)
+    a = __sweep_axis__(boxes1, boxes2)
+    lo1, hi1, plo1, phi1 = boxes1[a], boxes1[a + 2], boxes1[1 - a], boxes1[3 - a]
+    lo2, hi2, plo2, phi2 = boxes2[a], boxes2[a + 2], boxes2[1 - a], boxes2[3 - a]
+    order1 = numpy.argsort(lo1, kind = "mergesort")
+    order2 = numpy.argsort(lo2, kind = "mergesort")
+    sorted_lo1 = lo1[order1]
+    sorted_lo2 = lo2[order2]
+    owners1 = numpy.arange(len(lo1))
+    owners2 = numpy.arange(len(lo2))
+
+    # every overlapping pair is found once: from the segment which starts first along the sweep axis
+    chunks = []
+    for (I, J) in __ranges__(owners1, 
+                             numpy.searchsorted(sorted_lo2, lo1, "left"), 
+                             numpy.searchsorted(sorted_lo2, hi1 + margin, "right"), 
+                             order2):
+        chunks.append((I, J))
+    if not self_pairs:
+        for (J, I) in __ranges__(owners2, 
+                                 numpy.searchsorted(sorted_lo1, lo2, "right"), 
+                                 numpy.searchsorted(sorted_lo1, hi2 + margin, "right"), 
+                                 order1):
+            chunks.append((I, J))
+
+    result_I = []
+    result_J = []
+    for (I, J) in chunks:
+        ok = (plo1[I] <= phi2[J] + margin) & (plo2[J] <= phi1[I] + margin)
+        if self_pairs:
+            # pairs starting at the same position are found from both segments
+            ok &= (I != J) & ((lo1[I] < lo1[J]) | (I < J))
+        I, J = I[ok], J[ok]
+        if self_pairs:
+            I, J = numpy.minimum(I, J), numpy.maximum(I, J)
+        result_I.append(I)
+        result_J.append(J)
+    if not result_I:
+        return (numpy.zeros((0,), dtype = numpy.int64), numpy.zeros((0,), dtype = numpy.int64))
+    I = numpy.concatenate(result_I)
+    J = numpy.concatenate(result_J)
+    order = numpy.lexsort((J, I))
+    return (I[order], J[order])
+
+
+def __line_coefficients__(begins, ends):
+    A = ends[:, 1] - begins[:, 1]
+    B = -ends[:, 0] + begins[:, 0]
+    return (A, B)
+
+
+def segments_cross(begins1, ends1, begins2, ends2, inclusive = False):
+    """ for each pair of segments, true if they intersect. Same arithmetic as shape_info.lines_cross """
+    A1, B1 = __line_coefficients__(begins1, ends1)
+    C1 = - (begins1[:, 1] * B1 + begins1[:, 0] * A1)
+    A2, B2 = __line_coefficients__(begins2, ends2)
+    C2 = - (begins2[:, 1] * B2 + begins2[:, 0] * A2)
+    side1 = (A1 * begins2[:, 0] + B1 * begins2[:, 1] + C1) * (A1 * ends2[:, 0] + B1 * ends2[:, 1] + C1)
+    side2 = (A2 * begins1[:, 0] + B2 * begins1[:, 1] + C2) * (A2 * ends1[:, 0] + B2 * ends1[:, 1] + C2)
+    if inclusive:
+        crossing = (side1 <= 0) & (side2 <= 0)
+    else:
+        crossing = (side1 < 0) & (side2 < 0)
+    return crossing & (A1 * B2 != A2 * B1)
+
+
+def segments_coincide(begins1, ends1, begins2, ends2):
+    """ for each pair of segments, true if they lie on the same line. Same arithmetic as shape_info.lines_coincide """
+    A1, B1 = __line_coefficients__(begins1, ends1)
+    C1 = - (begins1[:, 1] * B1 + begins1[:, 0] * A1)
+    A2, B2 = __line_coefficients__(begins2, ends2)
+    C2 = - (begins2[:, 1] * B2 + begins2[:, 0] * A2)
+    degenerate = ((A1 == 0) & (B1 == 0)) | ((A2 == 0) & (B2 == 0))
+    return (~degenerate & (numpy.abs(A1 * B2 - A2 * B1) < 1E-10) & (numpy.abs(C1 * A2 - C2 * A1) < 1E-10) 
+            & (numpy.abs(C1 * B2 - C2 * B1) < 1E-10))
+
+
+def segments_intersection(begins1, ends1, begins2, ends2):
+    """ for each pair of (non-parallel) segments, the intersection of the lines through them. 
+        Same arithmetic as shape_info.intersection """
+    A1, B1 = __line_coefficients__(begins1, ends1)
+    C1 = begins1[:, 1] * B1 + begins1[:, 0] * A1
+    A2, B2 = __line_coefficients__(begins2, ends2)
+    C2 = begins2[:, 1] * B2 + begins2[:, 0] * A2
+    x = (C1 * B2 - C2 * B1) / (A1 * B2 - A2 * B1)
+    y = (C1 * A2 - C2 * A1) / (B1 * A2 - B2 * A1)
+    return numpy.column_stack((x, y))
+
+
+def intersection_points(begins1, ends1, begins2, ends2, pairs):
+    """ list of the intersection points of the given pairs of segments, in the order of the pairs: 
+        the crossing point of crossing segments, and the two middlemost end points of coinciding segments """
+    from .shape_info import sort_points_on_line
+    I, J = pairs
+    b1, e1, b2, e2 = begins1[I], ends1[I], begins2[J], ends2[J]
+    crossing = segments_cross(b1, e1, b2, e2, inclusive = True)
+    coinciding = ~crossing & segments_coincide(b1, e1, b2, e2)
+    hits = numpy.flatnonzero(crossing | coinciding)
+    X = segments_intersection(b1[crossing], e1[crossing], b2[crossing], e2[crossing])
+    crossing_index = numpy.cumsum(crossing) - 1
+    points = []
+    for h in hits:
+        if crossing[h]:
+            x = X[crossing_index[h]]
+            points.append(Coord2(x[0], x[1]))
+        else:
+            pl = sort_points_on_line([b1[h], e1[h], b2[h], e2[h]])
+            points += [pl[1], pl[2]]  # the two middlemost points
+    return points
+
+
+def unique_points(points, tolerance = 10e-10):
+    """ the points without the ones which equal (as Coord2) a point earlier in the list. The points are binned 
+        on the tolerance, so only the points in neighbouring bins are compared. """
+    bins = dict()
+    unique = []
+    for c in points:
+        bx, by = int(numpy.floor(c[0] / tolerance)), int(numpy.floor(c[1] / tolerance))
+        duplicate = False
+        for dx in (-1, 0, 1):
+            for dy in (-1, 0, 1):
+                for uc in bins.get((bx + dx, by + dy), ()):
+                    if abs(c[0] - uc[0]) < tolerance and abs(c[1] - uc[1]) < tolerance:
+                        duplicate = True
+        if not duplicate:
+            bins.setdefault((bx, by), []).append(c)
+            unique.append(c)
+    return unique
+
+
+def winding_numbers(points, polygon_points, inclusive = False):
+    """ the winding numbers of a closed polygon around each of the points, as in Shape.winding_number_test. 
+        The points are sorted on their y coordinate, so every edge is only tested against the points
+        between the y coordinates of its begin and end point. """
+    P = numpy.asarray(points, dtype = numpy.float64).reshape(-1, 2)
+    V0 = numpy.asarray(polygon_points, dtype = numpy.float64).reshape(-1, 2)
+    V1 = numpy.roll(V0, -1, 0)
+    wn = numpy.zeros((len(P),))
+    if len(P) == 0 or len(V0) == 0:
+        return wn
+    order = numpy.argsort(P[:, 1], kind = "mergesort")
+    sorted_y = P[order, 1]
+    # an edge crosses the horizontal line through a point if min(y0, y1) <= y < max(y0, y1)
+    lo = numpy.minimum(V0[:, 1], V1[:, 1])
+    hi = numpy.maximum(V0[:, 1], V1[:, 1])
+    for (I, J) in __ranges__(numpy.arange(len(V0)), 
+                             numpy.searchsorted(sorted_y, lo, "left"), 
+                             numpy.searchsorted(sorted_y, hi, "left"), 
+                             order):
+        # +1 if the point lies to the left of the edge, -1 to the right
+        D = V1[I] - V0[I]
+        s = numpy.sign((P[J, 1] - V0[I, 1]) * D[:, 0] - (P[J, 0] - V0[I, 0]) * D[:, 1])
+        if inclusive:
+            s[s == 0] = -1
+        wn += numpy.bincount(J, weights = s, minlength = len(P))
+    return wn / 2
@@ -59,6 +59,9 @@ class PointsDefinitionProperty(DefinitionProperty):
         value = f([])
         if (value is None):
             value = self.__process__([])
+        elif isinstance(value, ndarray) and (value.ndim == 2):
+            # copied, so the points are not shared with the array returned by the getter
+            value = self.__process__(array(value))
         else:
             value = self.__process__([c.convert_to_array() if isinstance(c, Coord) else c for c in value])
         self.__cache_property_value_on_object__(obj, value)
@@ -84,6 +87,20 @@ class PointsDefinitionProperty(DefinitionProperty):
         else:
                 raise TypeError("Invalid type of points in setting value of PointsDefinitionProperty: " + str(type(points)))
     
+    def __get__(self, obj, type = None):
+        points = self.__get_shared__(obj, type)
+        if (obj is not None) and (not points.flags.writeable):
+            # the points are shared with a deep copy: this shape gets its own copy
+            stored = obj.__store__.get(self.__name__, None)
+            points = array(points)
+            if stored is not None:
+                obj.__store__[self.__name__] = (points, stored[1])
+        return points
+
+    def __get_shared__(self, obj, type = None):
+        """ internal use: the points, without copying them if they are shared with a deep copy. They should not be modified. """
+        return DefinitionProperty.__get__(self, obj, type)
+
     def __set__(self, obj, points):
         points = self.__process__(points)
         self.__externally_set_property_value_on_object__(obj, points)
@@ -112,6 +129,7 @@ def points_add_polar(pts, distance, angle=0.0):
 
 class Shape(transformable.Transformable, StrongPropertyInitializer, MixinBowl):
     '''Basic shape'''
+    __fast_copy__ = True
     points = PointsDefinitionProperty(fdef_name="define_points")     
     start_face_angle = AngleProperty(allow_none=True, doc="Use this to overrule the 'dangling' angle at the start of an open shape")
     end_face_angle = AngleProperty(allow_none=True, doc="Use this to overrule the 'dangling' angle at the end of an open shape")
@@ -274,38 +292,46 @@ class Shape(transformable.Transformable, StrongPropertyInitializer, MixinBowl):
     def remove_loops(self):
         """ removes local loops"""
         from . import shape_info
-        pts = self.points
-        if len(pts) <= 3:
+        from .segment_intersections import segment_pairs
+        from .. import settings
+        if len(self.points) <= 3:
             return self
 
-        Shape.remove_identicals(self) # avoids recomputation
+        Shape.remove_identicals(self)
         # eliminate backloop
-        nc = pts
-        dels = []
-        i = -1
+        nc = array(self.points)
         L = len(nc)
         if self.closed:
-            L2 = L + 1
+            n_o_segments = L
         else:
-            L2 = L
-        while i < L - 2:
-            i += 1
-            if i in dels:
+            n_o_segments = L - 1
+        # the segments (nc[k], nc[k+1]) which may cross a later segment: the loop between them is cut off
+        ends = roll(nc, -1, 0)
+        (I, K) = segment_pairs(nc[:n_o_segments], ends[:n_o_segments], margin = 0.5 / settings.get_grids_per_unit())
+        later = (K >= I + 2)
+        (I, K) = (I[later], K[later])
+        first = I.searchsorted(numpy.arange(L + 1))
+        deleted = numpy.zeros((L,), dtype = bool)
+        i_next = 0
+        for i in numpy.unique(I):
+            if i < i_next or i >= L - 1:
                 continue
             c1 = nc[i]
             c2 = nc[i + 1]
-            k = i + 2
-            while k < L2 - 1:
-
-                c3 = nc[k % L]
+            k_last = i
+            for k in K[first[i]:first[i + 1]]:
+                c3 = nc[k]
                 c4 = nc[(k + 1) % L]
                 if shape_info.lines_cross(c1, c2, c3, c4):
-                    nc[i + 1] = shape_info.intersection(c1, c2, c3, c4)
-                    dels.append(slice(i + 2, k + 1))
-                    c2 = nc[i + 1]
-                k += 1 
-        for s in reversed(dels):
-            self.points = delete(nc, s, 0)
+                    c2 = shape_info.intersection(c1, c2, c3, c4)
+                    k_last = k
+            if k_last > i:
+                # the loop is replaced by the intersection point, which starts the rest of segment k_last
+                deleted[i + 1:k_last] = True
+                nc[k_last] = (c2[0], c2[1])
+                i_next = k_last
+        if deleted.any():
+            self.points = nc[~deleted]
         return self
 
     def tolist(self):
@@ -382,27 +408,12 @@ class Shape(transformable.Transformable, StrongPropertyInitializer, MixinBowl):
                     inclusive=True denotes inclusion of points on the shape"""
         ## uses the winding number algorithm
         ## http://www.geometryalgorithms.com/Archive/algorithm_0103/algorithm_0103.htm#wn_PinPolygon()
-        from . import shape_info
-        wn = 0    # the winding number counter
-        ## loop through all edges of the polygon
+        from .segment_intersections import winding_numbers
         S = Shape(point) # convert input to uniform data format shape
-        P = S.points
-        N = len(self.points)
-        pts = self.points
-        V0 = pts # starting points of edges
-        V1 = roll(V0, -1, 0) # end points of edges
-
-        wn = zeros(size(P, 0))
-        for i in range(N): 
-            v_sign0 = ((V0[i, 1] <= P[:, 1]) * 2 - 1) # positive if V0 is below P
-            v_sign1 = ((V1[i, 1] > P[:, 1]) * 2 - 1)  # positive if V1 is above P
-            if inclusive:
-                wn += (v_sign0 == v_sign1) * numpy.sign(shape_info.is_west(P, V0[i], V1[i]) - 0.1)
-            else:
-                wn += (v_sign0 == v_sign1) * shape_info.is_west(P, V0[i], V1[i])
+        wn = winding_numbers(S.points, self.points, inclusive)
         if len(wn) == 1:
-            return wn[0] / 2
-        return wn / 2
+            return wn[0]
+        return wn
 
 
     def convex_hull(self):
@@ -437,6 +448,21 @@ class Shape(transformable.Transformable, StrongPropertyInitializer, MixinBowl):
         if not self.size_info.encloses(point, inclusive): return False
         return (self.winding_number_test(point, inclusive) != 0)
 
+    def encloses_points(self, points, inclusive = False):
+        """ tests for each of the points whether it lies in the shape (closed). Returns an array of booleans """
+        from .segment_intersections import winding_numbers
+        P = Shape(points).points
+        result = zeros((len(P),), dtype = bool)
+        if len(self.points) == 0 or len(P) == 0:
+            return result
+        si = self.size_info
+        if inclusive:
+            in_box = (P[:, 0] >= si.west) & (P[:, 0] <= si.east) & (P[:, 1] >= si.south) & (P[:, 1] <= si.north)
+        else:
+            in_box = (P[:, 0] > si.west) & (P[:, 0] < si.east) & (P[:, 1] > si.south) & (P[:, 1] < si.north)
+        result[in_box] = (winding_numbers(P[in_box], self.points, inclusive) != 0)
+        return result
+
     def x_coords(self):
         """ returns the x coordinates """
         return self.points[:, 0]
@@ -479,30 +505,43 @@ class Shape(transformable.Transformable, StrongPropertyInitializer, MixinBowl):
 
     def intersections(self, other_shape):
         """ the intersections with this shape and the other shape """
-        from shape_info import intersection, lines_cross, lines_coincide, sort_points_on_line, points_unique
+        from .segment_intersections import segment_ends, segment_pairs, intersection_points, unique_points
+        from .. import settings
         s = Shape(self)
         s.remove_straight_angles()
-        segments1 = s.segments() 
-        if len(segments1) < 1:
+        (begins1, ends1) = segment_ends(s.points, s.closed)
+        if len(begins1) < 1:
             return []
 
         s = Shape(other_shape)
         s.remove_straight_angles()
-        segments2 = s.segments() 
-        if len(segments2) < 1:
+        (begins2, ends2) = segment_ends(s.points, s.closed)
+        if len(begins2) < 1:
             return []
 
-        intersections = []
-        for s1 in segments1:
-            for s2 in segments2:
-                if lines_cross(s1[0], s1[1], s2[0], s2[1], inclusive = True):
-                    intersections += [intersection(s1[0], s1[1], s2[0], s2[1])]
-                elif lines_coincide(s1[0], s1[1], s2[0], s2[1]):
-                    pl = sort_points_on_line([s1[0], s1[1], s2[0], s2[1]])
-                    intersections += [pl[1], pl[2]]  # the two middlemost points 
-        intersections = points_unique(intersections)
+        # coinciding segments which lie apart do not intersect
+        pairs = segment_pairs(begins1, ends1, begins2, ends2, margin = 0.5 / settings.get_grids_per_unit())
+        intersections = unique_points(intersection_points(begins1, ends1, begins2, ends2, pairs))
         return Shape(intersections)
 
+    def self_intersections(self):
+        """ the points where the shape intersects itself, or where non-consecutive segments touch or overlap """
+        from .segment_intersections import segment_ends, segment_pairs, intersection_points, unique_points
+        from .. import settings
+        s = Shape(self)
+        s.remove_straight_angles()
+        (begins, ends) = segment_ends(s.points, s.closed)
+        n = len(begins)
+        if n < 3:
+            return Shape()
+        (I, J) = segment_pairs(begins, ends, margin = 0.5 / settings.get_grids_per_unit())
+        # consecutive segments share a point
+        consecutive = (J == I + 1)
+        if s.closed:
+            consecutive |= (I == 0) & (J == n - 1)
+        pairs = (I[~consecutive], J[~consecutive])
+        return Shape(unique_points(intersection_points(begins, ends, begins, ends, pairs)))
+
     def define_size_info(self):
             si = size_info.size_info_from_numpyarray(self.points)    
             return si
@@ -703,7 +742,15 @@ class Shape(transformable.Transformable, StrongPropertyInitializer, MixinBowl):
         return not self.__eq__(other)   
  
     def __deepcopy__(self, memo): #FIXME: this should be removed (fallback on __deepcopy__ from initializer.py, but for some reason this gives wrong results in test_ipkiss.test_ipkiss_examples (logo's)... so we leave it for now   
-        return Shape(points = deepcopy(self.points), 
+        # copy-on-write: the copy shares the (now read-only) point array, until either shape reads its points
+        points = Shape.points.__get_shared__(self)
+        points.flags.writeable = False
+        if (type(self) is Shape) and self.__can_clone__():
+            # the other property values of a plain shape are immutable
+            S = self.__clone__()
+            S.closed = self.closed
+            return S
+        return Shape(points = points, 
                      closed = self.closed,
                      start_face_angle = self.start_face_angle,
                      end_face_angle = self.end_face_angle)
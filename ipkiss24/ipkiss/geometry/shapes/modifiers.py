@@ -30,6 +30,7 @@ from ..size_info import SizeInfo
 from ... import settings
 from numpy import array, arange, roll, size, amax, amin, column_stack, sin, cos, vstack
 from numpy import tan, abs, ones, flipud, sign, delete, hstack, cumsum
+from numpy import ceil, where, repeat, zeros
 from math import pi, atan2
 from ipcore.properties.predefined import AngleProperty, RESTRICT_NONNEGATIVE, RESTRICT_NUMBER, RESTRICT_POSITIVE 
 from ipcore.properties.predefined import PositiveNumberProperty, NonNegativeNumberProperty, BoolProperty, AngleProperty, NumberProperty
@@ -64,6 +65,45 @@ __all__ = ["ShapeExtendEnds",
            "ShapeSamplePeriodic",
            ]
 
+def __bends_points__(start_points, radii, input_angles, angle_amounts, angle_step):
+    """ points of a series of circular bends, all computed at once. Bend i starts in start_points[i] 
+        with direction input_angles[i] and turns over angle_amounts[i] (in degrees). The points are 
+        identical to those of ShapeBendRelative(start_points[i], radii[i], input_angles[i], angle_amounts[i], angle_step). """
+    if (len(radii) == 0):
+        return zeros((0, 2))
+    # -1 for clockwise bends (negative turns), +1 for counterclockwise bends
+    s = where(angle_amounts < 0, -1, 1)
+    # ShapeBend: center, start and end angle of the arc
+    center_x = start_points[:, 0] - s * radii * sin(input_angles * DEG2RAD)
+    center_y = start_points[:, 1] + s * radii * cos(input_angles * DEG2RAD)
+    start_angles = input_angles - s * 90.0
+    end_angles = (input_angles + angle_amounts) - s * 90.0
+    # ShapeEllipseArc: sample the arcs with at most angle_step between the points
+    n_s = (end_angles - start_angles) / angle_step
+    sa = start_angles * DEG2RAD
+    ea = end_angles * DEG2RAD
+    if not ((radii > 0).all() and (n_s != 0).all()):
+        # invalid radii and bends without a turn are left to ShapeBendRelative
+        return vstack([ShapeBendRelative(start_points[i], radii[i], input_angles[i], angle_amounts[i], angle_step).points for i in range(len(radii))])
+    steps = s * ((ea - sa) / (ceil(abs(n_s)) * sign(n_s)))
+    wrap = (s * sa > s * ea)
+    while wrap.any():
+        ea[wrap] += s[wrap] * 2 * pi
+        wrap = (s * sa > s * ea)
+    # the angles as numpy.arange(sa, ea + 0.5 * step, step) generates them for each bend
+    n_o_angles = ceil(((ea + 0.5 * steps) - sa) / steps).astype(int)
+    n_o_angles[n_o_angles < 0] = 0
+    first = cumsum(n_o_angles) - n_o_angles
+    index = arange(n_o_angles.sum()) - repeat(first, n_o_angles)
+    sa_r = repeat(sa, n_o_angles)
+    angles = sa_r + index * repeat((sa + steps) - sa, n_o_angles)
+    angles[index == 0] = sa_r[index == 0]
+    angles[index == 1] = (sa_r + repeat(steps, n_o_angles))[index == 1]
+    radii_r = repeat(radii, n_o_angles)
+    return column_stack((cos(angles) * radii_r + repeat(center_x, n_o_angles), 
+                         sin(angles) * radii_r + repeat(center_y, n_o_angles)))
+
+
 class ShapeRoundGeneric(__ShapeModifier__):
     """ returns a shape with rounded corners based on a given shape """
 
@@ -96,24 +136,18 @@ class ShapeRoundGeneric(__ShapeModifier__):
         # create the bends
         Swsa = c - column_stack((L * cos(a1), L * sin(a1))) # bend start points (whereby we can ignore the 1st and last point for an open shape)
 
-        S = []
-        if not closed: 
-            S.append(array([c[0]]))
-        for i in range(1, len(c) - 1):  #ignore first and last point in matrix
-            sh = ShapeBendRelative(Swsa[i], r[i], a1[i] * RAD2DEG, t[i] * RAD2DEG, self.angle_step)
-            S.append(sh.points)
-
+        corners = range(1, len(c) - 1) #ignore first and last point in matrix
         if closed: #construct first and last bend in case the shape is closed
-            sh = ShapeBendRelative(Swsa[-1], r[-1], a1[-1] * RAD2DEG, t[-1] * RAD2DEG, self.angle_step)
-            S.append(sh.points)
-            sh = ShapeBendRelative(Swsa[0], r[0], a1[0] * RAD2DEG, t[0] * RAD2DEG, self.angle_step)
-            S.append(sh.points)
+            corners += [len(c) - 1, 0]
+        bends = __bends_points__(Swsa[corners], r[corners], a1[corners] * RAD2DEG, t[corners] * RAD2DEG, self.angle_step)
+
+        if closed:
+            pts = bends
             self.closed = True
         else:
             # open curve
-            S.append(array([c[-1]]))
+            pts = vstack((c[:1], bends, c[-1:]))
             self.closed = False
-        pts = vstack(S)
         return pts
 
     def __radii_and_turns__(self, s):
@@ -125,8 +159,7 @@ class ShapeRoundGeneric(__ShapeModifier__):
         t = (a2 - a1 + pi) % (2 * pi) - pi # turns, save an extra angle computation
         tt = abs(tan(0.5 * t))
         L = R * tt # length of the straight section consumed by the bend
-        (Swsa, dummy) = self.__original_shape_without_straight_angles__(self.original_shape, self.radii)        
-        if not Swsa.closed:
+        if not s.closed:
             L[0] = 0
             L[-1] = 0
         # check where the bend consumes more length than possible!
@@ -138,7 +171,7 @@ class ShapeRoundGeneric(__ShapeModifier__):
         r_difference = R - r 
         if (r_difference > settings.get_current_library().units_per_grid).any() : 
             LOG.warning("Bend radius is reduced by maximum %f to round shape." % max(r_difference))
-        if not Swsa.closed:
+        if not s.closed:
             r[0] = 0
             r[-1] = 0
         L = r * tt # recompute the length of the straight section consumed by the bend
@@ -666,10 +699,10 @@ class ShapeOffset(__ShapeStartEndAngle__):
             offset = offset,
             **kwargs)
 
-    def define_points(self, pts):
+    @cache()
+    def get_offset_directions(self):
+        """ returns the displacement of each point of the original shape (without straight angles) for a unit offset """
         original = self.__get_original_shape_without_straight_angles__()
-        if len(original) <= 1: return
-
         a2 = original.angles_rad() * 0.5
         a1 = roll(a2, 1)
 
@@ -682,10 +715,14 @@ class ShapeOffset(__ShapeStartEndAngle__):
 
         a_plus = a2 + a1
         cos_a_min = cos(a2 - a1)
-        offsets = column_stack((-sin(a_plus) / cos_a_min, cos(a_plus) / cos_a_min)) * (self.offset)
+        return column_stack((-sin(a_plus) / cos_a_min, cos(a_plus) / cos_a_min))
+
+    def define_points(self, pts):
+        original = self.__get_original_shape_without_straight_angles__()
+        if len(original) <= 1: return
 
         # compute offsets from each point
-        pts = (original.points + offsets)
+        pts = (original.points + self.get_offset_directions() * (self.offset))
         return pts
 
 class ShapeGrow(__ShapeModifier__):
@@ -154,7 +154,7 @@ class __ReversibleTransform__(Transform):
 #----------------------------------------------------------------------------
 
 class GenericNoDistortTransform(__ReversibleTransform__):
-    pass
+    __fast_copy__ = True
 
 
 #----------------------------------------------------------------------------
@@ -420,35 +420,36 @@ class NoDistortTransform(GenericNoDistortTransform):
         if other is None: return copy.deepcopy(self)
 
         if isinstance(other, NoDistortTransform):
-            T = NoDistortTransform()
-
             if self.absolute_magnification:
                 M1 = 1.0
             else:
                 M1 = other.magnification
-            T.magnification = self.magnification * M1
 
             #flip signs
             if other.v_mirror: s_1 = -1
             else:              s_1 = 1
 
             if not self.absolute_rotation:
-                T.rotation = s_1 * self.rotation + other.rotation
+                rotation = s_1 * self.rotation + other.rotation
                 ca = other.__ca__
                 sa = other.__sa__
             else:
-                T.rotation = s_1 * self.rotation
+                rotation = s_1 * self.rotation
                 ca = 1.0
                 sa = 0.0
 
 
             # tricky part: translation
-            T.translation = Coord2(other.translation.x + ca * self.translation.x * M1 - s_1 * sa * self.translation.y * M1,
-                                   other.translation.y + sa * self.translation.x * M1 + s_1 * ca * self.translation.y * M1)
-
-            T.absolute_rotation = self.absolute_rotation or other.absolute_rotation
-            T.absolute_magnification = self.absolute_magnification or other.absolute_magnification
-            T.v_mirror = (not self.v_mirror == other.v_mirror)
+            translation = Coord2(other.translation.x + ca * self.translation.x * M1 - s_1 * sa * self.translation.y * M1,
+                                 other.translation.y + sa * self.translation.x * M1 + s_1 * ca * self.translation.y * M1)
+
+            # all properties are passed to the constructor, so the new transform is validated only once
+            T = NoDistortTransform(translation = translation,
+                                   rotation = rotation,
+                                   magnification = self.magnification * M1,
+                                   v_mirror = (not self.v_mirror == other.v_mirror),
+                                   absolute_magnification = self.absolute_magnification or other.absolute_magnification,
+                                   absolute_rotation = self.absolute_rotation or other.absolute_rotation)
         else:
             T = Transform.__add__(self, other)
         return T
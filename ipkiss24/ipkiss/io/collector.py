@@ -21,6 +21,7 @@
 
 from ipcore.properties.initializer import StrongPropertyInitializer
 from ipcore.properties.descriptor import RestrictedProperty
+from ipcore.properties.predefined import PositiveIntProperty
 from binascii import b2a_hex, a2b_hex
 
 class __Collector__(StrongPropertyInitializer):
@@ -69,3 +70,35 @@ class StreamA2BHexCollector(__StreamCollector__):
     def __iadd__(self, item_list):
         self.o_stream.write(a2b_hex("".join(item_list)))
         return self
+
+class StreamBinaryCollector(__StreamCollector__):
+    """ collects binary strings in a preallocated buffer, which is written to the stream when it is full """
+    buffer_size = PositiveIntProperty(default = 2**20)
+
+    def __init__(self, **kwargs):
+        super(StreamBinaryCollector, self).__init__(**kwargs)
+        self.__buffer__ = bytearray(self.buffer_size)
+        self.__position__ = 0
+
+    def __iadd__(self, item_list):
+        data = "".join(item_list)
+        n = len(data)
+        p = self.__position__
+        if p + n > len(self.__buffer__):
+            self.flush()
+            p = 0
+            if n > len(self.__buffer__):
+                self.o_stream.write(data)
+                return self
+        self.__buffer__[p:p + n] = data
+        self.__position__ = p + n
+        return self
+
+    def flush(self):
+        if self.__position__ > 0:
+            self.o_stream.write(str(self.__buffer__[:self.__position__]))
+            self.__position__ = 0
+
+    def out_str(self):
+        self.flush()
+        return ""
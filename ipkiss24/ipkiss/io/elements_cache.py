@@ -0,0 +1,472 @@
+# IPKISS - Parametric Design Framework
+# Copyright (C) 2002-2012  Ghent University - imec
+# 
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 2
+# of the License, or (at your option) any later version.
+# 
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+# 
+# i-depot BBIE 7396, 7556, 7748
+# 
+# Contact: ipkiss@intec.ugent.be
+
+
+""" Persistent cache of the elements of structures.
+
+    The elements generated by define_elements are stored on disk, under a key derived from the source code of the 
+    structure class, the values of its externally set properties and the technology settings. In a later run, a 
+    structure with the same key gets its elements from the cache instead of generating them.
+
+    Elements are stored as their class and externally set property values, so that they are reconstructed in the 
+    same way as by copy(). The elements of groups, such as waveguides, are stored along. A referenced structure is 
+    stored as its class, property values and name, and is constructed again when the elements are loaded: its own 
+    elements are loaded from the cache when they are needed.
+
+    Defining the elements can have side effects which are replayed when they are loaded: the properties which were
+    calculated on the way (e.g. child structures) are stored along, and the name generator is advanced by the number
+    of names generated, so that structures created later in the run get the same names as without cache.
+
+    Usage:
+        set_elements_disk_cache(ElementsDiskCache(path = "/tmp/ipkiss_cache"))
+
+    The cache can be inspected and purged from the command line:
+        python -m ipkiss.io.elements_cache <path> info|list|purge [--older-than DAYS] [--max-size MB]
+"""
+
+from ipcore.properties.initializer import StrongPropertyInitializer, PropertyInitializer
+from ipcore.properties.predefined import StringProperty, PositiveIntProperty
+from ipcore.properties.descriptor import DefinitionProperty, CACHED
+from ipcore.caching.content import content_key, content_hash, property_values, ContentKeyException
+from ipcore.config.tree import ConfigTree
+from ipkiss.log import IPKISS_LOG as LOG
+from ipkiss import settings
+from ipkiss.settings import set_elements_disk_cache, get_elements_disk_cache
+from ipkiss.primitives.name_generator import __NameGenerator__
+from types import FunctionType, ClassType
+import cPickle as pickle
+import hashlib
+import inspect
+import numpy
+import time
+import sys
+import os
+
+__all__ = ["ElementsDiskCache",
+           "set_elements_disk_cache",
+           "get_elements_disk_cache"]
+
+FORMAT_VERSION = 1
+ENTRY_EXTENSION = ".elements"
+
+
+class __UnsupportedValue__(Exception):
+    pass
+
+
+#----------------------------------------------------------------------------
+# class lookup by path, including classes nested in a class
+#----------------------------------------------------------------------------
+
+__CLASS_PATHS__ = {}
+
+def __class_path__(cls):
+    if cls in __CLASS_PATHS__:
+        return __CLASS_PATHS__[cls]
+    module = sys.modules.get(cls.__module__, None)
+    path = None
+    if not module is None:
+        if getattr(module, cls.__name__, None) is cls:
+            path = (cls.__module__, cls.__name__)
+        else:
+            for (n, c) in vars(module).items():
+                if isinstance(c, (type, ClassType)) and (getattr(c, cls.__name__, None) is cls):
+                    path = (cls.__module__, "%s.%s" % (n, cls.__name__))
+                    break
+    if path is None:
+        raise __UnsupportedValue__("Class %s cannot be found in its module" % cls.__name__)
+    __CLASS_PATHS__[cls] = path
+    return path
+
+
+def __class_from_path__(path):
+    (module_name, name) = path
+    __import__(module_name)
+    obj = sys.modules[module_name]
+    for n in name.split("."):
+        obj = getattr(obj, n)
+    return obj
+
+
+#----------------------------------------------------------------------------
+# encoding of elements into builtin types and numpy arrays
+#----------------------------------------------------------------------------
+
+def __structure_fingerprint__(structure):
+    """ hash of the class and the externally set properties of a structure, except its name """
+    return content_hash((type(structure).__name__, tuple([(p, content_key(v)) for (p, v) in property_values(structure) if p != "name"])))
+
+
+def __name_generator_of__(structure):
+    return getattr(structure, "__name_generator__", None) or __NameGenerator__()
+
+
+def __calculated_properties__(structure):
+    """ names of the properties of which a calculated value is stored on the structure """
+    result = set()
+    for p in structure.__properties__():
+        prop = getattr(type(structure), p)
+        if isinstance(prop, DefinitionProperty) and prop.__value_was_stored__(structure) and (prop.__get_property_value_origin__(structure) == CACHED):
+            result.add(p)
+    return result
+
+
+def __generated_names__(counters_before, counters_after):
+    """ number of names generated per prefix, from the counters of a name generator """
+    return dict([(p, c - counters_before.get(p, 0)) for (p, c) in counters_after.items() if c != counters_before.get(p, 0)])
+
+
+def __encode__(value):
+    from ipkiss.primitives.structure import Structure
+    from ipkiss.primitives.group import __Group__
+    from ipkiss.geometry.coord import Coord2, Coord3
+    t = type(value)
+    if value is None or t in (bool, int, long, float, complex, str, unicode):
+        return value
+    if isinstance(value, numpy.generic):
+        return value.item()
+    if isinstance(value, numpy.ndarray):
+        return ("A", value)
+    if isinstance(value, Structure):
+        return ("S", __class_path__(t), value.name, [(p, __encode__(v)) for (p, v) in property_values(value) if p != "name"], __structure_fingerprint__(value))
+    if isinstance(value, (Coord2, Coord3)):
+        return ("X", __class_path__(t), tuple(value.__content_key__()))
+    if isinstance(value, __Group__):
+        # the elements of groups inside the structure, such as waveguides, are stored along
+        props = property_values(value)
+        elements = None if "elements" in dict(props) else __encode__(value.elements)
+        return ("G", __class_path__(t), [(p, __encode__(v)) for (p, v) in props], elements)
+    if isinstance(value, PropertyInitializer):
+        if isinstance(value, list):
+            return ("TL", __class_path__(t), [__encode__(v) for v in value])
+        return ("O", __class_path__(t), [(p, __encode__(v)) for (p, v) in property_values(value)])
+    if t is list:
+        return ("L", [__encode__(v) for v in value])
+    if t is tuple:
+        return ("T", tuple([__encode__(v) for v in value]))
+    if t is dict:
+        return ("D", [(__encode__(k), __encode__(v)) for (k, v) in value.items()])
+    if isinstance(value, (type, ClassType)):
+        return ("C", __class_path__(value))
+    if isinstance(value, FunctionType) and value.func_closure is None and getattr(sys.modules.get(value.__module__), value.__name__, None) is value:
+        return ("F", (value.__module__, value.__name__))
+    raise __UnsupportedValue__("Cannot store a value of type %s" % str(t))
+
+
+def __create__(cls, encoded_properties, **kwargs):
+    properties = [(p, __decode__(v)) for (p, v) in encoded_properties]
+    kwargs.update(properties)
+    obj = cls(**kwargs)
+    # function properties which set the same value, such as angle_deg and angle_rad, are assigned 
+    # in an arbitrary order: values which are rounded by the conversion are assigned again
+    for (p, v) in properties:
+        if content_key(getattr(obj, p)) != content_key(v):
+            setattr(obj, p, v)
+    return obj
+
+
+def __decode__(value):
+    if type(value) != tuple:
+        return value
+    tag = value[0]
+    if tag == "A":
+        return value[1]
+    if tag == "O":
+        return __create__(__class_from_path__(value[1]), value[2])
+    if tag == "G":
+        cls = __class_from_path__(value[1])
+        G = __create__(cls, value[2])
+        if not value[3] is None:
+            cls.elements.__cache_property_value_on_object__(G, __decode__(value[3]))
+        return G
+    if tag == "TL":
+        cls = __class_from_path__(value[1])
+        return cls([__decode__(v) for v in value[2]])
+    if tag == "S":
+        cls = __class_from_path__(value[1])
+        name = value[2]
+        S = settings.get_current_library().__fast_get_structure__(name)
+        if S is None:
+            S = __create__(cls, value[3], name = name)
+        if (S.name != name) or (type(S) != cls) or (__structure_fingerprint__(S) != value[4]):
+            raise __UnsupportedValue__("Structure %s in the library does not match the cached structure" % name)
+        type(S).__name_generator__.reserve(name)
+        return S
+    if tag == "X":
+        return __class_from_path__(value[1])(*value[2])
+    if tag == "L":
+        return [__decode__(v) for v in value[1]]
+    if tag == "T":
+        return tuple([__decode__(v) for v in value[1]])
+    if tag == "D":
+        return dict([(__decode__(k), __decode__(v)) for (k, v) in value[1]])
+    if tag in ("C", "F"):
+        return __class_from_path__(value[1])
+    raise __UnsupportedValue__("Unknown tag %s in cached elements" % str(tag))
+
+
+#----------------------------------------------------------------------------
+# cache keys
+#----------------------------------------------------------------------------
+
+__CLASS_SOURCE_HASHES__ = {}
+
+def __class_source_hash__(cls):
+    """ hash of the source files of the modules in which the class and its base classes are defined """
+    if not cls in __CLASS_SOURCE_HASHES__:
+        h = hashlib.sha1()
+        modules = []
+        for c in inspect.getmro(cls):
+            if (c.__module__ in modules) or (c.__module__ == "__builtin__"):
+                continue
+            modules.append(c.__module__)
+            try:
+                f = open(inspect.getsourcefile(c), "rb")
+                h.update(f.read())
+                f.close()
+            except (TypeError, IOError):
+                h.update(c.__module__)
+        __CLASS_SOURCE_HASHES__[cls] = h.hexdigest()
+    return __CLASS_SOURCE_HASHES__[cls]
+
+
+def __technology_key__(tree, depth = 0):
+    if depth > 16:
+        return None
+    items = []
+    for (k, v) in sorted(tree.items()):
+        if k == "ADMIN" or k.startswith("__"):
+            continue
+        if isinstance(v, ConfigTree):
+            items.append((k, __technology_key__(v, depth + 1)))
+        else:
+            try:
+                items.append((k, content_key(v)))
+            except ContentKeyException:
+                items.append((k, type(v).__name__))
+    fallback = tree.__dict__.get("fallback", None)
+    if isinstance(fallback, ConfigTree):
+        items.append(("fallback", __technology_key__(fallback, depth + 1)))
+    return (type(tree).__name__, tuple(items))
+
+
+#----------------------------------------------------------------------------
+# disk cache
+#----------------------------------------------------------------------------
+
+class ElementsDiskCache(StrongPropertyInitializer):
+    """ persistent cache of the elements of structures in a local directory """
+    path = StringProperty(required = True, doc = "directory in which the cached elements are stored")
+    max_size = PositiveIntProperty(default = 2 ** 30, doc = "maximum total size of the cache in bytes: the least recently used entries are evicted first")
+
+    def __init__(self, path, **kwargs):
+        super(ElementsDiskCache, self).__init__(path = path, **kwargs)
+        if not os.path.isdir(self.path):
+            os.makedirs(self.path)
+        self.hits = 0
+        self.misses = 0
+        self.__technology_hash__ = None
+        self.__size__ = None
+
+    def technology_hash(self):
+        """ hash of the technology settings, determined at the first use of the cache """
+        if self.__technology_hash__ is None:
+            from ipkiss.technology.settings import TECH
+            self.__technology_hash__ = content_hash(__technology_key__(TECH))
+        return self.__technology_hash__
+
+    def key(self, structure):
+        """ cache key of the elements of a structure, or None if the structure cannot be cached """
+        if not getattr(structure, "__disk_cache_elements__", False):
+            return None
+        try:
+            # the name is only externally set once it has been generated, so it is taken separately
+            props = tuple([(p, content_key(v)) for (p, v) in property_values(structure) if p != "name"])
+            cls_path = __class_path__(type(structure))
+        except (ContentKeyException, __UnsupportedValue__):
+            return None
+        return content_hash((FORMAT_VERSION, settings.VERSION, cls_path, __class_source_hash__(type(structure)), structure.name, props, self.technology_hash()))
+
+    def __entry_path__(self, key):
+        return os.path.join(self.path, key + ENTRY_EXTENSION)
+
+    def elements(self, structure, define_elements):
+        """ returns the elements of the structure from the cache. If they are not in the cache, they are
+            defined by calling define_elements() and stored. """
+        # the key is taken before the elements are defined, as defining them may set properties
+        key = self.key(structure)
+        if key is None:
+            return define_elements()
+        elements = self.load_elements(structure, key)
+        if elements is None:
+            counters = __name_generator_of__(structure).counters()
+            calculated = __calculated_properties__(structure)
+            elements = define_elements()
+            # properties calculated while defining the elements, such as child structures, are stored along
+            properties = [(p, getattr(structure, p)) for p in sorted(__calculated_properties__(structure) - calculated) if p != "elements"]
+            self.store_elements(structure, elements, key, __generated_names__(counters, __name_generator_of__(structure).counters()), properties)
+        return elements
+
+    def load_elements(self, structure, key = None):
+        """ returns the cached elements of the structure, or None if they are not in the cache """
+        if key is None:
+            key = self.key(structure)
+        if key is None:
+            return None
+        filename = self.__entry_path__(key)
+        if not os.path.exists(filename):
+            self.misses += 1
+            return None
+        try:
+            f = open(filename, "rb")
+            entry = pickle.load(f)
+            f.close()
+            # names generated while defining the elements are skipped, so that the names generated next are the same
+            __name_generator_of__(structure).advance(entry["names"])
+            elements = __decode__(entry["elements"])
+            for (p, v) in entry["properties"]:
+                prop = getattr(type(structure), p)
+                if not prop.__value_was_stored__(structure):
+                    prop.__cache_property_value_on_object__(structure, __decode__(v))
+        except Exception, e:
+            LOG.warning("Cached elements of structure %s could not be loaded and are removed from the cache: %s" % (structure.name, str(e)))
+            self.__remove_entry__(filename)
+            self.misses += 1
+            return None
+        os.utime(filename, None) # for least recently used eviction
+        self.hits += 1
+        return elements
+
+    def store_elements(self, structure, elements, key = None, generated_names = {}, properties = []):
+        """ stores the elements of the structure in the cache, if they can be stored. generated_names is a
+            dictionary with the number of names generated per prefix while the elements were defined, 
+            properties a list of (name, value) of properties calculated while the elements were defined.
+            Returns True on success """
+        if key is None:
+            key = self.key(structure)
+        if key is None:
+            return False
+        try:
+            entry = {"version" : FORMAT_VERSION,
+                     "class" : "%s.%s" % __class_path__(type(structure)),
+                     "structure" : structure.name,
+                     "created" : time.time(),
+                     "names" : generated_names,
+                     "properties" : [(p, __encode__(v)) for (p, v) in properties],
+                     "elements" : __encode__(elements)}
+        except (ContentKeyException, __UnsupportedValue__), e:
+            LOG.debug("Elements of structure %s are not cached: %s" % (structure.name, str(e)))
+            return False
+        filename = self.__entry_path__(key)
+        tmp_filename = "%s.%d.tmp" % (filename, os.getpid())
+        self.size() # make sure the size is known before the entry is added
+        try:
+            f = open(tmp_filename, "wb")
+            pickle.dump(entry, f, pickle.HIGHEST_PROTOCOL)
+            f.close()
+            if os.path.exists(filename):
+                self.__remove_entry__(filename)
+            os.rename(tmp_filename, filename)
+        except (IOError, OSError, pickle.PicklingError), e:
+            LOG.warning("Elements of structure %s could not be written to the cache: %s" % (structure.name, str(e)))
+            return False
+        self.__size__ += os.path.getsize(filename)
+        if self.__size__ > self.max_size:
+            self.evict(self.max_size)
+        return True
+
+    def __entry_files__(self):
+        return [os.path.join(self.path, f) for f in os.listdir(self.path) if f.endswith(ENTRY_EXTENSION)]
+
+    def __remove_entry__(self, filename):
+        try:
+            s = os.path.getsize(filename)
+            os.remove(filename)
+            if not self.__size__ is None:
+                self.__size__ -= s
+        except OSError:
+            pass
+
+    def size(self):
+        """ total size of the cache entries in bytes """
+        if self.__size__ is None:
+            self.__size__ = sum([os.path.getsize(f) for f in self.__entry_files__()])
+        return self.__size__
+
+    def entries(self):
+        """ returns a list of (key, structure class, structure name, size in bytes, time of last use) of all entries, most recently used first """
+        result = []
+        for filename in self.__entry_files__():
+            try:
+                f = open(filename, "rb")
+                entry = pickle.load(f)
+                f.close()
+                cls_name, name = entry["class"], entry["structure"]
+            except Exception:
+                cls_name, name = None, None
+            key = os.path.basename(filename)[:-len(ENTRY_EXTENSION)]
+            result.append((key, cls_name, name, os.path.getsize(filename), os.path.getmtime(filename)))
+        result.sort(key = lambda e: e[4], reverse = True)
+        return result
+
+    def evict(self, max_size):
+        """ removes the least recently used entries until the cache is not larger than max_size bytes """
+        files = sorted(self.__entry_files__(), key = os.path.getmtime)
+        total = sum([os.path.getsize(f) for f in files])
+        for filename in files:
+            if total <= max_size:
+                break
+            total -= os.path.getsize(filename)
+            self.__remove_entry__(filename)
+        self.__size__ = total
+
+    def purge(self, older_than = None):
+        """ removes all entries, or the entries which were not used in the last older_than seconds """
+        now = time.time()
+        for filename in self.__entry_files__():
+            if (older_than is None) or (now - os.path.getmtime(filename) > older_than):
+                self.__remove_entry__(filename)
+        self.__size__ = None
+
+
+if __name__ == "__main__":
+    from optparse import OptionParser
+    parser = OptionParser(usage = "%prog PATH info|list|purge [options]")
+    parser.add_option("--older-than", dest = "older_than", type = "float", default = None, help = "purge only entries not used in the last DAYS days", metavar = "DAYS")
+    parser.add_option("--max-size", dest = "max_size", type = "float", default = None, help = "purge the least recently used entries until the cache is smaller than MB megabytes", metavar = "MB")
+    (options, args) = parser.parse_args()
+    if len(args) != 2 or not args[1] in ["info", "list", "purge"]:
+        parser.error("a cache directory and a command (info, list or purge) are required")
+    cache = ElementsDiskCache(path = args[0])
+    command = args[1]
+    if command == "info":
+        print "%s: %d entries, %.1f MB" % (cache.path, len(cache.__entry_files__()), cache.size() / 1E6)
+    elif command == "list":
+        for (key, cls_name, name, size, used) in cache.entries():
+            print "%s %10d %s %s (%s)" % (key, size, time.strftime("%Y-%m-%d %H:%M", time.localtime(used)), name, cls_name)
+    elif command == "purge":
+        if not options.max_size is None:
+            cache.evict(int(options.max_size * 1E6))
+        elif not options.older_than is None:
+            cache.purge(older_than = options.older_than * 86400.0)
+        else:
+            cache.purge()
+        print "%s: %d entries, %.1f MB" % (cache.path, len(cache.__entry_files__()), cache.size() / 1E6)
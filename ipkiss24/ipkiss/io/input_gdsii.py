@@ -78,6 +78,11 @@ class InputGdsiiHeader(InputBasic):
     def __parse_library__ (self):
         self.__istream__ = self.i_stream
         self.__scaling__ = self.scaling
+        self.__parse_library_header__()
+        return self.library
+
+    def __parse_library_header__(self):
+        """ parses the library records up to the first structure and returns the type of the last record that was read """
         while 1:
             r = self.__parse_record__()
             t = r.rtype #type
@@ -112,14 +117,12 @@ class InputGdsiiHeader(InputBasic):
             else:
                 LOG.error("Unsupported record type in File: %s" % hex(t))
                 #FIXME -- to be investigated further -- raise SystemExit
-        return self.library
+        return t
     
     def __parse_record__(self):
         try:
-            b1 = self.__istream__.read(2)
-            datalen = int (b2a_hex(b1), 16) - 4
-            b2 = self.__istream__.read(2)
-            rtype = int (b2a_hex(b2), 16)
+            (length, rtype) = unpack(">HH", self.__istream__.read(4))
+            datalen = length - 4
         except Exception, e:
             msg = "Could not read record : %s" %str(e)
             from ipkiss.exceptions.exc import IpkissException
@@ -247,30 +250,10 @@ class InputGdsiiTree(InputGdsiiHeader):
             r = self.__parse_record__()
             t = r.rtype #type
             l = r.length #datalength
-            if t == gds_records.Boundary:
-                el = self.__parse_boundary_element__()
+            if t in self.__element_parsers__:
+                el = self.__parse_element__(t)
                 if not (el is None):
                     S.add_el(el)
-            elif t == gds_records.Path:
-                el = self.__parse_path_element__()
-                if not (el is None):
-                    S.add_el(el)
-            elif t == gds_records.SRef:
-                el = self.__parse_sref_element__()
-                if not (el is None):
-                    S.add_el(el)              
-            elif t == gds_records.ARef:
-                el = self.__parse_aref_element__()
-                if not (el is None):
-                    S.add_el(el)              
-            elif t == gds_records.Box:
-                el = self.__parse_box_element__()
-                if not (el is None):
-                    S.add_el(el)              
-            elif t == gds_records.Text:
-                el = self.__parse_label_element__()
-                if not (el is None):
-                    S.add_el(el)              
             elif t == gds_records.StrName:
                 name = self.make_structure_name(self.__parse_string__(l))
                 S = Structure(name, [], self.library)
@@ -291,6 +274,17 @@ class InputGdsiiTree(InputGdsiiHeader):
                 #FIXME -- to be investigated further -- raise IpkissException?
         return S
 
+    __element_parsers__ = {gds_records.Boundary : "__parse_boundary_element__",
+                           gds_records.Path : "__parse_path_element__",
+                           gds_records.SRef : "__parse_sref_element__",
+                           gds_records.ARef : "__parse_aref_element__",
+                           gds_records.Box : "__parse_box_element__",
+                           gds_records.Text : "__parse_label_element__"}
+
+    def __parse_element__(self, rtype):
+        """ parses the element that starts with a record of type rtype """
+        return getattr(self, self.__element_parsers__[rtype])()
+
 
     def __parse_length__(self):
         ### Solve unit problem!!!        
@@ -547,6 +541,12 @@ class InputGdsii(InputGdsiiTree):
         else:
             name = self.make_structure_name(name)
 
+        S = self.__get_referenced_structure__(name)
+        V = SRef(S, coord, transform)
+        return V
+
+    def __get_referenced_structure__(self, name):
+        """ returns the structure with the given name, to be used in a reference """
         if self.library.structure_exists(name):
             S = self.library[name]
         else:
@@ -554,8 +554,7 @@ class InputGdsii(InputGdsiiTree):
             S = Structure(name, [], self.library)
             S.__make_static__()
         self.library.set_referenced(S)
-        V = SRef(S, coord, transform)
-        return V
+        return S
 
     def __parse_aref_element__(self):
         name = ""
@@ -614,13 +613,7 @@ class InputGdsii(InputGdsiiTree):
         else:
             name = self.make_structure_name(name)
 
-        if self.library.structure_exists(name):
-            S = self.library[name]
-        else:
-            # add dummy structure (which will be overwritten later)
-            S = Structure(name, [], self.library)
-            S.__make_static__()
-        self.library.set_referenced(S)        
+        S = self.__get_referenced_structure__(name)
         # try to fix arefs with negative period
         czx = coord_zero[0]
         px = cc[1][0]
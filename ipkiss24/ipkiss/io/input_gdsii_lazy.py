@@ -0,0 +1,259 @@
+# IPKISS - Parametric Design Framework
+# Copyright (C) 2002-2012  Ghent University - imec
+# 
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 2
+# of the License, or (at your option) any later version.
+# 
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+# 
+# i-depot BBIE 7396, 7556, 7748
+# 
+# Contact: ipkiss@intec.ugent.be
+
+
+from .input_gdsii import InputGdsii, LOG
+from . import gds_records
+from ..primitives.structure import Structure
+from ..primitives.library import Library
+from ipcore.properties.predefined import BoolProperty
+from ipkiss.exceptions.exc import IpkissException
+from struct import unpack_from
+import mmap
+import numpy
+
+__all__ = ["LazyInputGdsii", "FileLazyInputGdsii"]
+
+# size (in 2-byte words) of the blocks in which the record headers are scanned
+SCAN_BLOCK_SIZE = 2**22
+
+
+class __LazyGdsiiStructure__(Structure):
+    """ Structure read from a GDSII file, of which the elements are only decoded when they are first accessed """
+    __disk_cache_elements__ = False
+
+    def define_elements(self, elems):
+        return self.__gdsii_reader__.__decode_structure__(self, elems)
+
+
+class LazyInputGdsii(InputGdsii):
+    """ Parses a GDSII file through a memory map.
+
+    Reading the library only builds an index of the structures in the file: the elements of
+    a structure are decoded the first time they are accessed. Use get_structure to
+    retrieve a single structure without creating the other ones.
+
+    The stream should be a file opened in binary mode. It is used for as long as
+    structures are being decoded, so it should only be closed (with close()) when
+    the library is not used anymore.
+    """
+    verify_index = BoolProperty(default = False, doc = "if True, the structure index is built by walking all records instead of by scanning the record headers for the ENDSTR-BGNSTR sequence")
+
+    def __init__(self, i_stream, **kwargs):
+        super(LazyInputGdsii, self).__init__(i_stream = i_stream, **kwargs)
+        self.__mmap__ = None
+
+    def parse_library(self):
+        self.__open__()
+        for name in self.__structure_names__:
+            self.get_structure(name)
+        return self.library
+
+    def structure_names(self):
+        """ returns the names of all structures in the file, without creating them """
+        self.__open__()
+        return list(self.__structure_names__)
+
+    def get_structure(self, name):
+        """ returns the structure with the given name. Its elements are decoded on first access. """
+        self.__open__()
+        S = self.library.__fast_get_structure__(name)
+        if S is None:
+            if not name in self.__structure_index__:
+                raise IpkissException("Structure %s could not be found in the GDSII file." % name)
+            (start, end) = self.__structure_index__[name]
+            S = __LazyGdsiiStructure__(name, library = self.library)
+            S.__gdsii_reader__ = self
+            # this is also called while the elements of a referencing structure are parsed
+            position = self.__istream__.tell()
+            try:
+                self.__istream__.seek(start + 4)
+                S.created = self.__parse_time__()
+                S.modified = self.__parse_time__()
+            finally:
+                self.__istream__.seek(position)
+            S.grid = self.library.grid
+            S.unit = self.library.unit
+            S.__make_static__()
+        return S
+
+    def close(self):
+        if not self.__mmap__ is None:
+            self.__mmap__.close()
+            self.__mmap__ = None
+
+    def __open__(self):
+        if not self.__mmap__ is None:
+            return
+        self.__mmap__ = mmap.mmap(self.i_stream.fileno(), 0, access = mmap.ACCESS_READ)
+        self.__istream__ = self.__mmap__
+        self.__scaling__ = self.scaling
+        self.library = Library("IMPORT")
+        if self.__parse_library_header__() == gds_records.BgnStr:
+            self.__first_structure__ = self.__istream__.tell() - 4
+        else:
+            self.__first_structure__ = None
+        self.__index_verified__ = self.verify_index
+        if self.verify_index:
+            self.__set_structure_index__(self.__walk_structure_starts__(self.__first_structure__))
+        else:
+            self.__set_structure_index__(self.__scan_structure_starts__(self.__first_structure__))
+
+    def __scan_structure_starts__(self, first):
+        """ finds the start of all structures by looking for ENDSTR records followed by a BGNSTR record """
+        if first is None:
+            return []
+        mm = self.__mmap__
+        size = len(mm)
+        starts = [first]
+        offset = first
+        while offset + 8 <= size:
+            n = min(SCAN_BLOCK_SIZE + 3, (size - offset) / 2)
+            headers = numpy.frombuffer(mm, dtype = numpy.dtype(">u2"), count = n, offset = offset)
+            matches = ((headers[:-3] == 4) & (headers[1:-2] == gds_records.EndStr) &
+                       (headers[2:-1] == 28) & (headers[3:] == gds_records.BgnStr))
+            starts.extend((offset + 2 * numpy.flatnonzero(matches) + 4).tolist())
+            del headers, matches
+            offset += 2 * SCAN_BLOCK_SIZE
+        return starts
+
+    def __walk_structure_starts__(self, first):
+        """ finds the start of all structures by walking over all records """
+        if first is None:
+            return []
+        mm = self.__mmap__
+        size = len(mm)
+        starts = []
+        position = first
+        while position + 4 <= size:
+            (length, rtype) = unpack_from(">HH", mm, position)
+            if rtype == gds_records.BgnStr:
+                starts.append(position)
+            elif rtype == gds_records.EndLib:
+                break
+            if length < 4:
+                raise IpkissException("Invalid record length %d at position %d in GDSII file." % (length, position))
+            position += length
+        return starts
+
+    def __set_structure_index__(self, starts):
+        mm = self.__mmap__
+        self.__structure_index__ = {}
+        self.__structure_names__ = []
+        size = len(mm)
+        for i, start in enumerate(starts):
+            (bgnstr_length, ) = unpack_from(">H", mm, start)
+            if start + bgnstr_length + 4 > size:
+                continue
+            (length, rtype) = unpack_from(">HH", mm, start + bgnstr_length)
+            if rtype != gds_records.StrName or start + bgnstr_length + length > size:
+                # not a structure after all: the matched records were part of the data of another record
+                continue
+            name = mm[start + bgnstr_length + 4 : start + bgnstr_length + length]
+            if name.endswith("\0"):
+                name = name[:-1]
+            name = self.make_structure_name(name)
+            if i + 1 < len(starts):
+                end = starts[i + 1]
+            else:
+                end = None
+            self.__structure_index__[name] = (start, end)
+            self.__structure_names__.append(name)
+
+    def __rebuild_structure_index__(self):
+        old_names = self.__structure_names__
+        self.__set_structure_index__(self.__walk_structure_starts__(self.__first_structure__))
+        self.__index_verified__ = True
+        for name in set(old_names) - set(self.__structure_names__):
+            S = self.library.__fast_get_structure__(name)
+            if not S is None:
+                self.library.structures[:] = [s for s in self.library.structures if not s is S]
+
+    def __decode_structure__(self, S, elems):
+        if not S.name in self.__structure_index__:
+            raise IpkissException("Structure %s is not part of the GDSII file." % S.name)
+        (start, end) = self.__structure_index__[S.name]
+        position = self.__istream__.tell()
+        current_structure = self.__current_structure__
+        self.__current_structure__ = S
+        try:
+            self.__istream__.seek(start)
+            try:
+                self.__parse_structure_elements__(S, elems)
+                consistent = (end is None) or (self.__istream__.tell() == end)
+            except (Exception, SystemExit), e:
+                if self.__index_verified__:
+                    raise
+                consistent = False
+            if not consistent:
+                # the index contains a match inside the data of a record: rebuild it by walking all records
+                LOG.warning("Structure index of GDSII file was inconsistent at structure %s and is rebuilt." % S.name)
+                self.__rebuild_structure_index__()
+                del elems[:]
+                return self.__decode_structure__(S, elems)
+        finally:
+            self.__current_structure__ = current_structure
+            self.__istream__.seek(position)
+        return elems
+
+    def __parse_structure_elements__(self, S, elems):
+        for i in range(2):
+            # BGNSTR and STRNAME were already read when the structure was created
+            r = self.__parse_record__()
+            self.__istream__.read(r.length)
+        while 1:
+            r = self.__parse_record__()
+            t = r.rtype
+            if t == gds_records.EndStr:
+                break
+            elif t in self.__element_parsers__:
+                el = self.__parse_element__(t)
+                if not (el is None):
+                    elems += el
+            else:
+                LOG.warning("Unsupported record type %s in structure %s. This will be ignored." % (hex(t), S.name))
+                self.__istream__.read(r.length)
+        return elems
+
+    def __get_referenced_structure__(self, name):
+        if name in self.__structure_index__:
+            S = self.get_structure(name)
+            self.library.set_referenced(S)
+            return S
+        else:
+            return super(LazyInputGdsii, self).__get_referenced_structure__(name)
+
+    def __parse_int4pairlist__(self, length):
+        position = self.__istream__.tell()
+        coords = numpy.frombuffer(self.__mmap__, dtype = numpy.dtype('2>i4'), count = length, offset = position).copy()
+        self.__istream__.seek(position + 8 * length)
+        return coords
+
+
+class FileLazyInputGdsii(LazyInputGdsii):
+    """ Lazily parses a GDSII file with the given name. The file stays open until close() is called. """
+    def __init__(self, FileName, **kwargs):
+        self.FileName = FileName
+        super(FileLazyInputGdsii, self).__init__(i_stream = open(FileName, "rb"), **kwargs)
+
+    def close(self):
+        super(FileLazyInputGdsii, self).close()
+        self.i_stream.close()
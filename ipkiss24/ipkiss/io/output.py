@@ -28,6 +28,7 @@ from ipcore.properties.descriptor import RestrictedProperty
 from ipcore.properties.predefined import BoolProperty, RESTRICT_POSITIVE, IntProperty
 from ipcore.properties.restrictions import RestrictType
 from ipcore.properties.processors import ProcessorTypeCast
+from ipcore.mixin.mixin import mixin_generation
 from ..primitives.layer import LayerList
 from ..primitives.filter import Filter
 from .collector import ListCollector
@@ -36,8 +37,10 @@ from ipkiss.log import IPKISS_LOG as LOG
 from ipkiss.settings import *
 from ipkiss.primitives import Library
 from ipkiss.primitives.elements.basic import ElementList
+from ipkiss.primitives.elements.store import DatatypeLayer
 import sys
 import logging
+import inspect
 
 all = []
 
@@ -71,42 +74,63 @@ class BasicOutput(StrongPropertyInitializer):
 ## Base class for output modules with collect_<class> methods
 #######################################################################
 
+__COLLECT_METHOD_TABLES__ = {}
+__COLLECT_METHOD_TABLES_GENERATION__ = [mixin_generation()]
+
+class __CollectMethodTable__(dict):
+    """ maps the type of an item on the collect_<class> method of an output class, or on None """
+    def __init__(self, output_class):
+        super(__CollectMethodTable__, self).__init__()
+        self.output_class = output_class
+        
+    def __missing__(self, item_type):
+        method = None
+        for M in inspect.getmro(item_type):
+            method = getattr(self.output_class, "collect_%s" % M.__name__, None)
+            if method is not None:
+                method = method.im_func
+                break
+        self[item_type] = method
+        return method
+
+def __collect_method_table__(output_class):
+    """ returns the dispatch table of an output class. The tables are rebuilt after a mixin has 
+        changed the bases of a class. """
+    if __COLLECT_METHOD_TABLES_GENERATION__[0] != mixin_generation():
+        __COLLECT_METHOD_TABLES__.clear()
+        __COLLECT_METHOD_TABLES_GENERATION__[0] = mixin_generation()
+    table = __COLLECT_METHOD_TABLES__.get(output_class, None)
+    if table is None:
+        table = __COLLECT_METHOD_TABLES__[output_class] = __CollectMethodTable__(output_class)
+    return table
+
 class __OutputBasic__(BasicOutput):         
 
     def __init__(self, o_stream = sys.stdout, **kwargs):
         super(__OutputBasic__, self).__init__(o_stream = o_stream, **kwargs)
-        self.__collect_method_dict__ = {}
                 
     def collect(self, item,  **kwargs):       
         self.do_collect(item, **kwargs)
         return 
     
     def do_collect(self, item,  **kwargs):
-        import inspect        
-            
         items = self.filter(item)
+        table = __collect_method_table__(self.__class__)
         if len(items) == 1:
-            item = items[0]
+            self.__collect_filtered_item__(items[0], table, **kwargs)
         else:
-            item = items            
-
-        T = type(item)
-        if inspect.isclass(T): 
-            collect_method = self.__collect_method_dict__.get(T, None)
-            if collect_method is None:
-                for M in inspect.getmro(T):
-                    collect_method_name = "collect_%s" % M.__name__
-                    if hasattr(self, collect_method_name):
-                        collect_method = getattr(self, collect_method_name)
-                        self.__collect_method_dict__[T] = collect_method
-                        break
-            if collect_method is None:
-                LOG.warn("No collect method found for object of type %s" %T)                       
-            else:
-                collect_method(item, **kwargs)      
-                
+            # the items have passed the filter already: collect them directly
+            for i in items:
+                self.__collect_filtered_item__(i, table, **kwargs)
         return     
 
+    def __collect_filtered_item__(self, item, table, **kwargs):
+        collect_method = table[type(item)]
+        if collect_method is None:
+            LOG.warn("No collect method found for object of type %s" % type(item))                       
+        else:
+            collect_method(self, item, **kwargs)      
+
         
 from ..technology.settings import TECH
 from .gds_layer import GdsiiLayer
@@ -123,7 +147,6 @@ class OutputBasic(__OutputBasic__):
         super(OutputBasic, self).__init__(o_stream = o_stream, **kwargs)
         self.library = None
         self.__current_structure__ = None
-        self.__collect_method_dict__ = {}
 
     def __init_collector__(self):
         self.collector = ListCollector()
@@ -191,6 +214,11 @@ class OutputBasic(__OutputBasic__):
             self.collect(s,  **kwargs)
         return 
 
+    def collect_BoundaryStore(self, item,  additional_transform = None, **kwargs):
+        for b in item:
+            self.collect(b,  additional_transform = additional_transform, **kwargs)
+        return
+
     def collect_Group(self, item,  additional_transform = None, **kwargs):
         self.collect(item.elements,  additional_transform = item.transformation + additional_transform, **kwargs)
         return
@@ -239,6 +267,11 @@ class OutputBasic(__OutputBasic__):
         return value * self.__structure_scale__
 
     def map_layer(self, layer):
+        if isinstance(layer, DatatypeLayer):
+            L = self.map_layer(layer.layer)
+            if L is None:
+                return L
+            return GdsiiLayer(number = L.number, datatype = layer.datatype)
         L = self.layer_map.get(layer, None)
         if isinstance(L, GdsiiLayer):
             return L
@@ -21,7 +21,7 @@
 
 
 from .output import OutputBasic
-from time import localtime
+from time import localtime, time
 import sys
 import math
 from binascii import b2a_hex, a2b_hex
@@ -33,16 +33,17 @@ from ..geometry.transforms.translation import Translation
 from ..geometry.coord import *
 from ipkiss.primitives import Library
 from . import gds_records
-from .collector import StreamA2BHexCollector
+from .collector import StreamA2BHexCollector, StreamBinaryCollector
 from ipkiss.log import IPKISS_LOG as LOG
 import logging
 from io import BytesIO
 from output_xml import FileOutputXml
 import numpy as np
-from ipcore.properties.predefined import BoolProperty, RestrictedProperty
+from ipcore.properties.predefined import BoolProperty, PositiveIntProperty, RestrictedProperty
 from ipcore.properties.restrictions import RestrictType
 from ipkiss.primitives.elements import ElementList
 from ipkiss.primitives.elements.reference import SRef
+from ipkiss.primitives.elements.store import DatatypeLayer
 from ipkiss.primitives.filter import Filter
 from ipkiss.technology import get_technology
 import copy
@@ -54,7 +55,11 @@ __all__ = ["OutputGdsii","FileOutputGdsii", "MemoryOutputGdsii", "FileOutputXmlW
 class OutputGdsii(OutputBasic):
         """ Writes GDS output to a stream """
         userefcache = BoolProperty(default=False)
+        binary = BoolProperty(default = False, doc = "if True, the GDSII records are packed directly into a binary buffer instead of being built as hexadecimal strings")
+        buffer_size = PositiveIntProperty(default = 2**20, doc = "size in bytes of the output buffer which is used when binary is True")
         name_filter = RestrictedProperty(default = TECH.GDSII.NAME_FILTER, restriction = RestrictType(Filter), doc = "filter class which is applied to all names")
+        clip_box = RestrictedProperty(default = None, doc = "if not None, only the part of the unreferenced (top) structures within this box (a SizeInfo, Shape or list of points) is written")
+        layers = RestrictedProperty(default = None, doc = "if not None, only the elements on these layers are written")
         
         def __init__(self, o_stream = sys.stdout, **kwargs):
                 kwargs["allow_unmatched_kwargs"] = True
@@ -72,7 +77,28 @@ class OutputGdsii(OutputBasic):
                         msvcrt.setmode(self.o_stream.fileno(), os.O_BINARY)
                         
         def __init_collector__(self):
-                self.collector = StreamA2BHexCollector(o_stream = self.o_stream)
+                # the record encoders are bound together with the collector, so that the
+                # collect methods below do not depend on the output format
+                if self.binary:
+                        self.collector = StreamBinaryCollector(o_stream = self.o_stream, buffer_size = self.buffer_size)
+                        self.__record__ = __bin_record__
+                        self.__int2__ = __bin_int2__
+                        self.__int4__ = __bin_int4__
+                        self.__int4_array__ = __bin_int4_array__
+                        self.__real8__ = __bin_float__
+                        self.__text__ = __bin_text__
+                        self.__date__ = __bin_date__
+                        self.__transformation__ = __bin_transformation__
+                else:
+                        self.collector = StreamA2BHexCollector(o_stream = self.o_stream)
+                        self.__record__ = __str_record__
+                        self.__int2__ = __hex_int2__
+                        self.__int4__ = __hex_int4__
+                        self.__int4_array__ = __hex_int4_array__
+                        self.__real8__ = __hex_float__
+                        self.__text__ = __hex_text__
+                        self.__date__ = __hex_date__
+                        self.__transformation__ = __list_transformation__
                 
         def collect(self, item,  **kwargs):    
                 self.do_collect(item, **kwargs)           
@@ -86,42 +112,50 @@ class OutputGdsii(OutputBasic):
                 self.__collect_library_header__(library)
                 unreferenced_structures = self.library.unreferenced_structures(usecache = self.userefcache)
                 referenced_structures = self.library.referenced_structures(usecache = self.userefcache)
-                self.collect(unreferenced_structures,  **kwargs)  
-                collected_referenced_structures = []
-                while len(self.__ref_referenced_structures__)>0:
+                if self.clip_box is None:
+                        self.collect(unreferenced_structures,  **kwargs)  
+                else:
+                        for s in unreferenced_structures:
+                                self.__collect_clipped_structure__(s)
+                # only write the structures to which a reference was written. referenced_structures is in topological 
+                # order, so a single pass normally suffices; a second pass is only needed with the cached (unordered) list
+                while len(referenced_structures) > 0:
+                        remaining_structures = []
                         for rs in referenced_structures:
                                 if rs in self.__ref_referenced_structures__:
                                         self.collect(rs, **kwargs)     
-                                        collected_referenced_structures.append(rs)
-                        for crs in collected_referenced_structures:
-                                referenced_structures.remove(crs)    
-                        self.__ref_referenced_structures__.clear()
+                                else:
+                                        remaining_structures.append(rs)
+                        if len(remaining_structures) == len(referenced_structures):
+                                break
+                        referenced_structures = remaining_structures
+                self.__ref_referenced_structures__.clear()
                 self.__collect_library_footer__()
                 return        
               
 
         def __collect_library_header__(self, library):
-                self.collector+= [__str_record__(gds_records.Header, __hex_int2__(5)),
-                         __str_record__(gds_records.BgnLib, __hex_date__(library.modified) + __hex_date__(library.accessed)),
-                         __str_record__(gds_records.LibName, __hex_text__(library.name)),
-                         __str_record__(gds_records.Units, __hex_float__(self.library.grid/self.library.unit) + __hex_float__(self.library.grid))
+                self.collector+= [self.__record__(gds_records.Header, self.__int2__(5)),
+                         self.__record__(gds_records.BgnLib, self.__date__(library.modified) + self.__date__(library.accessed)),
+                         self.__record__(gds_records.LibName, self.__text__(library.name)),
+                         self.__record__(gds_records.Units, self.__real8__(self.library.grid/self.library.unit) + self.__real8__(self.library.grid))
                  ]
                 return
 
         def __collect_library_footer__(self):
                 self.library = None
-                self.collector += [__str_record__(gds_records.EndLib)]
+                self.collector += [self.__record__(gds_records.EndLib)]
                 return
 
         def __collect_structure_header__(self, item):
                 sname = self.name_filter(item.name)[0]
-                self.collector += [__str_record__(gds_records.BgnStr, __hex_date__(item.created) + __hex_date__(item.modified)),
-                             __str_record__(gds_records.StrName, __hex_text__(sname))
+                self.collector += [self.__record__(gds_records.BgnStr, self.__date__(item.created) + self.__date__(item.modified)),
+                             self.__record__(gds_records.StrName, self.__text__(sname))
                                     ]
 
         #generate the footer for any structure
         def __collect_structure_footer__(self, item):
-                self.collector += [__str_record__(gds_records.EndStr)]
+                self.collector += [self.__record__(gds_records.EndStr)]
                 return
 
         #----------------------------------------------------------------------------
@@ -136,15 +170,15 @@ class OutputGdsii(OutputBasic):
                         return
                 coordinates =  [T.__translate__(item.coordinate)]
                 T.magnification *= item.height
-                self.collector += [__str_record__(gds_records.Text),
+                self.collector += [self.__record__(gds_records.Text),
                                    self.__str_layer__(layer.number),
-                                   __str_record__(gds_records.TextType, __hex_int2__(0)),
-                                   __str_record__(gds_records.Presentation, __hex_int2__((item.h_alignment + 4 * item.v_alignment + 8 * item.font%4))),
-                                   __str_record__(gds_records.PathType, __hex_int2__(1))]
-                self.collector += __list_transformation__(T)
+                                   self.__record__(gds_records.TextType, self.__int2__(0)),
+                                   self.__record__(gds_records.Presentation, self.__int2__((item.h_alignment + 4 * item.v_alignment + 8 * item.font%4))),
+                                   self.__record__(gds_records.PathType, self.__int2__(1))]
+                self.collector += self.__transformation__(T)
                 self.collector += [self.__str_coordinatelist__(coordinates),
-                                   __str_record__(gds_records.String, __hex_text__(item.text)),
-                                   __str_record__(gds_records.EndEl)]
+                                   self.__record__(gds_records.String, self.__text__(item.text)),
+                                   self.__record__(gds_records.EndEl)]
                 return
 
         #references
@@ -152,11 +186,11 @@ class OutputGdsii(OutputBasic):
                 T = item.transformation + Translation(item.position.snap_to_grid()) + additional_transform
                 coordinates = Shape((0.0, 0.0)).transform(T)
                 sname = self.name_filter(item.reference.name)[0]
-                self.collector += [__str_record__(gds_records.SRef),
-                                   __str_record__(gds_records.SName, __hex_text__(sname))]
-                self.collector += __list_transformation__(T)
+                self.collector += [self.__record__(gds_records.SRef),
+                                   self.__record__(gds_records.SName, self.__text__(sname))]
+                self.collector += self.__transformation__(T)
                 self.collector += [self.__str_coordinatelist__(coordinates), 
-                                   __str_record__(gds_records.EndEl)
+                                   self.__record__(gds_records.EndEl)
                       ]
                 self.__ref_referenced_structures__.add(item.reference)
                 
@@ -167,12 +201,12 @@ class OutputGdsii(OutputBasic):
                 corner2 = Coord2(0.0, item.n_o_periods[1] * p[1])
                 coordinates = Shape([(0.0, 0.0), corner1,corner2]).transform(T)
                 sname = self.name_filter(item.reference.name)[0]
-                self.collector += [__str_record__(gds_records.ARef),
-                                   __str_record__(gds_records.SName, __hex_text__(sname))]
-                self.collector += __list_transformation__(T)
-                self.collector += [__str_record__(gds_records.ColRow, __hex_int2__(item.n_o_periods[0]) + __hex_int2__(item.n_o_periods[1])),
+                self.collector += [self.__record__(gds_records.ARef),
+                                   self.__record__(gds_records.SName, self.__text__(sname))]
+                self.collector += self.__transformation__(T)
+                self.collector += [self.__record__(gds_records.ColRow, self.__int2__(item.n_o_periods[0]) + self.__int2__(item.n_o_periods[1])),
                                    self.__str_coordinatelist__(coordinates), 
-                              __str_record__(gds_records.EndEl)]
+                              self.__record__(gds_records.EndEl)]
                 self.__ref_referenced_structures__.add(item.reference)
                 return 
 
@@ -182,24 +216,24 @@ class OutputGdsii(OutputBasic):
                 if layer is None:
                         return
                 coordinates = T(ShapeRectangle(item.center, item.box_size)).tolist()
-                self.collector += [__str_record__(gds_records.Box),
+                self.collector += [self.__record__(gds_records.Box),
                              self.__str_layer__(layer.number),
-                             __str_record__ (gds_records.BoxType, __hex_int2__(0)), 
+                             self.__record__ (gds_records.BoxType, self.__int2__(0)), 
                              self.__str_coordinatelist__(coordinates), 
-                             __str_record__(gds_records.EndEl)]
+                             self.__record__(gds_records.EndEl)]
                 return 
 
         def collect_path_element (self, layer, coordinates, line_width, path_type):
                 L = self.map_layer(layer)
                 if L is None:
                         return
-                self.collector += [__str_record__ (gds_records.Path),
+                self.collector += [self.__record__ (gds_records.Path),
                             self.__str_layer__(L.number),
                             self.__str_datatype__(L.datatype),
-                            __str_record__ (gds_records.PathType, __hex_int2__(path_type)),
-                            __str_record__ (gds_records.Width, __hex_int4__(self.__db_value__(line_width))),
+                            self.__record__ (gds_records.PathType, self.__int2__(path_type)),
+                            self.__record__ (gds_records.Width, self.__int4__(self.__db_value__(line_width))),
                             self.__str_shape__(coordinates),
-                            __str_record__(gds_records.EndEl)]
+                            self.__record__(gds_records.EndEl)]
                 return 
 
         def collect_boundary_element (self, layer, coordinates):
@@ -207,14 +241,202 @@ class OutputGdsii(OutputBasic):
                 if L is None:
                         return
 
-                self.collector += [__str_record__ (gds_records.Boundary),
+                self.collector += [self.__record__ (gds_records.Boundary),
                             self.__str_layer__(L.number),
                             self.__str_datatype__(L.datatype),
                             self.__str_shape__(coordinates),
-                            __str_record__(gds_records.EndEl)
+                            self.__record__(gds_records.EndEl)
                     ]
                 return 
         
+        def collect_BoundaryStore (self, item, additional_transform = None, **kwargs):
+                # the points of all the boundaries are snapped, cleaned up and converted to database units
+                # at once. Boundaries which the filter could change (too many or too few vertices, or a layer
+                # which the filter does not pass unchanged) are collected one by one.
+                n = len(item)
+                if n == 0:
+                        return
+                T = item.transformation + additional_transform
+                points = T.apply_to_array(np.array(item.coordinates))
+                points = np.floor(points * self.grids_per_unit + 0.5) / self.grids_per_unit
+                offsets = item.offsets
+                lengths = np.diff(offsets)
+                layer_ids = item.layer_ids
+                datatypes = item.datatypes
+                # remove identical consecutive points, the last point of a boundary being followed by the first
+                following = np.arange(1, len(points) + 1)
+                nonempty = lengths > 0
+                following[offsets[1:][nonempty] - 1] = offsets[:-1][nonempty]
+                keep = np.any(np.abs(points - points[following]) >= 0.5 / self.grids_per_unit, 1)
+                counts = np.bincount(np.repeat(np.arange(n), lengths)[keep], minlength = n)
+                kept_offsets = np.hstack([[0], np.cumsum(counts)])
+                db_points = self.__db_value_array__(points[keep]).astype(np.int64)
+
+                direct = (counts >= 3) & (counts <= TECH.GDSII.MAX_VERTEX_COUNT)
+                skipped = np.zeros((n,), dtype = bool)
+                layer_records = [None] * len(item.layers)
+                datatype_records = dict()
+                unique_ids, first = np.unique(layer_ids, return_index = True)
+                for layer_id, i in zip(unique_ids, first):
+                        probe = item[i]
+                        filtered = self.filter(probe)
+                        if not (len(filtered) == 1 and filtered[0] is probe):
+                                direct[layer_ids == layer_id] = False
+                                continue
+                        L = self.map_layer(item.layers[layer_id])
+                        if L is None: # not written
+                                direct[layer_ids == layer_id] = False
+                                skipped[layer_ids == layer_id] = True
+                                continue
+                        layer_records[layer_id] = (self.__str_layer__(L.number), L.datatype)
+
+                boundary_record = self.__record__(gds_records.Boundary)
+                end_record = self.__record__(gds_records.EndEl)
+                for i in range(n):
+                        if not direct[i]:
+                                if not skipped[i]:
+                                        self.collect(item[i], additional_transform = additional_transform)
+                                continue
+                        (layer_record, datatype) = layer_records[layer_ids[i]]
+                        if datatypes is not None and datatypes[i] >= 0:
+                                datatype = datatypes[i]
+                        if not datatype in datatype_records:
+                                datatype_records[datatype] = self.__str_datatype__(datatype)
+                        xy = db_points[kept_offsets[i]:kept_offsets[i + 1]]
+                        self.collector += [boundary_record,
+                                           layer_record,
+                                           datatype_records[datatype],
+                                           self.__record__(gds_records.XY, self.__int4_array__(np.vstack([xy, xy[:1]]).ravel())),
+                                           end_record]
+                return
+
+        #----------------------------------------------------------------------------
+        # clipped output
+        #
+        # The elements and references of a top structure are looked up in its spatial index:
+        # references which lie completely within clip_box are written as references, references which
+        # straddle its border are expanded into the top structure, down to the elements which straddle
+        # the border. Only those are clipped; the other elements are written as they are.
+        #----------------------------------------------------------------------------
+
+        def __collect_clipped_structure__(self, item):
+                from ipkiss.primitives.spatial_index import __window__
+                if self.echo: 
+                        LOG.info("Defining Structure %s clipped to %s." % (item.name, str(self.clip_box)))
+                self.set_current_structure(item)
+                window = __window__(self.clip_box)
+                self.__collect_structure_header__(item)
+                self.__collect_clipped_elements__(item, window, None, window)
+                self.__collect_structure_footer__(item)
+
+        def __collect_clipped_elements__(self, structure, local_window, transformation, window):
+                # local_window encloses window in the coordinates of structure, which is placed with transformation
+                from ipkiss.primitives.spatial_index import __size_info_box__
+                index = structure.__get_spatial_index__()
+                layers = self.layers
+                for layer, tree, items in index.leaves:
+                        if layers is not None and not __layer_in__(layer, layers):
+                                continue
+                        hits = tree.query(local_window)
+                        if len(hits) == 0:
+                                continue
+                        boxes = __transformed_boxes__(tree.boxes[hits], transformation)
+                        position = __box_position__(boxes, window)
+                        for i, p in zip(hits, position):
+                                if p < 0:
+                                        continue
+                                item = items[i]
+                                if isinstance(item, tuple):
+                                        item = item[0][item[1]]
+                                if p > 0:
+                                        self.collect(item, additional_transform = transformation)
+                                else:
+                                        self.__collect_clipped_element__(item, transformation, window)
+
+                if len(index.references) == 0:
+                        return
+                hits = index.reference_tree.query(local_window)
+                reference_index = index.reference_index[hits]
+                placement_index = index.placement_index[hits]
+                for r, P in enumerate(index.references):
+                        placements = placement_index[reference_index == r]
+                        if len(placements) == 0:
+                                continue
+                        if layers is not None and not P.structure.__get_spatial_index__().has_layers(layers):
+                                continue
+                        T = P.linear + transformation
+                        box = __size_info_box__(P.structure.size_info())
+                        # the box of the reference structure, transformed, for all the placements
+                        boxes = __transformed_boxes__(np.array([box]), T)
+                        if transformation is None:
+                                translations = P.translations[placements]
+                        else:
+                                translations = transformation.apply_to_array(np.array(P.translations[placements])) - transformation.apply_to_array(np.zeros((1, 2)))
+                        boxes = boxes + np.hstack([translations, translations])
+                        position = __box_position__(boxes, window)
+                        if len(placements) == len(P.translations) and np.all(position > 0):
+                                # the whole reference is inside the window
+                                self.collect(P.reference, additional_transform = transformation)
+                                continue
+                        inside = placements[position > 0]
+                        if len(inside) > 0:
+                                translations = np.array(P.translations[inside])
+                                if transformation is not None:
+                                        translations = transformation.apply_to_array(translations)
+                                self.__collect_placements__(P.structure, T, translations)
+                        straddling = np.nonzero(position == 0)[0]
+                        if len(straddling) > 0:
+                                windows = P.windows(local_window, placements[straddling])
+                                for k, w in zip(placements[straddling], windows):
+                                        self.__collect_clipped_elements__(P.structure, tuple(w), P.transformation(k) + transformation, window)
+
+        def __collect_placements__(self, structure, transformation, translations):
+                # writes an SRef to structure at each of the translations, with the linear part of transformation.
+                # If the filter could change such an SRef, they are collected one by one.
+                from ipkiss.geometry.transforms.no_distort import NoDistortTransform
+                linear = NoDistortTransform(rotation = transformation.rotation, 
+                                            magnification = transformation.magnification, 
+                                            v_mirror = transformation.v_mirror, 
+                                            absolute_magnification = transformation.absolute_magnification, 
+                                            absolute_rotation = transformation.absolute_rotation)
+                probe = SRef(structure, (0.0, 0.0), transformation = linear)
+                filtered = self.filter(probe)
+                if not (len(filtered) == 1 and filtered[0] is probe):
+                        for t in translations:
+                                self.collect(SRef(structure, (0.0, 0.0), transformation = linear + Translation((t[0], t[1]))))
+                        return
+                sref_records = [self.__record__(gds_records.SRef),
+                                self.__record__(gds_records.SName, self.__text__(self.name_filter(structure.name)[0]))]
+                sref_records += self.__transformation__(linear)
+                end_record = self.__record__(gds_records.EndEl)
+                for xy in self.__db_value_array__(translations):
+                        self.collector += sref_records + [self.__record__(gds_records.XY, self.__int4_array__(xy)), end_record]
+                self.__ref_referenced_structures__.add(structure)
+
+        def __collect_clipped_element__(self, item, transformation, window):
+                from ipkiss.primitives.elements.shape import Boundary, Path
+                from ipkiss.primitives.elements.text import Label
+                from ipkiss.geometry.shapes.modifiers import ShapePath
+                T = item.transformation + transformation
+                if isinstance(item, Boundary):
+                        shape = item.shape.transform_copy(T)
+                elif isinstance(item, Path):
+                        if item.absolute_line_width:
+                                line_width = item.line_width
+                        else:
+                                line_width = T.apply_to_length(item.line_width)
+                        shape = ShapePath(original_shape = item.shape.transform_copy(T), path_width = line_width, path_type = item.path_type)
+                elif isinstance(item, Label):
+                        c = T.apply_to_coord(item.coordinate)
+                        if (window[0] <= c[0] <= window[2]) and (window[1] <= c[1] <= window[3]):
+                                self.collect(item, additional_transform = transformation)
+                        return
+                else:
+                        self.collect(item, additional_transform = transformation)
+                        return
+                for s in __clip_shape__(shape, window):
+                        self.collect(Boundary(layer = item.layer, shape = s))
+
         def __collect_container_elements__(self, item, sref_level_counter):
                 # FIXME. Containers are PICAZZO classes. This method should be converted to a Filter or a mixin
                 from picazzo.container.container import __StructureContainer__
@@ -269,28 +491,68 @@ class OutputGdsii(OutputBasic):
         #generate coordinate strings from a shape or list of coordinates
         def __str_coordinatelist__ (self, coords):                
                 if isinstance(coords, Shape):
-                        db_value_coordinates = self.__db_value_array__(coords.points)                        
-                        ret_data = ["%s%s" % (__hex_int4__(c0) , __hex_int4__(c1)) for c0,c1 in db_value_coordinates]
+                        db_value_points = self.__db_value_array__(coords.points.ravel())
                 else: 
-                        ret_data = ["%s%s" % (__hex_int4__(self.__db_value__(c[0])) , __hex_int4__(self.__db_value__(c[1]))) for c in coords]
-                return __str_record__(gds_records.XY, "".join(ret_data))
+                        db_value_points = [self.__db_value__(v) for c in coords for v in (c[0], c[1])]
+                return self.__record__(gds_records.XY, self.__int4_array__(db_value_points))
                         
                 
         def __str_shape__ (self, coordinates):
                 db_value_points = self.__db_value_array__(coordinates.points.ravel())
-                ret_data = [__hex_int4__(p) for p in db_value_points]
-                return __str_record__(gds_records.XY, "".join(ret_data))
+                return self.__record__(gds_records.XY, self.__int4_array__(db_value_points))
 
         def __collect_shape__ (self, coordinates):
-                db_value_points = self.__db_value_array__(coordinates.points.ravel())
-                ret_data = [__hex_int4__(p) for p in db_value_points]
-                self.collector +=  [__str_record__(gds_records.XY, "".join(ret_data))]
+                self.collector +=  [self.__str_shape__(coordinates)]
         
         def __str_layer__(self, layer_number):
-                return __str_record__(gds_records.Layer, __hex_int2__(layer_number))		
+                return self.__record__(gds_records.Layer, self.__int2__(layer_number))		
 
         def __str_datatype__(self, datatype):
-                return __str_record__(gds_records.DataType, __hex_int2__(datatype))
+                return self.__record__(gds_records.DataType, self.__int2__(datatype))
+
+        def map_layer(self, layer):
+                if (self.layers is not None) and not __layer_in__(layer, self.layers):
+                        return None
+                return super(OutputGdsii, self).map_layer(layer)
+
+
+def __layer_in__(layer, layers):
+        if isinstance(layer, DatatypeLayer):
+                layer = layer.layer
+        for L in layers:
+                if layer == L:
+                        return True
+        return False
+
+def __transformed_boxes__(boxes, transformation):
+        """ (n, 4) array with the boxes (west, south, east, north) enclosing the transformed boxes """
+        if transformation is None:
+                return boxes
+        C = np.array([boxes[:, [0, 1]], boxes[:, [2, 1]], boxes[:, [2, 3]], boxes[:, [0, 3]]]).reshape(-1, 2)
+        C = transformation.apply_to_array(C).reshape(4, -1, 2)
+        return np.column_stack((C[:, :, 0].min(0), C[:, :, 1].min(0), C[:, :, 0].max(0), C[:, :, 1].max(0)))
+
+def __box_position__(boxes, window):
+        """ for every box: 1 if it is inside the window, -1 if it is outside, 0 if it straddles the border """
+        inside = (boxes[:, 0] >= window[0]) & (boxes[:, 1] >= window[1]) & (boxes[:, 2] <= window[2]) & (boxes[:, 3] <= window[3])
+        outside = (boxes[:, 0] > window[2]) | (boxes[:, 1] > window[3]) | (boxes[:, 2] < window[0]) | (boxes[:, 3] < window[1])
+        return inside.astype(int) - outside.astype(int)
+
+def __clip_shape__(shape, window):
+        """ list of shapes with the parts of a closed shape within the window. Holes are connected to the outline as keyholes. """
+        from dependencies.shapely_wrapper import Polygon, flatten_shapely_geom, shapely_geom_to_shape
+        P = Polygon(shape.points)
+        if not P.is_valid:
+                P = P.buffer(0)
+        W = Polygon([(window[0], window[1]), (window[2], window[1]), (window[2], window[3]), (window[0], window[3])])
+        result = []
+        for g in flatten_shapely_geom(P.intersection(W)):
+                if isinstance(g, Polygon) and not g.is_empty:
+                        if len(g.interiors) == 0:
+                                result.append(Shape(list(g.exterior.coords)[:-1], closed = True))
+                        else:
+                                result.append(shapely_geom_to_shape(g))
+        return result
 
 
 class FileOutputGdsii(OutputGdsii):
@@ -358,7 +620,13 @@ def __hex_int2__ (number):
 def __hex_int4__ (number):
         return b2a_hex(pack(">l",number))
 
+def __hex_int4_array__ (numbers):
+        return "".join([__hex_int4__(n) for n in numbers])
+
 def __hex_float__(number):
+        return __hex_text__(__pack_real8__(number))
+
+def __pack_real8__(number):
         B1 = 0
         B2 = 0
         S3 = 0
@@ -376,7 +644,7 @@ def __hex_float__(number):
                         B1 += 1
                 S3 = (inumber%281474976710656)/4294967296L
                 L4 = inumber%4294967296L
-        return __hex_text__(pack(">BBHL",B1, B2, S3, L4))
+        return pack(">BBHL",B1, B2, S3, L4)
 
 def __hex_text__ (text):
         t = b2a_hex(text)
@@ -403,6 +671,13 @@ def __list_comment__(text):
         return ""
 
 def __list_transformation__(transform):
+        (strans, magnification, rotation) = __strans__(transform)
+        return [__str_record__(gds_records.STrans, __hex_int2__(strans)),
+                __str_record__(gds_records.Mag, __hex_float__(magnification)),
+                __str_record__(gds_records.Angle, __hex_float__(rotation))
+        ]
+
+def __strans__(transform):
         strans = 0
         flip = transform.flip
         rotation = transform.rotation
@@ -419,7 +694,44 @@ def __list_transformation__(transform):
         else:
                 T = transform.magnification
 
-        return [__str_record__(gds_records.STrans, __hex_int2__(strans)),
-                __str_record__(gds_records.Mag, __hex_float__(T)),
-                __str_record__(gds_records.Angle, __hex_float__(rotation))
+        return (strans, T, rotation)
+
+
+#----------------------------------------------------------------------------
+# Low-level binary output
+#
+# Same records as the hexadecimal functions above, but packed directly
+# into byte strings. Used when OutputGdsii.binary is True.
+#----------------------------------------------------------------------------
+
+def __bin_record__(record_type, data = ""):
+        return pack(">HH", len(data) + 4, record_type) + data
+
+def __bin_int2__ (number):
+        return pack(">H", number)
+
+def __bin_int4__ (number):
+        return pack(">l", number)
+
+def __bin_int4_array__ (numbers):
+        # all values are converted and packed in a single call
+        return np.asarray(numbers).astype(">i4").tostring()
+
+__bin_float__ = __pack_real8__
+
+def __bin_text__ (text):
+        if len(text) % 2:
+                return text + "\0"
+        return text
+
+def __bin_date__(T = None):
+        if T is None: T = time()
+        t = localtime(T)
+        return pack(">6H", t[0]%100, t[1], t[2], t[3], t[4], t[5])
+
+def __bin_transformation__(transform):
+        (strans, magnification, rotation) = __strans__(transform)
+        return [__bin_record__(gds_records.STrans, __bin_int2__(strans)),
+                __bin_record__(gds_records.Mag, __pack_real8__(magnification)),
+                __bin_record__(gds_records.Angle, __pack_real8__(rotation))
         ]
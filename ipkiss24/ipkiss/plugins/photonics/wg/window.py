@@ -21,6 +21,7 @@
 
 from ipkiss.all import *
 from .definition import BaseWaveguideDefinition, SingleShapeWaveguideElement, WaveguideDefProperty
+from numpy import array, outer, vstack, prod, float64
 
 
 __all__ = ["PathWindow",
@@ -28,6 +29,59 @@ __all__ = ["PathWindow",
            "WindowsOnWaveguideDefinition"
            ]
 
+class __PathSectionExtrusion__(object):
+    """ Extrudes windows along an open centerline. The miter directions of the centerline and of its
+        first and last segment are computed only once, and shared by all the windows and terminations. """
+    
+    def __init__(self, shape):
+        red_shape = Shape(shape).remove_identicals()
+        s1 = Shape([red_shape[0], red_shape[1]], start_face_angle = shape.start_face_angle)
+        s2 = Shape([red_shape[-2], red_shape[-1]], end_face_angle = shape.end_face_angle)
+        C = ShapeOffset(original_shape = red_shape, offset = 0.0)
+        self.points = C.__get_original_shape_without_straight_angles__().points
+        self.directions = C.get_offset_directions()
+        self.start_point = s1.points[0]
+        self.start_direction = ShapeOffset(original_shape = s1, offset = 0.0).get_offset_directions()[0]
+        self.end_point = s2.points[-1]
+        self.end_direction = ShapeOffset(original_shape = s2, offset = 0.0).get_offset_directions()[-1]
+        
+    def get_contour(self, start_offset, end_offset, termination_offsets = []):
+        """ returns the contour of the window between two offsets, passing through the termination offsets which lie in between """
+        o1 = min(start_offset, end_offset)
+        o2 = max(start_offset, end_offset)
+        t = array([o for o in termination_offsets if o>o1 and o<o2], dtype = float64)
+        C1 = self.points + self.directions * o1
+        C2 = self.points + self.directions * o2
+        C_start = self.start_point + outer(t, self.start_direction)
+        C_end = self.end_point + outer(t, self.end_direction)
+        # the contour is closed if its inner offset line is
+        closed = bool(prod(C1[-1] == C1[0]))
+        return Shape(vstack((C1, C_end, C2[::-1], C_start[::-1])), closed)
+    
+
+class __PathExtrusion__(object):
+    """ Extrudes windows along a shape. Closed shapes are cut open and are not terminated. """
+    
+    def __init__(self, shape):
+        self.terminated = not shape.closed
+        if self.terminated:
+            shapes = [shape]
+        else:
+            #we do not want closed Boundaries as resulting elements, as this gives troubles in other parts of the framework, i.e. with Shapely
+            #FIXME : better alternative? 
+            #Wim: This should not be handled here! This should be processed at the interface with Shapely.
+            from ipkiss.primitives.filters.path_cut_filter import ShapeCutFilter
+            import sys
+            f = ShapeCutFilter(max_path_length = sys.maxint)
+            shapes = f(shape)
+        self.sections = [__PathSectionExtrusion__(sh) for sh in shapes]
+            
+    def get_contours(self, start_offset, end_offset, termination_offsets = []):
+        if not self.terminated:
+            termination_offsets = []
+        return [s.get_contour(start_offset, end_offset, termination_offsets) for s in self.sections]
+    
+
 class __ShapeWindow__(StrongPropertyInitializer):
     """ Abstract: Defines a window to be extruded along a shape """
 
@@ -53,27 +107,7 @@ class __OffsetPathWindow__(__ShapeWindow__):
     end_offset = NumberProperty(required = True)
 
     def get_path_shape_with_termination_offsets(self, shape, termination_offsets):
-        offsets = termination_offsets
-        o1 = min(self.start_offset, self.end_offset)
-        o2 = max(self.start_offset, self.end_offset)
-                       
-        C_start = Shape()
-        C_end = Shape()
-        
-        red_shape = Shape(shape).remove_identicals() # FIXME: can we make this more efficient? We only need the first and last segment.
-        s1 = Shape([red_shape[0], red_shape[1]], start_face_angle = shape.start_face_angle)
-        s2 = Shape([red_shape[-2], red_shape[-1]], end_face_angle = shape.end_face_angle)
-        for o in offsets:
-            if o>o1 and o<o2:
-                s = ShapeOffset(original_shape = s1, offset = o)
-                C_start += s[0]
-                s = ShapeOffset(original_shape = s2, offset = o)
-                C_end += s[-1]
-
-        C1 = ShapeOffset(original_shape = red_shape, offset = o1)
-        C2 = ShapeOffset(original_shape = red_shape, offset = o2)                    
-        b_shape = C1 + C_end + C2.reversed() + C_start.reversed()                                                                          
-        return b_shape
+        return __PathSectionExtrusion__(shape).get_contour(self.start_offset, self.end_offset, termination_offsets)
     
     def transform(self, transformation):
         self.start_offset = transformation.apply_to_length(self.start_offset)
@@ -90,37 +124,21 @@ class PathWindow(__OffsetPathWindow__):
     
 
     def get_elements_from_shape(self, shape, termination_offsets = [], **kwargs):
+        return self.get_elements_from_extrusion(extrusion = __PathExtrusion__(shape), 
+                                                termination_offsets = termination_offsets)
+    
+    def get_elements_from_extrusion(self, extrusion, termination_offsets = []):
+        """ Returns the elements based on the extrusion of a shape, which can be shared between windows. """
         from ipkiss.primitives.elements import ElementList
         elems = ElementList()
-        offsets = termination_offsets
-        o1 = min(self.start_offset, self.end_offset)
-        o2 = max(self.start_offset, self.end_offset)
-                       
-        C_start = Shape()
-        C_end = Shape()
-        
         # this avoids wrong overlaps at non-manhattan interfaces
-        shapes = []
-        if not shape.closed:
-            shapes = [self.get_path_shape_with_termination_offsets(shape = shape, termination_offsets = termination_offsets)]
-        else:
-            #we do not want closed Boundaries as resulting elements, as this gives troubles in other parts of the framework, i.e. with Shapely
-            #FIXME : better alternative? 
-            #Wim: This should not be handled here! This should be processed at the interface with Shapely.
-            from ipkiss.primitives.filters.path_cut_filter import ShapeCutFilter
-            import sys
-            f = ShapeCutFilter(max_path_length = sys.maxint)
-            shapes_to_offset = f(shape)
-            shapes = [self.get_path_shape_with_termination_offsets(shape = sh, termination_offsets = []) for sh in shapes_to_offset]
-        
-        for sh in shapes:
+        for sh in extrusion.get_contours(self.start_offset, self.end_offset, termination_offsets):
             elems += Boundary(self.layer, sh)
         return elems
         
     def get_elements_from_path_definition(self, path_definition):
-        shape = getattr(path_definition, self.shape_property_name)
-        return self.get_elements_from_shape(shape = shape, 
-                                            termination_offsets = path_definition.definition().get_offset_list())
+        return self.get_elements_from_extrusion(extrusion = path_definition.get_window_extrusion(self.shape_property_name), 
+                                                termination_offsets = path_definition.definition().get_offset_list())
 
 
     
@@ -160,6 +178,11 @@ class WindowWaveguideDefinition(__WindowDefinition__, __CompatibilityWithAdapter
             #### Deprecated, does not work with some new Window types
             return [w.get_elements_from_shape(shape) for w in windows]
 
+        @cache()
+        def get_window_extrusion(self, shape_property_name = "shape"):
+            """ returns the extrusion of the given shape property, shared by all the windows along it """
+            return __PathExtrusion__(getattr(self, shape_property_name))
+        
         @cache()
         def __get_wg_elements_from_windows__(self):
             windows = self.definition().windows
@@ -162,7 +162,7 @@ class __ProcessSuperpositionMaterialStackGeometry2DPolygons__(CartesianGeometry2
     def get_material_array(self):
         """Convert the geometrical model with polygons into a discrete matrix"""
         if (self.__material_array__ is None):
-            from vfabrication import __common_function_apply_polygon_to_array_memory_sparing__
+            from .raster import fill_polygon_in_array
             mat_bm = self.material_stacks_shapely_polygons
             mat_bm[0] = (mat_bm[0][0], None) #replace the canvas polygon (1st element) by "None" : this is more efficient and will be interpreted identically later on
             material_array = numpy.zeros([self.canvas_width, self.canvas_height], dtype = numpy.int16) #store the material id as 16-bit integer			
@@ -173,7 +173,7 @@ class __ProcessSuperpositionMaterialStackGeometry2DPolygons__(CartesianGeometry2
                     if (count != 0):
                         raise Exception("Unexpected error : the first element of the 'material_stacks_shapely_polygons' list is supposed to contain the background material.")
                     pass
-                    material_array = material_array + material_stack_id #set whole matrix to background material stack 
+                    material_array.fill(material_stack_id) #set whole matrix to background material stack 
                 else:
                     if not mb.georep.is_empty:
                         #-debug code-
@@ -186,28 +186,15 @@ class __ProcessSuperpositionMaterialStackGeometry2DPolygons__(CartesianGeometry2
                             if polygon.is_ring:
                                 polygon_points = polygon.boundary.coords
                                 self.__debug_savefig_polygon__(polygon_points,count, count_progress, material_stack_id)
-                                polygon_points = self.__scale_polygon_points(polygon_points)
-                                __common_function_apply_polygon_to_array_memory_sparing__(material_array, polygon_points, do_bitwise_or = False, value = material_stack_id)
-                                self.__debug_savefig_material_array__(material_array, count, count_progress, material_stack_id)
-                                progress_percent = count_progress / total_geoms * 100.0
-                                LOG.debug("%i percent done..." %progress_percent)
+                                rings = [polygon_points]
                             else:
-                                #outer polygon
-                                outer_polygon_points = polygon.exterior.coords
-                                outer_polygon_points = self.__scale_polygon_points(outer_polygon_points)
-                                #FIXME - array can be made smaller to save memory (just covering the polygon)
-                                mat_array = material_array_outer_polygon = numpy.zeros([self.canvas_width, self.canvas_height], dtype = numpy.int16)
-                                __common_function_apply_polygon_to_array_memory_sparing__(material_array_outer_polygon, outer_polygon_points, do_bitwise_or = False, value = material_stack_id)
-                                #inner polygons
-                                for ip in polygon.interiors:
-                                    inner_polygon_points = ip.coords
-                                    inner_polygon_points = self.__scale_polygon_points(inner_polygon_points)
-                                    material_array_inner_polygon = numpy.zeros([self.canvas_width, self.canvas_height], dtype = numpy.int16)
-                                    __common_function_apply_polygon_to_array_memory_sparing__(material_array_inner_polygon, inner_polygon_points, do_bitwise_or = False, value = material_stack_id)
-                                    #now substract and apply the two material arrays
-                                    mat_array = mat_array - material_array_inner_polygon
-                                material_array = numpy.where(mat_array>0, mat_array, material_array)
-                                self.__debug_savefig_material_array__(material_array, count, count_progress, material_stack_id)
+                                #outer polygon and inner polygons (holes) are filled in one pass
+                                rings = [polygon.exterior.coords] + [ip.coords for ip in polygon.interiors]
+                            rings = [self.__scale_polygon_points(r) for r in rings]
+                            fill_polygon_in_array(material_array, rings, value = material_stack_id)
+                            self.__debug_savefig_material_array__(material_array, count, count_progress, material_stack_id)
+                            progress_percent = count_progress / total_geoms * 100.0
+                            LOG.debug("%i percent done..." %progress_percent)
                             count_progress = count_progress + 1
                 count = count + 1
             #the outer 2 items have sometimes not been set 
@@ -0,0 +1,145 @@
+# IPKISS - Parametric Design Framework
+# Copyright (C) 2002-2012  Ghent University - imec
+# 
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 2
+# of the License, or (at your option) any later version.
+# 
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+# 
+# i-depot BBIE 7396, 7556, 7748
+# 
+# Contact: ipkiss@intec.ugent.be
+
+""" Scanline rasterization of polygons into numpy arrays.
+
+    The polygons are given in array index coordinates: the pixel with index (i, j) covers [i, i+1) x [j, j+1),
+    and its center is (i + 0.5, j + 0.5). A polygon is given as a list of rings (the outline and its holes),
+    which are all filled in the same pass according to the fill rule. The arrays are written to directly, 
+    only in the pixels covered by the polygon, so no canvas-sized temporary arrays are needed.
+"""
+
+import numpy
+
+__all__ = ["FILL_RULE_EVEN_ODD",
+           "FILL_RULE_NONZERO",
+           "fill_polygon_in_array",
+           "add_polygon_coverage_to_array"]
+
+FILL_RULE_EVEN_ODD = "even_odd"
+FILL_RULE_NONZERO = "nonzero"
+
+
+def __edges__(rings):
+    """ start and end points of the edges of the rings, as 4 arrays x0, y0, x1, y1. The rings are closed if needed. """
+    x0, y0, x1, y1 = [], [], [], []
+    for ring in rings:
+        points = numpy.array([(p[0], p[1]) for p in ring], dtype = numpy.float64)
+        if len(points) < 3:
+            continue
+        closed = numpy.vstack((points, points[:1]))
+        x0.append(closed[:-1, 0])
+        y0.append(closed[:-1, 1])
+        x1.append(closed[1:, 0])
+        y1.append(closed[1:, 1])
+    if len(x0) == 0:
+        empty = numpy.zeros((0,), dtype = numpy.float64)
+        return (empty, empty, empty, empty)
+    return (numpy.hstack(x0), numpy.hstack(y0), numpy.hstack(x1), numpy.hstack(y1))
+
+
+def __spans__(rings, scanlines, n_o_scanlines, fill_rule):
+    """ calculates the spans along the second axis where the polygon is filled, on the scanlines 
+        x = scanlines[0] + k * (scanlines[1]), k = 0 .. n_o_scanlines - 1
+        Returns the arrays (k, y_start, y_end) of all spans. """
+    (x0, y0, x1, y1) = __edges__(rings)
+    (x_first, step) = scanlines
+    # edges parallel to the scanlines do not cross them
+    crossing = (x0 != x1)
+    x0, y0, x1, y1 = x0[crossing], y0[crossing], x1[crossing], y1[crossing]
+    direction = numpy.where(x1 > x0, 1, -1)
+    x_min = numpy.minimum(x0, x1)
+    x_max = numpy.maximum(x0, x1)
+    # an edge crosses the scanlines with x_min <= x < x_max: vertices are counted once
+    k_start = numpy.clip(numpy.ceil((x_min - x_first) / step), 0, n_o_scanlines).astype(numpy.int64)
+    k_end = numpy.clip(numpy.ceil((x_max - x_first) / step), 0, n_o_scanlines).astype(numpy.int64)
+    counts = k_end - k_start
+    n = int(numpy.sum(counts))
+    if n == 0:
+        empty = numpy.zeros((0,), dtype = numpy.float64)
+        return (numpy.zeros((0,), dtype = numpy.int64), empty, empty)
+    edge = numpy.repeat(numpy.arange(len(counts)), counts)
+    k = k_start[edge] + (numpy.arange(n) - numpy.repeat(numpy.cumsum(counts) - counts, counts))
+    x = x_first + k * step
+    y = y0[edge] + (x - x0[edge]) * ((y1 - y0) / (x1 - x0))[edge]
+    d = direction[edge]
+    # sort the crossings along the scanlines: every scanline has an even number of crossings and a winding number of zero
+    order = numpy.lexsort((y, k))
+    k, y, d = k[order], y[order], d[order]
+    if fill_rule == FILL_RULE_NONZERO:
+        inside = (numpy.cumsum(d) != 0)
+    elif fill_rule == FILL_RULE_EVEN_ODD:
+        inside = (numpy.arange(n) % 2 == 0)
+    else:
+        raise ValueError("Unknown fill rule %s" % str(fill_rule))
+    inside[-1] = False
+    start = numpy.nonzero(inside)[0]
+    return (k[start], y[start], y[start + 1])
+
+
+def fill_polygon_in_array(array, rings, value = True, fill_rule = FILL_RULE_EVEN_ODD):
+    """ sets the pixels of a 2D array of which the center lies inside the polygon to value.
+        rings is a list of point lists: the outline of the polygon and its holes. """
+    (width, height) = array.shape[:2]
+    (k, y_start, y_end) = __spans__(rings, (0.5, 1.0), width, fill_rule)
+    # pixels j with center j + 0.5 in [y_start, y_end)
+    j_start = numpy.clip(numpy.ceil(y_start - 0.5), 0, height).astype(numpy.int64)
+    j_end = numpy.clip(numpy.ceil(y_end - 0.5), 0, height).astype(numpy.int64)
+    non_empty = numpy.nonzero(j_end > j_start)[0]
+    for s in non_empty:
+        array[k[s], j_start[s]:j_end[s]] = value
+    return array
+
+
+def add_polygon_coverage_to_array(array, rings, supersampling = 4, fill_rule = FILL_RULE_EVEN_ODD):
+    """ adds the fraction of the area of every pixel which is covered by the polygon to a 2D floating point array
+        (anti-aliased rasterization). The coverage is exact along the second axis and sampled with 
+        'supersampling' scanlines per pixel along the first axis. """
+    (width, height) = array.shape[:2]
+    step = 1.0 / supersampling
+    (k, y_start, y_end) = __spans__(rings, (0.5 * step, step), width * supersampling, fill_rule)
+    y_start = numpy.clip(y_start, 0.0, height)
+    y_end = numpy.clip(y_end, 0.0, height)
+    non_empty = (y_end > y_start)
+    k, y_start, y_end = k[non_empty], y_start[non_empty], y_end[non_empty]
+    if len(k) == 0:
+        return array
+    i = k // supersampling
+    j_first = numpy.minimum(numpy.floor(y_start).astype(numpy.int64), height - 1)
+    j_last = numpy.minimum(numpy.floor(y_end).astype(numpy.int64), height - 1)
+    # the covered pixels are only accumulated in the window around the polygon
+    (i_min, i_max) = (numpy.min(i), numpy.max(i) + 1)
+    (j_min, j_max) = (numpy.min(j_first), numpy.max(j_last) + 1)
+    i = i - i_min
+    j_first = j_first - j_min
+    j_last = j_last - j_min
+    one_pixel = (j_first == j_last)
+    # partially covered pixels at the ends of the spans, and fully covered pixels in between as a difference along the second axis
+    partial = numpy.zeros((i_max - i_min, j_max - j_min), dtype = numpy.float64)
+    full = numpy.zeros((i_max - i_min, j_max - j_min + 1), dtype = numpy.float64)
+    numpy.add.at(partial, (i[one_pixel], j_first[one_pixel]), (y_end - y_start)[one_pixel] * step)
+    more = ~one_pixel
+    numpy.add.at(partial, (i[more], j_first[more]), (j_first[more] + j_min + 1 - y_start[more]) * step)
+    numpy.add.at(partial, (i[more], j_last[more]), (y_end[more] - j_last[more] - j_min) * step)
+    numpy.add.at(full, (i[more], j_first[more] + 1), step)
+    numpy.add.at(full, (i[more], j_last[more]), -step)
+    array[i_min:i_max, j_min:j_max] += partial + numpy.cumsum(full, axis = 1)[:, :-1]
+    return array
@@ -22,6 +22,7 @@
 import numpy
 from ipkiss.all import *
 from .geometry import *
+from .raster import fill_polygon_in_array, add_polygon_coverage_to_array
 from pysics.basics.environment import *
 from ipkiss.visualisation.display_style import *
 from ipkiss.visualisation.color import *
@@ -40,7 +41,7 @@ from ipkiss import constants
 import logging
 import copy
 from dependencies.matplotlib_wrapper import *
-from dependencies.shapely_wrapper import TopologicalError
+from dependencies.shapely_wrapper import TopologicalError, flatten_shapely_geom
 
 all = ["virtual_fabrication"]
 
@@ -94,64 +95,6 @@ class VirtualFabrication(__VirtualFabrication__):
 # ----------------------------------------------------------------------------------------- 
 
 
-def __common_function_apply_polygon_to_array_memory_sparing__(array, polygon_points, do_bitwise_or = True, value = None):
-    if (do_bitwise_or) and (value is not None):
-        raise Exception("Invalid parameters : if do_bitwise_or==True, then value should be None")
-    if (not do_bitwise_or) and (value is None):
-        raise Exception("Invalid parameters : if do_bitwise_or==False, then value should not be None")
-    #calculate for which range in the array we have to calculate the overlap with this polygon
-    min_x = max(0,numpy.min([p[0] for p in polygon_points])-1)
-    max_x = min(array.shape[0],numpy.max([p[0] for p in polygon_points])+1)
-    min_y = max(0,numpy.min([p[1] for p in polygon_points])-1)
-    max_y = min(array.shape[1],numpy.max([p[1] for p in polygon_points])+1)
-    #the range that requires overlap will be plit up in slices (so as to limit memory consumption) - only needed for large polygons spanning over huge canvas
-    SLICE_X_SIZE = 10000.0
-    SLICE_Y_SIZE = 10000.0
-    slices_x = numpy.arange(0, numpy.ceil((max_x - min_x) / SLICE_X_SIZE)) 
-    slices_y = numpy.arange(0, numpy.ceil((max_y - min_y) / SLICE_Y_SIZE)) 
-    #now iterate over all the slices 
-    for slice_x in slices_x:
-        for slice_y in slices_y:
-            from_x = numpy.floor(slice_x * SLICE_X_SIZE + min_x)
-            to_x = numpy.ceil(min((slice_x + 1) * SLICE_X_SIZE + min_x, max_x))
-            from_y = numpy.floor(slice_y * SLICE_Y_SIZE + min_y)
-            to_y = numpy.ceil(min((slice_y + 1) * SLICE_Y_SIZE + min_y, max_y))
-            x_range = numpy.arange(from_x, to_x, dtype = numpy.int16) 
-            y_range = numpy.arange(from_y, to_y, dtype = numpy.int16) 
-            #calculate which canvas points correspond to this slice
-            x_range_corrected = x_range + 0.5
-            y_range_corrected = y_range + 0.5
-            canvas_points = __common_function_cartesian__((x_range_corrected, y_range_corrected))
-            #calculate the overlap between canvas points and polygon : which canvas point are inside the polygon?
-            points_inside_polygon_flag = nxutils.points_inside_poly(canvas_points, polygon_points)
-            #reshape the array with the flags
-            target_shape = (to_x - from_x, to_y - from_y)
-            points_inside_polygon_flag = points_inside_polygon_flag.reshape(target_shape)
-            if (do_bitwise_or):
-                #apply the true/false flag to the array
-                array[from_x:to_x, from_y:to_y] = numpy.bitwise_or(array[from_x:to_x, from_y:to_y], points_inside_polygon_flag)	
-            else:
-                array[from_x:to_x, from_y:to_y] = numpy.where(points_inside_polygon_flag == True, value, array[from_x:to_x, from_y:to_y])
-            percent_done = int(float(slice_x * len(slices_y) + slice_y) * 100.0 / (len(slices_x) * len(slices_y)))
-            if percent_done < 100:
-                LOG.debug("%i percent done..." % percent_done)
-
-
-def __common_function_cartesian__(arrays, out=None):
-    """cartesian product of Numpy arrays."""
-    dtype = arrays[0].dtype    
-    n = numpy.prod([x.size for x in arrays])
-    if out is None:
-        out = numpy.zeros([n, len(arrays)], dtype=dtype)    
-    m = n / arrays[0].size
-    out[:,0] = numpy.repeat(arrays[0], m)
-    if arrays[1:]:
-        __common_function_cartesian__(arrays[1:], out=out[0:m,1:])
-        for j in xrange(1, arrays[0].size):
-            out[j*m:(j+1)*m,1:] = out[0:m,1:]
-    return out	    
-
-
 from dependencies.shapely_wrapper import ShapelyPolygonCollection
 from dependencies.shapely_wrapper import Polygon as ShapelyPolygon
 
@@ -203,20 +146,26 @@ class LayerShapelyPolygons(ShapelyPolygonCollection):
         p = ShapelyPolygon(pts)
         return p	
 
-    def to_numpy_array(self, grid = TECH.METRICS.GRID):
-        resolution = int(1.0 / TECH.METRICS.GRID)
-        bitmap = numpy.zeros([self.shape[0] * resolution,
-                              self.shape[1] * resolution], dtype = bool)		
+    def to_numpy_array(self, grid = TECH.METRICS.GRID, antialias = False, supersampling = 4):
+        """Rasterize the polygons on a grid covering size_info. Returns a boolean bitmap, or, with antialias = True, 
+        the fraction of every grid cell covered by the polygons."""
+        resolution = int(round(1.0 / grid))
+        if antialias:
+            bitmap = numpy.zeros([int(numpy.ceil(self.shape[0] * resolution)),
+                                  int(numpy.ceil(self.shape[1] * resolution))], dtype = numpy.float64)
+        else:
+            bitmap = numpy.zeros([int(numpy.ceil(self.shape[0] * resolution)),
+                                  int(numpy.ceil(self.shape[1] * resolution))], dtype = bool)
         if (not self.is_empty()):
-            mp = self.georep
-            for g in mp.geoms:
-                polygon_points = list(g.boundary.coords)		    
-                self.__common_function_apply_polygon_to_array_memory_sparing__(bitmap, polygon_points)	  
+            origin = numpy.array([self.size_info.west, self.size_info.south])
+            for g in flatten_shapely_geom(self.georep):
+                rings = [(numpy.array(r.coords)[:, :2] - origin) * resolution for r in [g.exterior] + list(g.interiors)]
+                if antialias:
+                    add_polygon_coverage_to_array(bitmap, rings, supersampling = supersampling)
+                else:
+                    fill_polygon_in_array(bitmap, rings)
         return bitmap
 
-    def __cartesian__(self, arrays, out=None):
-        return __common_function_cartesian__(arrays, out)	
-
 
 # -------------------------------------------------------------------------------------------	  
 
@@ -241,16 +190,17 @@ class VirtualFabricationProcessSuperposition2DMaterialStackPolygonsOnly(VirtualF
         return (size_info, component_size_info)    
 
     def __make_process_polygons__(self):     
-        from ipkiss.boolean_ops.boolean_ops_elements import __get_composite_shapely_polygon_for_elements_on_generated_layer__
+        from ipkiss.boolean_ops.boolean_ops_elements import __GeneratedLayerBooleanEngine__
 
         process_polygons = dict()
         (size_info, component_size_info) = self.__collect_metrics__()    
         self.extend_component_at_ports() 
 
+        #the same boolean engine is used for all processes, so the hierarchy of the structure is only traversed once
+        boolean_engine = __GeneratedLayerBooleanEngine__(elements = self.structure.elements)
         for process in self.process_flow.active_processes:	    
             if hasattr(TECH.PPLAYER,process.extension) and hasattr(TECH.PPLAYER.__getattribute__(process.extension),"ALL"):
-                shapely_geom = __get_composite_shapely_polygon_for_elements_on_generated_layer__(elements = self.structure.elements, 
-                                                                                                 generated_layer = TECH.PPLAYER.__getattribute__(process.extension).ALL)
+                shapely_geom = boolean_engine.geometry(TECH.PPLAYER.__getattribute__(process.extension).ALL)
                 bm = LayerShapelyPolygons(layer = Layer(number = 0, name = "VFABRICATION_%s" %process.extension), size_info = size_info)	 	    
                 bm.georep = shapely_geom
                 process_polygons[process] = bm	    
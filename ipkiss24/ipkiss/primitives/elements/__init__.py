@@ -26,5 +26,7 @@ from .shape import Ellipse,EllipseArcPath,EllipsePath,Hexagon,HexagonPath,Line
 from .shape import ParabolicWedge,RadialLine,RadialWedge,Rectangle,RectanglePath,RegularPolygon
 from .shape import RegularPolygonPath,RingSegment,RoundedRectangle,RoundedRectanglePath,Wedge
 from .reference import SoftARef,SoftRotationARef,SRef,StackARef,ARef,ARefX, ARefY, MRef
+from .packed import PackedElementList
+from .store import BoundaryStore, DatatypeLayer
 from .box import Box
 from .text import PolygonText, Label
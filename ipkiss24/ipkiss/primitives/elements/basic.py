@@ -30,6 +30,7 @@ from ipcore.mixin.mixin import MixinBowl
 from ipcore.types_list import TypedList
 from ipkiss.exceptions.exc import IpkissException
 from ipkiss.log import IPKISS_LOG as LOG
+from ... import settings
 
 
 __all__ = ["ElementList",
@@ -42,6 +43,7 @@ __all__ = ["ElementList",
 ##########################################################
 
 class __Element__(transformable.StoredNoDistortTransformable, StrongPropertyInitializer):
+    __fast_copy__ = True
     
     def __init__(self, transformation = None, **kwargs):
         super(__Element__, self).__init__(transformation = transformation, **kwargs)
@@ -51,6 +53,9 @@ class __Element__(transformable.StoredNoDistortTransformable, StrongPropertyInit
         #from .. import structure
         #return structure.StructureList()
 
+    def direct_dependencies(self):
+        return None
+
     def __add__(self, other):
         if isinstance(other, list):
             l = ElementList([self])
@@ -110,6 +115,14 @@ class ElementList(TypedList, transformable.NoDistortTransformable):
             d.add(e.dependencies())
         return d
 
+    def direct_dependencies(self):
+        """ structures referred to by the elements, without the structures these refer to in turn """
+        from .. import structure
+        d = structure.StructureList()
+        for e in self:
+            d.add(e.direct_dependencies())
+        return d
+
     def size_info(self):
         if len(self) == 0:
             return size_info.SizeInfo()
@@ -139,12 +152,37 @@ class ElementList(TypedList, transformable.NoDistortTransformable):
             c.transform(transform)
         return self
 
-    def flat_copy(self, level = -1):
+    def flat_copy(self, level = -1, store = False):
+        """ flattened copy of the elements. With store = True, all the Boundaries are collected
+            in a single BoundaryStore, which is the first element of the result """
+        if store:
+            return self.__store_flat_copy__(level)
         el = ElementList()
         for e in self:
             el += e.flat_copy(level)
         return el
 
+    def __store_flat_copy__(self, level):
+        from .shape import Boundary
+        from .store import BoundaryStore
+        S = BoundaryStore()
+        el = ElementList()
+        for e in self:
+            if hasattr(e, "packed_flat_copy"):
+                el += S.add_packed(e.packed_flat_copy(level))
+                continue
+            flat = e.flat_copy(level)
+            if not isinstance(flat, list):
+                flat = [flat]
+            for f in flat:
+                if type(f) is Boundary:
+                    S.append(f)
+                elif isinstance(f, BoundaryStore):
+                    S.add_store(f)
+                else:
+                    el += f
+        return ElementList([S]) + el
+
     def is_empty(self):
         if (len(self) == 0): return True
         for e in self:
@@ -179,12 +217,27 @@ class ElementListProperty(DefinitionProperty):
             self.restriction = ((RestrictType(ElementList) | RestrictList(restriction = RestrictType(__Element__))) & R) 
         else:
             self.restriction = RestrictType(ElementList) | RestrictList(restriction = RestrictType(__Element__))             
+
+    def __set__(self, obj, value):
+        super(ElementListProperty, self).__set__(obj, value)
+        # the assigned list is often the old one, extended in place (append, extend, +=), which the 
+        # comparison with the stored value does not notice: drop the cached bounding box anyway
+        clear_size_info = getattr(obj, "__clear_size_info__", None)
+        if not clear_size_info is None:
+            clear_size_info()
                        
     def __call_getter_function__(self, obj):
         f = self.__get_getter_function__(obj)
-        value = f(ElementList())
-        if value is None:
-            raise IpkissException("Function '%s' returned None : this is invalid." %(f.__name__))
+        def define_elements():
+            value = f(ElementList())
+            if value is None:
+                raise IpkissException("Function '%s' returned None : this is invalid." %(f.__name__))
+            return value
+        disk_cache = settings.get_elements_disk_cache()
+        if disk_cache is None:
+            value = define_elements()
+        else:
+            value = disk_cache.elements(obj, define_elements)
         new_value = self.__cache_property_value_on_object__(obj, value)
         return new_value        
                 
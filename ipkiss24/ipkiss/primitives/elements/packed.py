@@ -0,0 +1,216 @@
+# IPKISS - Parametric Design Framework
+# Copyright (C) 2002-2012  Ghent University - imec
+# 
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 2
+# of the License, or (at your option) any later version.
+# 
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+# 
+# i-depot BBIE 7396, 7556, 7748
+# 
+# Contact: ipkiss@intec.ugent.be
+
+from ...geometry.shape import Shape
+from ...geometry.transforms.no_distort import NoDistortTransform
+from ...geometry.transforms.translation import Translation
+from .basic import ElementList
+from .shape import Boundary, Path
+import numpy
+
+__all__ = ["PackedElementList",
+           "PackedShapeElements",
+           "packed_flat_copy"]
+
+
+def __linear_part__(transformation):
+    """ returns the transformation without its translation """
+    return NoDistortTransform(rotation = transformation.rotation, 
+                              magnification = transformation.magnification, 
+                              v_mirror = transformation.v_mirror, 
+                              absolute_magnification = transformation.absolute_magnification, 
+                              absolute_rotation = transformation.absolute_rotation)
+
+
+def __compose_translations__(linear, translations, linear_2, translations_2):
+    """ returns the translations of (linear + translations[i]) + (linear_2 + translations_2[k]) for all k and i, 
+        as an array of shape (len(translations_2) * len(translations), 2), calculated as in NoDistortTransform.__add__ """
+    if linear.absolute_magnification:
+        M1 = 1.0
+    else:
+        M1 = linear_2.magnification
+    if linear_2.v_mirror: s_1 = -1
+    else:                 s_1 = 1
+    if not linear.absolute_rotation:
+        ca = linear_2.__ca__
+        sa = linear_2.__sa__
+    else:
+        ca = 1.0
+        sa = 0.0
+    sx = translations[numpy.newaxis, :, 0]
+    sy = translations[numpy.newaxis, :, 1]
+    ox = translations_2[:, numpy.newaxis, 0]
+    oy = translations_2[:, numpy.newaxis, 1]
+    result = numpy.empty((len(translations_2), len(translations), 2))
+    result[:, :, 0] = ox + ca * sx * M1 - s_1 * sa * sy * M1
+    result[:, :, 1] = oy + sa * sx * M1 + s_1 * ca * sy * M1
+    return result.reshape(-1, 2)
+
+
+class PackedShapeElements(object):
+    """ Copies of a Boundary or Path which only differ in their translation. The points of all copies 
+        are calculated in one operation, and the elements are only created when they are accessed. """
+
+    def __init__(self, element, transformation, translations, indices):
+        self.element = element               # Boundary or Path, with its transformation expanded
+        self.transformation = transformation # linear part of the transformation (without translation)
+        self.translations = translations     # (n, 2) array with the translation of every copy
+        self.indices = indices               # (n, ) array with the index of every copy in the PackedElementList
+        self.__points__ = None
+
+    def __len__(self):
+        return len(self.translations)
+
+    def transformed_points(self):
+        """ the points of the element with the linear part of the transformation applied """
+        return self.transformation.apply_to_array(numpy.array(self.element.shape.points, dtype = numpy.float64))
+
+    def get_points(self):
+        """ packed (n, n_o_points, 2) array with the points of all the copies """
+        if self.__points__ is None:
+            self.__points__ = self.transformed_points()[numpy.newaxis, :, :] + self.translations[:, numpy.newaxis, :]
+        return self.__points__
+    points = property(get_points)
+
+    def transform(self, transformation, translations, n_o_elements):
+        """ returns the copies placed with all the given translations after the given linear transformation. 
+            n_o_elements is the number of elements in the PackedElementList of one placement. """
+        indices = (numpy.arange(len(translations))[:, numpy.newaxis] * n_o_elements + self.indices[numpy.newaxis, :]).reshape(-1)
+        return PackedShapeElements(self.element,
+                                   __linear_part__(self.transformation + transformation),
+                                   __compose_translations__(self.transformation, self.translations, transformation, translations),
+                                   indices)
+
+    def offset_copy(self, offset):
+        """ the same copies, with their index in the PackedElementList shifted by offset """
+        P = PackedShapeElements(self.element, self.transformation, self.translations, self.indices + offset)
+        P.__points__ = self.__points__
+        return P
+
+    def __getitem__(self, index):
+        return self.__make_elements__(self.points[index:index + 1])[0]
+
+    def elements(self):
+        """ creates the elements of all the copies """
+        return self.__make_elements__(self.points)
+
+    def __make_elements__(self, points):
+        e = self.element
+        T = self.transformation
+        shape = e.shape
+        start_face_angle = shape.start_face_angle
+        if start_face_angle is not None:
+            start_face_angle = T.apply_to_angle_deg(start_face_angle)
+        end_face_angle = shape.end_face_angle
+        if end_face_angle is not None:
+            end_face_angle = T.apply_to_angle_deg(end_face_angle)
+        closed = shape.closed
+        shapes = [Shape(p.copy(), closed = closed, start_face_angle = start_face_angle, end_face_angle = end_face_angle) for p in points]
+        if isinstance(e, Path):
+            if e.absolute_line_width:
+                line_width = e.line_width
+            else:
+                line_width = T.apply_to_length(e.line_width)
+            return [Path(layer = e.layer, shape = s, line_width = line_width, path_type = e.path_type, absolute_line_width = e.absolute_line_width) for s in shapes]
+        else:
+            return [Boundary(layer = e.layer, shape = s) for s in shapes]
+
+
+class PackedElementList(object):
+    """ Flattened elements of a reference, in which the copies of a Boundary or Path are stored as PackedShapeElements.
+        The order of the elements is the same as in the ElementList returned by flat_copy. Other elements 
+        (e.g. labels) are stored as they are. """
+
+    def __init__(self, packed = None, elements = None, n_o_elements = 0):
+        if packed is None: packed = []
+        if elements is None: elements = []
+        self.packed = packed            # list of PackedShapeElements
+        self.other_elements = elements  # list of (index, element)
+        self.n_o_elements = n_o_elements
+
+    def __len__(self):
+        return self.n_o_elements
+
+    def __iadd__(self, other):
+        """ appends the elements of another PackedElementList """
+        n = self.n_o_elements
+        self.packed.extend([p.offset_copy(n) for p in other.packed])
+        self.other_elements.extend([(n + i, e) for i, e in other.other_elements])
+        self.n_o_elements += other.n_o_elements
+        return self
+
+    def append(self, element):
+        """ appends a single flat element. Boundaries and Paths are packed. """
+        if type(element) in (Boundary, Path):
+            e = element.flat_copy() # expands the transformation
+            self.packed.append(PackedShapeElements(e, NoDistortTransform(), numpy.zeros((1, 2)), numpy.array([self.n_o_elements])))
+        else:
+            self.other_elements.append((self.n_o_elements, element))
+        self.n_o_elements += 1
+
+    def transform(self, transformation, translations):
+        """ returns the elements placed with the linear transformation followed by each of the given translations,
+            in the order of the translations. """
+        transformation = __linear_part__(transformation)
+        translations = numpy.asarray(translations, dtype = numpy.float64).reshape(-1, 2)
+        n = self.n_o_elements
+        packed = [p.transform(transformation, translations, n) for p in self.packed]
+        elements = []
+        if len(self.other_elements) > 0:
+            for k, t in enumerate(translations):
+                T = transformation + Translation((t[0], t[1]))
+                elements.extend([(k * n + i, e.transform_copy(T)) for i, e in self.other_elements])
+        return PackedElementList(packed, elements, n * len(translations))
+
+    def layers(self):
+        """ the layers of the packed Boundaries and Paths """
+        layers = dict()
+        for p in self.packed:
+            layers[id(p.element.layer)] = p.element.layer
+        return layers.values()
+
+    def elements(self):
+        """ creates all the elements, as an ElementList """
+        result = [None] * self.n_o_elements
+        for p in self.packed:
+            for i, e in zip(p.indices, p.elements()):
+                result[i] = e
+        for i, e in self.other_elements:
+            result[i] = e
+        return ElementList(result)
+
+
+def packed_flat_copy(elements, level = -1):
+    """ flattens a list of elements into a PackedElementList. References which implement packed_flat_copy
+        are flattened with one array operation per Boundary or Path of the referenced structure, instead of
+        copying and transforming every element separately. """
+    result = PackedElementList()
+    for e in elements:
+        if hasattr(e, "packed_flat_copy"):
+            result += e.packed_flat_copy(level)
+            continue
+        flat = e.flat_copy(level)
+        if isinstance(flat, list):
+            for f in flat:
+                result.append(f)
+        else:
+            result.append(flat)
+    return result
@@ -25,8 +25,10 @@ from ...geometry.transforms.translation import Translation
 from ...geometry.coord import Coord2, Coord2Property
 from ...geometry import shape
 from ...geometry import shape_info
+from ...geometry.size_info import SizeInfo
 from .basic import __Element__, ElementList
 from .group import Group
+from .packed import PackedElementList, packed_flat_copy
 from .. import structure as structure_module
 from ... import constants
 from ... import settings
@@ -68,6 +70,11 @@ class __RefElement__(__Element__):
         d.add(self.reference.dependencies())
         return d
 
+    def direct_dependencies(self):
+        d = structure_module.StructureList()
+        d.add(self.reference)
+        return d
+
     def expand_transform(self):
         if not self.transformation.is_identity():
             S = structure_module.Structure(self.reference.name + self.transformation.id_string(),
@@ -102,16 +109,21 @@ class MRef(__RefElement__):
         self.positions = [Coord2(p[0] + position[0], p[1] + position[1]) for p in self.positions]
 
     def size_info(self):
+        # the (cached) box of the reference is transformed once and extended with the range of the positions
         S = self.reference.size_info().transform(self.transformation)
-        S2 = SizeInfo()
-        for p in self.positions: S2 += S.move_copy(p)
-        return S2
+        P = array([(p[0], p[1]) for p in self.positions], dtype = float).reshape(-1, 2)
+        if len(P) == 0 or S.west is None:
+            return SizeInfo()
+        LB = P.min(0)
+        TR = P.max(0)
+        return SizeInfo(S.west + LB[0], S.east + TR[0], S.north + TR[1], S.south + LB[1])
 
     def convex_hull(self):
         S = self.reference.convex_hull().transform(self.transformation)
-        S2 = Shape()
-        for p in self.positions: S2 += S.move_copy(p)
-        return S2.convex_hull()
+        P = array([(p[0], p[1]) for p in self.positions], dtype = float).reshape(-1, 1, 2)
+        if len(P) == 0 or len(S) == 0:
+            return shape.Shape()
+        return shape.Shape((P + S.points.reshape(1, -1, 2)).reshape(-1, 2)).convex_hull()
     
     
     def __untransformed_positions__(self):
@@ -124,15 +136,21 @@ class MRef(__RefElement__):
     def __deepcopy__(self, memo):#cannot be removed ! self.reference should not be deepcopied !
         return MRef(self.reference, deepcopy(self.positions), deepcopy(self.transformation))
     
+    def __placement_translations__(self):
+        """ (n, 2) array with the translations which follow the linear part of the transformation for every placement """
+        t = self.transformation.translation
+        return array(self.__positions__().points, dtype = float).reshape(-1, 2) + array([t[0], t[1]])
+
+    def packed_flat_copy(self, level = -1):
+        """ flattened elements as a PackedElementList: the points of the copies of every Boundary and Path 
+            are transformed for all positions at once, and the elements are only created on demand """
+        if level == 0: return PackedElementList(elements = [(0, self.__copy__())], n_o_elements = 1)
+        el = packed_flat_copy(self.reference.elements, level - 1)
+        return el.transform(self.transformation, self.__placement_translations__())
+
     def flat_copy(self, level = -1):
         if level == 0: return ElementList(self.__copy__())
-        el = self.reference.elements.flat_copy(level-1) 
-        el_tot = ElementList()
-        T = self.transformation 
-        for p in self.__positions__():
-            T2 = T + Translation(p)  
-            el_tot += el.transform_copy(T2)
-        return el_tot
+        return self.packed_flat_copy(level).elements()
 
 
     def is_empty(self):
@@ -178,6 +196,10 @@ class SRef(__AutoRefPositions__, MRef, MixinBowl):
         el = self.reference.elements.flat_copy(level-1)
         el.transform(self.transformation + Translation(self.position))
         return el
+
+    def __placement_translations__(self):
+        t = self.transformation.translation
+        return array([[self.position[0] + t[0], self.position[1] + t[1]]])
     
     def __repr__(self):
         return "<SRef of %s>" % self.reference.name
@@ -237,15 +259,8 @@ class ARef(__AutoRefPositions__, MRef, MixinBowl):
         return ARef(self.reference, deepcopy(self.origin), deepcopy(self.period), deepcopy(self.n_o_periods), deepcopy(self.transformation))
         
         
-    def flat_copy(self, level = -1):
-        if level == 0: return ElementList(self.__copy__())
-        el = self.reference.elements.flat_copy(level-1) 
-        el_tot = ElementList()
-        T = self.transformation - Translation(self.transformation.translation)
-        for p in self.__positions__():
-            T2 = T + Translation(p)  
-            el_tot += el.transform_copy(T2)
-        return el_tot
+    def __placement_translations__(self):
+        return array(self.__positions__().points, dtype = float).reshape(-1, 2)
     
 
     def is_empty(self):
@@ -0,0 +1,270 @@
+# IPKISS - Parametric Design Framework
+# Copyright (C) 2002-2012  Ghent University - imec
+# 
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 2
+# of the License, or (at your option) any later version.
+# 
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+# 
+# i-depot BBIE 7396, 7556, 7748
+# 
+# Contact: ipkiss@intec.ugent.be
+
+from ...geometry.shape import Shape
+from ...geometry import size_info
+from .basic import __Element__, ElementList
+from .shape import Boundary
+from ..layer import __Layer__
+from ipcore.mixin.mixin import MixinBowl
+from copy import deepcopy
+import numpy
+
+__all__ = ["BoundaryStore", "DatatypeLayer"]
+
+
+class DatatypeLayer(__Layer__):
+    """ layer of a boundary which is taken out of a BoundaryStore with an explicit GDSII datatype:
+        the output maps it as the layer it wraps, but with the datatype of the store """
+
+    def __init__(self, layer, datatype):
+        super(DatatypeLayer, self).__init__()
+        self.layer = layer
+        self.datatype = datatype
+
+    def __repr__(self):
+        return "(%s DATATYPE %d)" % (self.layer, self.datatype)
+
+    def id(self):
+        return "%s DATATYPE %d" % (self.layer, self.datatype)
+
+
+class BoundaryStore(__Element__, MixinBowl):
+    """ Element which holds many boundaries in columns instead of as separate Boundary objects:
+        -coordinates: one contiguous (n_o_points, 2) array with the points of all the boundaries
+        -offsets: (n_o_boundaries + 1, ) array with the index of the first point of every boundary
+        -layer_ids: (n_o_boundaries, ) array with the index of the layer of every boundary in layers
+        -datatypes: optional (n_o_boundaries, ) array with the GDSII datatype of every boundary, 
+         or -1 to use the datatype of the layer map
+        The transformation of the store applies to all the boundaries. Boundary objects are 
+        created when the store is indexed or iterated: the layer of a boundary with a datatype
+        is a DatatypeLayer. """
+
+    def __init__(self, transformation = None, **kwargs):
+        super(BoundaryStore, self).__init__(transformation = transformation, **kwargs)
+        self.layers = []                # Layer objects
+        self.__layer_index__ = dict()   # id(layer) -> index in layers
+        self.__chunks__ = []            # (layer_id, (n, n_o_points, 2) array, datatype) not yet in the columns
+        self.__coordinates__ = numpy.zeros((0, 2), dtype = numpy.float64)
+        self.__offsets__ = numpy.zeros((1,), dtype = numpy.int64)
+        self.__layer_ids__ = numpy.zeros((0,), dtype = numpy.int32)
+        self.__datatypes__ = None
+
+    #----------------------------------------------------------------------------
+    # columns
+    #----------------------------------------------------------------------------
+
+    def __layer_id__(self, layer):
+        i = self.__layer_index__.get(id(layer), None)
+        if i is None:
+            i = len(self.layers)
+            self.layers.append(layer)
+            self.__layer_index__[id(layer)] = i
+        return i
+
+    def __consolidate__(self):
+        """ appends the pending chunks to the columns """
+        if len(self.__chunks__) == 0:
+            return
+        n_old = len(self.__layer_ids__)
+        coordinates = [self.__coordinates__] + [c[0] for c in self.__chunks__]
+        lengths = numpy.hstack([c[1] for c in self.__chunks__])
+        layer_ids = [self.__layer_ids__] + [c[2] for c in self.__chunks__]
+        self.__coordinates__ = numpy.vstack(coordinates)
+        self.__offsets__ = numpy.hstack([self.__offsets__, self.__offsets__[-1] + numpy.cumsum(lengths)]).astype(numpy.int64)
+        self.__layer_ids__ = numpy.hstack(layer_ids).astype(numpy.int32)
+        if (self.__datatypes__ is not None) or any([c[3] is not None for c in self.__chunks__]):
+            datatypes = [self.__datatypes__]
+            if self.__datatypes__ is None:
+                datatypes = [-numpy.ones((n_old,), dtype = numpy.int16)]
+            for c in self.__chunks__:
+                if c[3] is None:
+                    datatypes.append(-numpy.ones((len(c[1]),), dtype = numpy.int16))
+                else:
+                    datatypes.append(c[3])
+            self.__datatypes__ = numpy.hstack(datatypes).astype(numpy.int16)
+        self.__chunks__ = []
+
+    def get_coordinates(self):
+        self.__consolidate__()
+        return self.__coordinates__
+    coordinates = property(get_coordinates)
+
+    def get_offsets(self):
+        self.__consolidate__()
+        return self.__offsets__
+    offsets = property(get_offsets)
+
+    def get_layer_ids(self):
+        self.__consolidate__()
+        return self.__layer_ids__
+    layer_ids = property(get_layer_ids)
+
+    def get_datatypes(self):
+        self.__consolidate__()
+        return self.__datatypes__
+    datatypes = property(get_datatypes)
+
+    #----------------------------------------------------------------------------
+    # adding boundaries
+    #----------------------------------------------------------------------------
+
+    def add_points(self, layer, points, datatype = -1):
+        """ adds boundaries with the same number of points, given as an (n, n_o_points, 2) array, 
+            in the coordinate frame of the store """
+        points = numpy.asarray(points, dtype = numpy.float64)
+        if points.ndim == 2:
+            points = points[numpy.newaxis, :, :]
+        n = len(points)
+        if n == 0:
+            return self
+        if datatype < 0:
+            datatypes = None
+        else:
+            datatypes = numpy.repeat(numpy.int16(datatype), n)
+        self.__chunks__.append((points.reshape(-1, 2), 
+                                numpy.repeat(points.shape[1], n),
+                                numpy.repeat(numpy.int32(self.__layer_id__(layer)), n),
+                                datatypes))
+        return self
+
+    def add_store(self, store):
+        """ adds the boundaries of another BoundaryStore """
+        if len(store) == 0:
+            return self
+        T = store.transformation
+        if not self.transformation.is_identity():
+            T = T - self.transformation
+        layer_map = numpy.array([self.__layer_id__(L) for L in store.layers], dtype = numpy.int32)
+        self.__chunks__.append((T.apply_to_array(numpy.array(store.coordinates)),
+                                numpy.diff(store.offsets),
+                                layer_map[store.layer_ids],
+                                store.datatypes))
+        return self
+
+    def append(self, boundary, datatype = -1):
+        """ adds a Boundary """
+        if not isinstance(boundary, Boundary):
+            raise TypeError("Only Boundary elements can be added to a BoundaryStore, not %s" % str(type(boundary)))
+        T = boundary.transformation
+        if not self.transformation.is_identity():
+            T = T - self.transformation
+        points = T.apply_to_array(numpy.array(boundary.shape.points, dtype = numpy.float64))
+        layer = boundary.layer
+        if isinstance(layer, DatatypeLayer):
+            if datatype < 0:
+                datatype = layer.datatype
+            layer = layer.layer
+        return self.add_points(layer, points, datatype)
+
+    def extend(self, boundaries):
+        for b in boundaries:
+            self.append(b)
+        return self
+
+    def add_packed(self, packed):
+        """ adds the Boundaries of a PackedElementList, and returns an ElementList with its other elements """
+        other = []
+        for p in packed.packed:
+            if type(p.element) is Boundary:
+                points = p.points
+                if not self.transformation.is_identity():
+                    points = (-self.transformation).apply_to_array(points.reshape(-1, 2)).reshape(points.shape)
+                self.add_points(p.element.layer, points)
+            else:
+                other.extend(zip(p.indices, p.elements()))
+        other.extend(packed.other_elements)
+        other.sort(key = lambda x: x[0])
+        return ElementList([e for i, e in other])
+
+    #----------------------------------------------------------------------------
+    # ElementList behaviour
+    #----------------------------------------------------------------------------
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def points(self, index):
+        """ points of a boundary, without the transformation of the store """
+        o = self.offsets
+        return self.__coordinates__[o[index]:o[index + 1]]
+
+    def __getitem__(self, index):
+        n = len(self)
+        if index < 0:
+            index += n
+        if index < 0 or index >= n:
+            raise IndexError("BoundaryStore index out of range")
+        points = self.transformation.apply_to_array(numpy.array(self.points(index)))
+        layer = self.layers[self.layer_ids[index]]
+        datatypes = self.datatypes
+        if (datatypes is not None) and (datatypes[index] >= 0):
+            layer = DatatypeLayer(layer, int(datatypes[index]))
+        return Boundary(layer = layer, shape = Shape(points, closed = True))
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    def elements(self):
+        """ creates all the boundaries, as an ElementList """
+        return ElementList(list(self))
+
+    def size_info(self):
+        if len(self) == 0:
+            return size_info.SizeInfo()
+        return size_info.size_info_from_numpyarray(self.transformation.apply_to_array(numpy.array(self.coordinates)))
+
+    def convex_hull(self):
+        return Shape(self.transformation.apply_to_array(numpy.array(self.coordinates))).convex_hull()
+
+    def expand_transform(self):
+        if not self.transformation.is_identity():
+            self.__consolidate__()
+            self.__coordinates__ = self.transformation.apply_to_array(numpy.array(self.__coordinates__))
+            self.transformation = None
+        return self
+
+    def flat_copy(self, level = -1):
+        S = self.__copy__()
+        S.expand_transform()
+        return S
+
+    def is_empty(self):
+        return len(self) == 0
+
+    def __copy__(self):
+        S = BoundaryStore(transformation = deepcopy(self.transformation))
+        S.layers = list(self.layers)
+        S.__layer_index__ = dict(self.__layer_index__)
+        S.__coordinates__ = self.coordinates
+        S.__offsets__ = self.__offsets__
+        S.__layer_ids__ = self.__layer_ids__
+        S.__datatypes__ = self.__datatypes__
+        return S
+
+    def __deepcopy__(self, memo): # the layers should not be deepcopied
+        S = self.__copy__()
+        S.__coordinates__ = numpy.array(S.__coordinates__)
+        return S
+
+    def __repr__(self):
+        return "<BoundaryStore of %d boundaries>" % len(self)
@@ -21,7 +21,45 @@
 
 from ipcore.properties.initializer import StrongPropertyInitializer
 from ipcore.properties.predefined import StringProperty
+from ipcore.mixin.mixin import mixin_generation
 from ipkiss.log import IPKISS_LOG as LOG
+import inspect
+
+__FILTER_METHOD_TABLES__ = {}
+__FILTER_METHOD_TABLES_GENERATION__ = [mixin_generation()]
+
+class __FilterMethodTable__(dict):
+    """ maps the type of an item on the __filter_<class>__ method of a filter class which processes it, 
+        or on None if the item is passed unchanged by __filter_default__ of Filter """
+    def __init__(self, filter_class):
+        super(__FilterMethodTable__, self).__init__()
+        self.filter_class = filter_class
+        
+    def __missing__(self, item_type):
+        method = None
+        for M in inspect.getmro(item_type):
+            method = getattr(self.filter_class, "__filter_%s__" % M.__name__, None)
+            if method is not None:
+                break
+        if method is None:
+            method = self.filter_class.__filter_default__
+        method = method.im_func
+        if method is Filter.__dict__["__filter_default__"]:
+            method = None
+        LOG.debug("Filter class %s uses %s for items of type %s" % (self.filter_class.__name__, method, item_type.__name__))
+        self[item_type] = method
+        return method
+        
+def __filter_method_table__(filter_class):
+    """ returns the dispatch table of a filter class. The tables are rebuilt after a mixin has 
+        changed the bases of a filter class or of a primitive class. """
+    if __FILTER_METHOD_TABLES_GENERATION__[0] != mixin_generation():
+        __FILTER_METHOD_TABLES__.clear()
+        __FILTER_METHOD_TABLES_GENERATION__[0] = mixin_generation()
+    table = __FILTER_METHOD_TABLES__.get(filter_class, None)
+    if table is None:
+        table = __FILTER_METHOD_TABLES__[filter_class] = __FilterMethodTable__(filter_class)
+    return table
 
 
 class Filter(StrongPropertyInitializer):
@@ -31,31 +69,28 @@ class Filter(StrongPropertyInitializer):
     
     def __call__(self, item):
         if isinstance(item, list):
-            L = []
-            for v in item: 
-                L += self.__call__(v)
-            return L
+            return self.__filter_list__(item, __filter_method_table__(self.__class__))
         else:
             return self.filter(item)
 
-    def filter(self, item):
-        import inspect
-        T = type(item)
-        if inspect.isclass(T):
-            for M in inspect.getmro(T):
-                N = "__filter_%s__" % M.__name__
-                if hasattr(self, N):
-                    LOG.debug("Applying method %s of %s to %s" %(N,self,item))
-                    return getattr(self, N)(item)
-            return self.__filter_default__(item)
-        else:
-            N = "__filter_%s" % T.__name__
-            if hasattr(self, N):
-                expr = "self.%s(item)" % N
-                LOG.debug("Executing %s" %expr)
-                return eval(expr)
+    def __filter_list__(self, items, table):
+        L = []
+        for v in items:
+            if isinstance(v, list):
+                L += self.__filter_list__(v, table)
             else:
-                return self.__filter_default__(item)
+                method = table[type(v)]
+                if method is None:
+                    L.append(v)
+                else:
+                    L += method(self, v)
+        return L
+            
+    def filter(self, item):
+        method = __filter_method_table__(self.__class__)[type(item)]
+        if method is None:
+            return [item]
+        return method(self, item)
         
     def __filter_default__(self, item):
         return [item]
@@ -80,11 +115,11 @@ class __CompoundFilter__(Filter):
     """ compound property processor class """
     def __init__(self, filters = [], **kwargs):
         super(__CompoundFilter__,self).__init__(**kwargs)
-        self._sub_filters = filters
+        self._sub_filters = list(filters)
 
     def __add__(self, other):
         if isinstance(other, __CompoundFilter__):
-            return __CompoundFilter__(name = self.name, filters = self._sub_filters + other.__sub_filters)
+            return __CompoundFilter__(name = self.name, filters = self._sub_filters + other._sub_filters)
         elif isinstance(other, Filter):
             return __CompoundFilter__(name = self.name, filters = self._sub_filters + [other])
         else:
@@ -96,7 +131,7 @@ class __CompoundFilter__(Filter):
     
     def add(self, other):
         if isinstance(other, __CompoundFilter__):
-            self._sub_filters += other._sub_filter
+            self._sub_filters += other._sub_filters
         elif isinstance(other, Filter):
             self._sub_filters += [other]
         else:
@@ -104,13 +139,13 @@ class __CompoundFilter__(Filter):
         
     def __call__(self, item):
         """ processes the item """ 
-        LOG.debug("Applying all subfilters. Item = %s" % item)
+        return self.__apply_filters__(self._sub_filters, item)
+    
+    def __apply_filters__(self, filters, item):
+        """ pushes the item, or the complete list of items, through all the filters in turn """
         v = item
-        for R in self._sub_filters:
-            LOG.debug("** Applying subfilter %s to %s" % (R, v))
+        for R in filters:
             v = R(v)
-            LOG.debug("** Result after filtering = %s\n" % v)
-        LOG.debug("Finished applying all subfilters. Item = %s" % item)        
         return v
 
     def __repr__(self):
@@ -146,16 +181,8 @@ class ToggledCompoundFilter(__CompoundFilter__):
     
     def __call__(self, item):
         """ processes the item """ 
-        LOG.debug("Applying all subfilters. Item = %s" % item)
-        v = item
-        k = self.__filter_status.keys()
-        for R in self._sub_filters:
-            if R.name not in k or self.__filter_status[R.name]:
-                LOG.debug("** Applying subfilter %s to %s"  % (R, v))
-                v = R(v)
-                LOG.debug("** Result after filtering = %s\n" % v)
-        LOG.debug("Finished applying all subfilters. Item = %s" % item)        
-        return v
+        status = self.__filter_status
+        return self.__apply_filters__([R for R in self._sub_filters if status.get(R.name, True)], item)
     
     def __repr__(self):
         S = "< Toggled Compound Filter:"
@@ -42,6 +42,10 @@ class __Group__(StrongPropertyInitializer):
     def dependencies(self):
         return self.elements.dependencies()    
 
+    @cache()
+    def direct_dependencies(self):
+        return self.elements.direct_dependencies()
+
     def append(self, element):
         '''append 1 item to the list of elements'''
         myElems = self.elements
@@ -71,6 +71,10 @@ class MetaLayerCreator(MetaPropertyInitializer):
 class __Layer__(StrongPropertyInitializer):
     __metaclass__ = MetaLayerCreator
 
+    def __deepcopy__(self, memo):
+        # layers are registered in a layer list: the copies of elements share the same layer object
+        return self
+
     def __and__(self, other):
         if isinstance(other, __Layer__):
             return __GeneratedLayerAnd__(self, other)
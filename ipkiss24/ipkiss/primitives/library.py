@@ -39,11 +39,13 @@ class Library(UnitGridContainer, MixinBowl):
     modified = TimeProperty(doc = "Timestamp at which the library was modified.")
     layout = BoolProperty(default = True, doc="Indicates whether the library contains a layout : in that case, there should be only 1 top-level structure.")
     allow_empty_structures = BoolProperty(default = True, doc="Indicates whether empty structures are allowed.")
+    content_addressed_structures = BoolProperty(default = False, doc="If True, creating a structure with the same class and externally set properties as an existing structure returns the existing structure.")
     
     def __init__(self, name, **kwargs):
         super(Library, self).__init__(name=name, **kwargs)
         self.structures = StructureList()
         self.__referenced_structures = set()
+        self.__structures_by_content__ = dict()
         
     def snap_value(self,value):
         return settings.snap_value(value, self.grids_per_unit)
@@ -133,22 +135,88 @@ class Library(UnitGridContainer, MixinBowl):
         
     def unreferenced_structures(self, usecache = False):
         """returns a list of unreferenced structures"""
-        referred_to_list = self.referenced_structures(usecache = usecache)
+        if usecache:
+            referred_to_names = set([s.name for s in self.__referenced_structures])
+        else:
+            referred_to_names = self.__reference_graph__()[1]
         not_referred_to_list = StructureList()
         for s in self.structures:
-            if not s in referred_to_list:
+            if not s.name in referred_to_names:
                 not_referred_to_list.add(s)
         return not_referred_to_list
 
+    def top_structures(self):
+        """returns the structures of the library which are not referred to by any other structure"""
+        return self.unreferenced_structures()
+
     def referenced_structures(self, usecache = False):
-        """Build list of referred structures"""
+        """Build list of referred structures, in topological order (every structure comes before the structures it refers to)"""
         if usecache:
             return StructureList(self.__referenced_structures)
+        order, referred_to_names = self.__reference_graph__()
         referred_to_list = StructureList()
-        for s in self.structures:
-            referred_to_list.add(s.dependencies())
+        for s in order:
+            if s.name in referred_to_names:
+                referred_to_list.__fast_add__(s)
         return referred_to_list
 
+    def topological_structures(self):
+        """returns the structures of the library and all structures they refer to, 
+           where every structure comes before the structures it refers to"""
+        return self.__reference_graph__()[0]
+
+    def reachable_structures(self, structure):
+        """returns all structures to which the given structure refers directly or indirectly, in topological order"""
+        return self.__reference_graph__(StructureList(structure))[0][1:]
+
+    def __reference_graph__(self, roots = None):
+        """ depth-first walk over the direct references of each structure. Returns the structures reachable from 
+            the roots (by default the library structures) in topological order, and the set of referred structure names """
+        if roots is None:
+            roots = self.structures
+        # first pass: collect the children of each structure. The walk is in pre-order, as in dependencies(), because
+        # this is the order in which the elements of the structures get defined.
+        children = {}
+        referred_to_names = set()
+        for root in roots:
+            if root.name in children: 
+                continue
+            children[root.name] = root.direct_dependencies()
+            stack = [iter(children[root.name])]
+            while stack:
+                for c in stack[-1]:
+                    referred_to_names.add(c.name)
+                    if not c.name in children:
+                        children[c.name] = c.direct_dependencies()
+                        stack.append(iter(children[c.name]))
+                        break
+                else:
+                    stack.pop()
+        # second pass: reverse post-order. Children are visited in reverse order, so that for a tree this 
+        # results in a pre-order traversal.
+        visited = set()
+        post_order = []
+        for root in reversed(roots):
+            if root.name in visited: 
+                continue
+            visited.add(root.name)
+            stack = [(root, reversed(children[root.name]))]
+            while stack:
+                s, c_iter = stack[-1]
+                for c in c_iter:
+                    if not c.name in visited:
+                        visited.add(c.name)
+                        stack.append((c, reversed(children[c.name])))
+                        break
+                else:
+                    stack.pop()
+                    post_order.append(s)
+        post_order.reverse()
+        order = StructureList()
+        for s in post_order:
+            order.__fast_add__(s)
+        return (order, referred_to_names)
+
     def collect_references(self, structure = None):
         if structure is None:
             s_list = self.structures
@@ -181,10 +249,22 @@ class Library(UnitGridContainer, MixinBowl):
 
     def __fast_get_structure__(self, str_name):
         """ returns the structure if it exists or returns None"""
-        for s in self.structures:
-            if s.name == str_name: return s
-        return None
+        return self.structures.__fast_get__(str_name)
     
+    def __fast_get_structure_by_content__(self, content):
+        """ returns the structure with the given content hash if it exists or returns None"""
+        S = self.__structures_by_content__.get(content, None)
+        if S is None:
+            return None
+        if (self.structures.__fast_get__(S.name) is S) and (S.content_hash() == content):
+            return S
+        # the structure was removed from the library or its properties were changed
+        del self.__structures_by_content__[content]
+        return None
+
+    def __register_structure_content__(self, structure, content):
+        self.__structures_by_content__[content] = structure
+
     def __fast_add__(self, new_str):
         """add a structure without checking if the structure exists"""
         self.structures.__fast_add__(new_str)
@@ -201,6 +281,7 @@ class Library(UnitGridContainer, MixinBowl):
     
     def clear(self):
         self.structures.clear()
+        self.__structures_by_content__.clear()
         
     def __eq__(self, other):
         if not isinstance(other, Library):
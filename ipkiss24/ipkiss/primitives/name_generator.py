@@ -26,6 +26,18 @@ class __NameGenerator__(object):
     def reset(self):
         pass
 
+    def reserve(self, name):
+        """Makes sure that the given name, which is used by an existing object, is not generated."""
+        pass
+
+    def counters(self):
+        """Returns a copy of the state of the generator, as a dictionary of counters."""
+        return {}
+
+    def advance(self, increments):
+        """Advances the counters of the generator as if names were generated: increments is a dictionary of counter increments."""
+        pass
+
 
 class CounterNameGenerator(__NameGenerator__):
     """Generate a unique name based on a counter for every prefix"""
@@ -44,6 +56,20 @@ class CounterNameGenerator(__NameGenerator__):
         c += 1
         c = self.names_counters[prefix] = c       
         return "%s_%d" % (prefix, c)
+
+    def reserve(self, name):
+        parts = name.rsplit("_", 1)
+        if len(parts) == 2 and parts[1].isdigit():
+            prefix, c = parts[0], int(parts[1])
+            if c > self.names_counters.get(prefix, self.counter_zero):
+                self.names_counters[prefix] = c
+
+    def counters(self):
+        return dict([(prefix, c - self.counter_zero) for (prefix, c) in self.names_counters.items()])
+
+    def advance(self, increments):
+        for (prefix, n) in increments.items():
+            self.names_counters[prefix] = self.names_counters.get(prefix, self.counter_zero) + n
     
     def reset(self):
         self.prefix_attribute = "__name_prefix__"
@@ -0,0 +1,376 @@
+# IPKISS - Parametric Design Framework
+# Copyright (C) 2002-2012  Ghent University - imec
+# 
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 2
+# of the License, or (at your option) any later version.
+# 
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+# 
+# i-depot BBIE 7396, 7556, 7748
+# 
+# Contact: ipkiss@intec.ugent.be
+
+
+from ..geometry.size_info import SizeInfo
+from ..geometry.transforms.translation import Translation
+from .elements.basic import ElementList
+from .elements.group import Group
+from .elements.packed import __linear_part__
+from .elements.reference import MRef, SRef
+from .elements.shape import Boundary, Path
+from .elements.store import BoundaryStore
+import numpy
+
+__all__ = ["BoxTree",
+           "StructureSpatialIndex"]
+
+
+def __window__(box):
+    """ (west, south, east, north) of a SizeInfo, a Shape or a list of points """
+    if isinstance(box, SizeInfo):
+        return (box.west, box.south, box.east, box.north)
+    P = numpy.array([(c[0], c[1]) for c in box], dtype = numpy.float64)
+    return (P[:, 0].min(), P[:, 1].min(), P[:, 0].max(), P[:, 1].max())
+
+
+def __corners__(window):
+    w, s, e, n = window
+    return numpy.array([(w, s), (e, s), (e, n), (w, n)], dtype = numpy.float64)
+
+
+def __size_info_box__(si):
+    """ (west, south, east, north) of a SizeInfo, or None if it is empty """
+    if si.west is None:
+        return None
+    return (si.west, si.south, si.east, si.north)
+
+
+def __boxes_overlap__(box, window):
+    return (box[0] <= window[2]) and (box[2] >= window[0]) and (box[1] <= window[3]) and (box[3] >= window[1])
+
+
+class BoxTree(object):
+    """ Static R-tree over axis-aligned boxes, packed with the sort-tile-recursive algorithm.
+        The nodes of every level are stored in one (n, 4) array of (west, south, east, north), 
+        so that a query tests all the candidate nodes of a level in one array operation. """
+
+    def __init__(self, boxes, node_size = 16):
+        boxes = numpy.asarray(boxes, dtype = numpy.float64).reshape(-1, 4)
+        self.boxes = boxes
+        self.node_size = node_size
+        self.levels = []  # leaf level first, root level last
+        n = len(boxes)
+        if n == 0:
+            self.order = numpy.zeros((0,), dtype = numpy.int64)
+            return
+        # sort-tile-recursive: vertical slices sorted on x, sorted on y within each slice
+        n_o_nodes = int(numpy.ceil(n / float(node_size)))
+        n_o_slices = int(numpy.ceil(numpy.sqrt(n_o_nodes)))
+        slice_size = node_size * int(numpy.ceil(n_o_nodes / float(n_o_slices)))
+        order = numpy.argsort(boxes[:, 0] + boxes[:, 2], kind = "mergesort")
+        slices = numpy.arange(n) // slice_size
+        order = order[numpy.lexsort((boxes[order, 1] + boxes[order, 3], slices))]
+        self.order = order
+        level = boxes[order]
+        self.levels.append(level)
+        while len(level) > node_size:
+            starts = numpy.arange(0, len(level), node_size)
+            level = numpy.column_stack((numpy.minimum.reduceat(level[:, 0], starts),
+                                        numpy.minimum.reduceat(level[:, 1], starts),
+                                        numpy.maximum.reduceat(level[:, 2], starts),
+                                        numpy.maximum.reduceat(level[:, 3], starts)))
+            self.levels.append(level)
+
+    def __len__(self):
+        return len(self.order)
+
+    def query(self, window):
+        """ sorted indices of the boxes which overlap the window (west, south, east, north), 
+            touching boxes included """
+        if len(self.levels) == 0:
+            return numpy.zeros((0,), dtype = numpy.int64)
+        w, s, e, n = window
+        B = self.node_size
+        candidates = numpy.arange(len(self.levels[-1]))
+        for l in range(len(self.levels) - 1, -1, -1):
+            b = self.levels[l][candidates]
+            hit = candidates[(b[:, 0] <= e) & (b[:, 2] >= w) & (b[:, 1] <= n) & (b[:, 3] >= s)]
+            if l == 0:
+                return numpy.sort(self.order[hit])
+            candidates = (hit[:, numpy.newaxis] * B + numpy.arange(B)[numpy.newaxis, :]).reshape(-1)
+            candidates = candidates[candidates < len(self.levels[l - 1])]
+
+
+class __ReferencePlacements__(object):
+    """ the placements of one reference: the linear part of its transformation followed by 
+        each of the translations """
+
+    def __init__(self, reference, translations):
+        self.reference = reference
+        self.structure = reference.reference
+        self.linear = __linear_part__(reference.transformation)
+        self.translations = translations
+
+    def transformation(self, k):
+        """ the transformation of placement k """
+        t = self.translations[k]
+        return self.linear + Translation((t[0], t[1]))
+
+    def windows(self, window, placements):
+        """ (n, 4) array with the boxes in the coordinates of the referenced structure 
+            which contain the window, for the given placements """
+        C = __corners__(window)[numpy.newaxis, :, :] - self.translations[placements][:, numpy.newaxis, :]
+        C = (-self.linear).apply_to_array(C.reshape(-1, 2)).reshape(-1, 4, 2)
+        return numpy.column_stack((C[:, :, 0].min(1), C[:, :, 1].min(1), C[:, :, 0].max(1), C[:, :, 1].max(1)))
+
+
+class StructureSpatialIndex(object):
+    """ Spatial index over the elements of one structure, in the coordinates of that structure:
+        -per layer, a BoxTree over the elements on that layer (Boundaries in a BoundaryStore are indexed separately)
+        -a BoxTree over all the placements of the references, built from the cached bounding boxes of the
+         referenced structures. Queries descend into the (lazily built) indices of the referenced structures.
+        Groups (including the soft ARefs) are flattened when the index is built. """
+
+    def __init__(self, structure):
+        self.structure = structure
+        leaves = dict()       # id(layer) -> (layer, list of boxes, list of items)
+        placements = []
+        for e in structure.elements:
+            self.__add_element__(e, leaves, placements)
+
+        self.leaves = []      # (layer, BoxTree, items); items are elements or (store, index)
+        for layer, boxes, items in leaves.values():
+            self.leaves.append((layer, BoxTree(numpy.vstack(boxes)), items))
+
+        self.references = placements
+        if len(placements) > 0:
+            self.reference_tree = BoxTree(numpy.vstack([p.boxes for p in placements]))
+            self.reference_index = numpy.hstack([numpy.repeat(i, len(p.boxes)) for i, p in enumerate(placements)])
+            self.placement_index = numpy.hstack([numpy.arange(len(p.boxes)) for p in placements])
+        else:
+            self.reference_tree = BoxTree([])
+
+        layers = dict([(id(L[0]), L[0]) for L in self.leaves])
+        for p in placements:
+            for L in p.structure.__get_spatial_index__().layers:
+                layers[id(L)] = L
+        self.layers = layers.values() # all the layers in the structure and its child structures
+
+    def __add_element__(self, e, leaves, placements):
+        if isinstance(e, Group):
+            for f in e.flat_copy():
+                self.__add_element__(f, leaves, placements)
+        elif isinstance(e, MRef):
+            if e.reference is None:
+                return
+            box = __size_info_box__(e.reference.size_info())
+            if box is None:
+                return
+            p = __ReferencePlacements__(e, e.__placement_translations__())
+            if len(p.translations) == 0:
+                return
+            C = p.linear.apply_to_array(__corners__(box))
+            b = numpy.array([C[:, 0].min(), C[:, 1].min(), C[:, 0].max(), C[:, 1].max()])
+            p.boxes = b[numpy.newaxis, :] + numpy.hstack([p.translations, p.translations])
+            placements.append(p)
+        elif isinstance(e, BoundaryStore):
+            if len(e) == 0:
+                return
+            C = e.transformation.apply_to_array(numpy.array(e.coordinates))
+            starts = e.offsets[:-1]
+            boxes = numpy.column_stack((numpy.minimum.reduceat(C[:, 0], starts),
+                                        numpy.minimum.reduceat(C[:, 1], starts),
+                                        numpy.maximum.reduceat(C[:, 0], starts),
+                                        numpy.maximum.reduceat(C[:, 1], starts)))
+            layer_ids = e.layer_ids
+            for i, layer in enumerate(e.layers):
+                indices = numpy.nonzero(layer_ids == i)[0]
+                if len(indices) > 0:
+                    L = leaves.setdefault(id(layer), (layer, [], []))
+                    L[1].append(boxes[indices])
+                    L[2].extend([(e, k) for k in indices])
+        else:
+            box = __size_info_box__(e.size_info())
+            if box is None:
+                return
+            layer = getattr(e, "layer", None)
+            L = leaves.setdefault(id(layer), (layer, [], []))
+            L[1].append(numpy.array([box]))
+            L[2].append(e)
+
+    #----------------------------------------------------------------------------
+    # queries
+    #----------------------------------------------------------------------------
+
+    def has_layers(self, layers):
+        """ True if the structure or its child structures have elements on one of the layers (None for all) """
+        if layers is None:
+            return len(self.layers) > 0
+        for L in self.layers:
+            if __matches__(L, layers):
+                return True
+        return False
+
+    def elements_in_region(self, box, layers = None, depth = -1):
+        """ ElementList with the elements of which the bounding box overlaps box. Elements of child structures
+            (down to the given depth, -1 for all levels) are returned as copies in the coordinates of this structure; 
+            references at the maximum depth are returned as SRefs for each placement which overlaps box. """
+        if layers is not None and not isinstance(layers, (list, tuple)):
+            layers = [layers]
+        window = __window__(box)
+        result = ElementList()
+        self.__query__(window, window, None, layers, depth, result)
+        return result
+
+    def __query__(self, window, top_window, transformation, layers, depth, result):
+        # below the top level, the windows enclose the query window rotated into the child coordinates,
+        # so the candidates are checked once more in the coordinates of the top structure
+        exact = transformation is None
+        for layer, tree, items in self.leaves:
+            if layers is not None and not __matches__(layer, layers):
+                continue
+            for i in tree.query(window):
+                e = __item_copy__(items[i], transformation)
+                if exact or __boxes_overlap__(__size_info_box__(e.size_info()), top_window):
+                    result.append(e)
+
+        if len(self.references) == 0:
+            return
+        hits = self.reference_tree.query(window)
+        reference_index = self.reference_index[hits]
+        placement_index = self.placement_index[hits]
+        for r, p in enumerate(self.references):
+            placements = placement_index[reference_index == r]
+            if len(placements) == 0:
+                continue
+            child_index = p.structure.__get_spatial_index__()
+            if not child_index.has_layers(layers):
+                continue
+            if depth == 0:
+                for k in placements:
+                    T = p.transformation(k)
+                    if transformation is not None:
+                        T = T + transformation
+                    e = SRef(p.structure, (0.0, 0.0), transformation = T)
+                    if exact or __boxes_overlap__(__size_info_box__(e.size_info()), top_window):
+                        result.append(e)
+            else:
+                windows = p.windows(window, placements)
+                for k, child_window in zip(placements, windows):
+                    T = p.transformation(k)
+                    if transformation is not None:
+                        T = T + transformation
+                    child_index.__query__(tuple(child_window), top_window, T, layers, depth - 1, result)
+
+    def nearest_elements(self, point, n_o_elements = 1, layers = None, depth = -1):
+        """ ElementList with the n_o_elements elements closest to point, closest first. The distance 
+            is measured to the outline of Boundaries (0 inside) and Paths, and to the bounding box of other elements. """
+        if layers is not None and not isinstance(layers, (list, tuple)):
+            layers = [layers]
+        extent = __size_info_box__(self.structure.size_info())
+        if extent is None:
+            return ElementList()
+        x, y = point[0], point[1]
+        # grow a square window around the point until it holds enough elements
+        size = max(extent[2] - extent[0], extent[3] - extent[1], 1.0)
+        r = size * 2 ** -10
+        while True:
+            window = (x - r, y - r, x + r, y + r)
+            candidates = ElementList()
+            self.__query__(window, window, None, layers, depth, candidates)
+            covers_all = (window[0] <= extent[0]) and (window[1] <= extent[1]) and (window[2] >= extent[2]) and (window[3] >= extent[3])
+            if len(candidates) >= n_o_elements or covers_all:
+                break
+            r *= 2.0
+        if len(candidates) == 0:
+            return candidates
+        distances = numpy.array([__element_distance__(e, point) for e in candidates])
+        d = numpy.sort(distances)[min(n_o_elements, len(distances)) - 1]
+        if d > r and not covers_all:
+            # elements closer than d have a bounding box which overlaps the window of half size d
+            window = (x - d, y - d, x + d, y + d)
+            candidates = ElementList()
+            self.__query__(window, window, None, layers, depth, candidates)
+            distances = numpy.array([__element_distance__(e, point) for e in candidates])
+        order = numpy.argsort(distances, kind = "mergesort")[:n_o_elements]
+        return ElementList([candidates[i] for i in order])
+
+
+def __matches__(layer, layers):
+    for L in layers:
+        if layer == L:
+            return True
+    return False
+
+
+def __item_copy__(item, transformation):
+    """ the indexed element, or a copy of it with the transformation expanded if the transformation is not None """
+    if isinstance(item, tuple):
+        e = item[0][item[1]]
+    elif transformation is None:
+        return item
+    else:
+        e = item.transform_copy(transformation)
+    if transformation is not None:
+        if isinstance(item, tuple):
+            e.transform(transformation)
+        e.expand_transform()
+    return e
+
+
+def __point_to_polyline_distance__(point, points, closed):
+    P = numpy.asarray(points, dtype = numpy.float64)
+    if len(P) == 1:
+        return numpy.hypot(P[0, 0] - point[0], P[0, 1] - point[1])
+    if closed:
+        Q = numpy.roll(P, -1, 0)
+    else:
+        Q = P[1:]
+        P = P[:-1]
+    D = Q - P
+    L2 = (D ** 2).sum(1)
+    X = numpy.array([point[0], point[1]]) - P
+    t = numpy.clip((X * D).sum(1) / numpy.where(L2 > 0.0, L2, 1.0), 0.0, 1.0)
+    return numpy.sqrt(((X - t[:, numpy.newaxis] * D) ** 2).sum(1).min())
+
+
+def __point_in_polygon__(point, points):
+    """ even-odd rule """
+    P = numpy.asarray(points, dtype = numpy.float64)
+    Q = numpy.roll(P, -1, 0)
+    x, y = point[0], point[1]
+    crosses = (P[:, 1] > y) != (Q[:, 1] > y)
+    dy = numpy.where(crosses, Q[:, 1] - P[:, 1], 1.0)
+    x_cross = P[:, 0] + (y - P[:, 1]) * (Q[:, 0] - P[:, 0]) / dy
+    return bool((crosses & (x < x_cross)).sum() % 2)
+
+
+def __element_distance__(element, point):
+    """ distance from a point to an element: to the outline of a Boundary (0 inside), to the center line of 
+        a Path minus half its line width, and to the bounding box of other elements """
+    if isinstance(element, (Boundary, Path)) and len(element.shape) > 0:
+        points = element.transformation.apply_to_array(numpy.array(element.shape.points, dtype = numpy.float64))
+        if isinstance(element, Boundary):
+            if len(points) > 2 and __point_in_polygon__(point, points):
+                return 0.0
+            return __point_to_polyline_distance__(point, points, True)
+        if element.absolute_line_width:
+            w = element.line_width
+        else:
+            w = element.transformation.apply_to_length(element.line_width)
+        return max(0.0, __point_to_polyline_distance__(point, points, element.shape.closed) - 0.5 * w)
+    box = __size_info_box__(element.size_info())
+    if box is None:
+        return numpy.inf
+    dx = max(box[0] - point[0], 0.0, point[0] - box[2])
+    dy = max(box[1] - point[1], 0.0, point[1] - box[3])
+    return numpy.hypot(dx, dy)
@@ -23,7 +23,7 @@ from .. import settings
 from ..geometry import transformable 
 
 from ipcore.properties.descriptor import RestrictedProperty, FunctionNameProperty, DefinitionProperty
-from ipcore.properties.predefined import StringProperty, TimeProperty, IdStringProperty
+from ipcore.properties.predefined import StringProperty, TimeProperty, IdStringProperty, RESTRICT_STRING
 from ipcore.properties.restrictions import RestrictType
 from ipcore.properties.initializer import StrongPropertyInitializer, MetaPropertyInitializer
 from ..technology.settings import TECH
@@ -33,8 +33,10 @@ from .group import __Group__
 from .elements.group import Group
 import time
 import copy
+import weakref
 from ipcore.mixin.mixin import MixinBowl
 from ipcore.types_list import TypedList
+from ipcore.caching.content import content_hash, property_content_key, ContentKeyException
 
 
 __all__ = ["Structure",
@@ -75,11 +77,24 @@ class MetaStructureCreator(MetaPropertyInitializer):
         # extract the name of the new structure based on the arguments of
         # the constructor. For default structures, the name is passed as the first argument
         S = super(MetaStructureCreator, cls).__call__(**kwargs)
+
+        # in a content addressed library, a structure with the same class and property values is the same structure
+        content = None
+        if lib.content_addressed_structures:
+            content = S.content_hash()
+            if not content is None:
+                libstr = lib.__fast_get_structure_by_content__(content)
+                if not libstr is None:
+                    del S
+                    return libstr
+
         name = S.name
         
         libstr = lib.__fast_get_structure__(name)
         if libstr is None:
             lib.__fast_add__(S)
+            if not content is None:
+                lib.__register_structure_content__(S, content)
             return S
         else:
             #libstr.set_bulk(**kwargs) # TODO: enable set_bulk in (Strong)PropertyInitializer
@@ -134,16 +149,30 @@ class __StructureHierarchy__(StrongPropertyInitializer):
         return not self.__eq__(other)    
     
     
+__SIZE_INFO_STACK__ = [] # structures which are computing their cached bounding box or convex hull
+__STRUCTURE_RENAMES__ = [0] # number of renamed structures: name indices of structure lists built before a rename are stale
+
+
+class __StructureNameProperty__(RestrictedProperty):
+    """ name of a structure, which counts the renames in __STRUCTURE_RENAMES__ """
+    def __set__(self, obj, value):
+        stored = obj.__store__.get(self.__name__, None)
+        if (stored is not None) and (stored[0] != value):
+            __STRUCTURE_RENAMES__[0] += 1
+        RestrictedProperty.__set__(self, obj, value)
+
+
 class Structure(UnitGridContainer, __StructureHierarchy__, MixinBowl):
     """Base class for a parametric cell"""
     
     __metaclass__ = MetaStructureCreator    
     __name_generator__ = TECH.ADMIN.NAME_GENERATOR    
+    __disk_cache_elements__ = True # elements can be stored in the persistent elements cache, if there is one
     created = TimeProperty(doc = "Timestamp when the structure was created (a floating point number expressed in seconds since the epoch, in UTC).")
     modified = TimeProperty(doc = "Timestamp when the structure was modified (a floating point number expressed in seconds since the epoch, in UTC).")
     comment = StringProperty(doc = "User comment string.", default = "")
     
-    name = StringProperty(doc = "The unique name of the structure")        
+    name = __StructureNameProperty__(restriction = RESTRICT_STRING, doc = "The unique name of the structure")        
     
     def __init__(self, name = None, elements = None, library = None,  **kwargs):        
         super(Structure, self).__init__(**kwargs)
@@ -176,9 +205,107 @@ class Structure(UnitGridContainer, __StructureHierarchy__, MixinBowl):
         
     def id_string(self):
         return self.name
+
+    def content_hash(self):
+        """ stable hash of the class and the externally set properties of the structure, 
+            or None if it cannot be determined for some property value """
+        try:
+            return content_hash(property_content_key(self))
+        except ContentKeyException:
+            return None
+
+    def __content_key__(self):
+        # as a property value, a structure is identified by its (unique) name
+        return self.name
     
     def __repr__(self):
         return "<%s '%s'>" % (self.__class__.__name__, self.name)
+
+    # cached bounding box, convex hull and spatial index
+    # The values are kept until a property of the structure (e.g. its elements) is set again. A structure
+    # which asks a child structure for its box while computing its own, registers itself as a parent of 
+    # the child, so that a change in the child also drops the cached boxes of the structures referring 
+    # to it. Elements which are modified in place (without assigning self.elements) are not noticed:
+    # call __clear_cached_values_in_store__() explicitly in that case.
+    __size_info__ = None
+    __convex_hull__ = None
+    __spatial_index__ = None
+
+    def size_info(self):
+        SI = self.__size_info__
+        if SI is None:
+            SI = self.__cached_geometry_value__(super(Structure, self).size_info)
+            self.__size_info__ = SI
+        else:
+            self.__register_size_parent__()
+        return SI + SI # a copy: size_info objects are modified in place by the callers
+
+    def convex_hull(self):
+        H = self.__convex_hull__
+        if H is None:
+            H = self.__cached_geometry_value__(super(Structure, self).convex_hull)
+            self.__convex_hull__ = H
+        else:
+            self.__register_size_parent__()
+        return copy.deepcopy(H)
+
+    def __get_spatial_index__(self):
+        I = self.__spatial_index__
+        if I is None:
+            from .spatial_index import StructureSpatialIndex
+            I = self.__cached_geometry_value__(lambda: StructureSpatialIndex(self))
+            self.__spatial_index__ = I
+        else:
+            self.__register_size_parent__()
+        return I
+
+    def elements_in_region(self, box, layers = None, depth = -1):
+        """ elements of which the bounding box overlaps box (a SizeInfo, Shape or list of points), optionally only 
+            on the given layers. The child structures are searched down to the given depth (-1 for all levels): 
+            their elements are returned as copies in the coordinates of this structure, and the references at the
+            maximum depth as an SRef for every placement which overlaps box. """
+        return self.__get_spatial_index__().elements_in_region(box, layers, depth)
+
+    def nearest_elements(self, point, n_o_elements = 1, layers = None, depth = -1):
+        """ the n_o_elements elements closest to point, closest first, searched as in elements_in_region """
+        return self.__get_spatial_index__().nearest_elements(point, n_o_elements, layers, depth)
+
+    def nearest_element(self, point, layers = None, depth = -1):
+        """ the element closest to point, or None if there are no elements """
+        E = self.nearest_elements(point, 1, layers, depth)
+        if len(E) == 0:
+            return None
+        return E[0]
+
+    def __cached_geometry_value__(self, function):
+        self.__register_size_parent__()
+        __SIZE_INFO_STACK__.append(self)
+        try:
+            return function()
+        finally:
+            __SIZE_INFO_STACK__.pop()
+
+    def __register_size_parent__(self):
+        if __SIZE_INFO_STACK__:
+            parent = __SIZE_INFO_STACK__[-1]
+            parents = self.__dict__.setdefault("__size_parents__", {})
+            if not id(parent) in parents:
+                parents[id(parent)] = weakref.ref(parent)
+
+    def __clear_size_info__(self):
+        if (self.__size_info__ is None) and (self.__convex_hull__ is None) and (self.__spatial_index__ is None):
+            return
+        self.__size_info__ = None
+        self.__convex_hull__ = None
+        self.__spatial_index__ = None
+        for r in self.__dict__.pop("__size_parents__", {}).values():
+            parent = r()
+            if not parent is None:
+                parent.__clear_size_info__()
+
+    def __clear_cached_values_in_store__(self, changed_property = None):
+        super(Structure, self).__clear_cached_values_in_store__(changed_property)
+        self.__clear_size_info__()
     
     
 
@@ -197,6 +324,8 @@ class StructureList(TypedList):
     """A list of Structure objects"""
     
     __item_type__ = Structure
+    __name_index__ = None   # name -> position of the first structure with that name, None when it needs rebuilding
+    __name_index_renames__ = 0 # value of __STRUCTURE_RENAMES__ when the name index was built
     
     def is_empty(self):
         if (len(self) == 0): return True
@@ -204,31 +333,109 @@ class StructureList(TypedList):
             if not e.is_empty(): return False
         return True
 
+    # name index: keeps the dictionary-like access routines below O(1)
+    def __get_name_index__(self):
+        index = self.__name_index__
+        if (index is None) or (self.__name_index_renames__ != __STRUCTURE_RENAMES__[0]):
+            # a structure may have been renamed after it was added to the list
+            self.__name_index_renames__ = __STRUCTURE_RENAMES__[0]
+            index = {}
+            for i, s in enumerate(list.__iter__(self)):
+                index.setdefault(s.name, i)
+            self.__name_index__ = index
+        return index
+
+    def __invalidate_name_index__(self):
+        self.__name_index__ = None
+
+    def __position_of_name__(self, name):
+        """ returns the position of the first structure with the given name, or -1 if there is none """
+        pos = self.__get_name_index__().get(name, -1)
+        if pos >= 0 and list.__getitem__(self, pos).name != name:
+            # the structure was renamed after it was added to the list
+            self.__invalidate_name_index__()
+            pos = self.__get_name_index__().get(name, -1)
+        return pos
+
+    def __append_indexed__(self, item):
+        index = self.__name_index__
+        if not index is None:
+            index.setdefault(item.name, len(self))
+        list.append(self, item)
+
+    def __fast_get__(self, name):
+        """ returns the structure with the given name, or None if it does not exist """
+        pos = self.__position_of_name__(name)
+        if pos < 0:
+            return None
+        return list.__getitem__(self, pos)
+
     # overload acces routines to get dictionary behaviour but without using the name as primary key
     def __getitem__(self, key):
         if isinstance(key, str):
-            for i in self:
-                if i.name == key: return i
-            raise IndexError("Structure " + key + " cannot be found in StructureList.")
+            pos = self.__position_of_name__(key)
+            if pos < 0:
+                raise IndexError("Structure " + key + " cannot be found in StructureList.")
+            return list.__getitem__(self, pos)
         else:
             return list.__getitem__(self,key)
 
     def __setitem__(self, key, value):
         if isinstance(key, str):
-            for i in range(0, len(self)):
-                if self[i].name == key: return list.__setitem__(self, i, value)
-            list.append(self, value)
+            pos = self.__position_of_name__(key)
+            if pos < 0:
+                self.__append_indexed__(value)
+            else:
+                list.__setitem__(self, pos, value)
+                if value.name != key:
+                    self.__invalidate_name_index__()
         else:
-            return list.__setitem__(self,key, value)
+            list.__setitem__(self,key, value)
+            self.__invalidate_name_index__()
 
     def __delitem__(self, key):
         if isinstance(key, str):
-            for i in range(0, len(self)):
-                if self[i].name == key: return list.__delitem__(self,i)
+            pos = self.__position_of_name__(key)
+            if pos < 0:
                 return
-            return list.__delitem__(self,key)
+            list.__delitem__(self, pos)
         else:
-            return list.__delitem__(self,key)
+            list.__delitem__(self,key)
+        self.__invalidate_name_index__()
+
+    def __setslice__(self, i, j, sequence):
+        list.__setslice__(self, i, j, sequence)
+        self.__invalidate_name_index__()
+
+    def __delslice__(self, i, j):
+        list.__delslice__(self, i, j)
+        self.__invalidate_name_index__()
+
+    def insert(self, i, item):
+        list.insert(self, i, item)
+        self.__invalidate_name_index__()
+
+    def pop(self, *args):
+        item = list.pop(self, *args)
+        self.__invalidate_name_index__()
+        return item
+
+    def remove(self, item):
+        list.remove(self, item)
+        self.__invalidate_name_index__()
+
+    def sort(self, *args, **kwargs):
+        list.sort(self, *args, **kwargs)
+        self.__invalidate_name_index__()
+
+    def reverse(self):
+        list.reverse(self)
+        self.__invalidate_name_index__()
+
+    def __imul__(self, n):
+        list.__imul__(self, n)
+        self.__invalidate_name_index__()
+        return self
 
     def __contains__(self, item):
         if isinstance(item, Structure):
@@ -236,30 +443,30 @@ class StructureList(TypedList):
         else:
             name = item
         if isinstance(name, str):
-            for i in self:
-                if i.name == name: return True
-            return False
+            return self.__position_of_name__(name) >= 0
         else:
             return list.__contains__(self,item)
         
     def __fast_contains__(self, name):
-        for i in self:
-            if i.name == name: return True
-        return False
+        return self.__position_of_name__(name) >= 0
         
 
     def index(self, item):
         if isinstance(item, str):
-            for i in range(0, len(self)):
-                if list.__getitem__(self, i).name == item:
-                    return i
-            raise ValueError("Structure " + item + " is not in StructureList")
+            pos = self.__position_of_name__(item)
+            if pos < 0:
+                raise ValueError("Structure " + item + " is not in StructureList")
+            return pos
         else:
-            list.index(self, item)
+            if isinstance(item, Structure):
+                pos = self.__position_of_name__(item.name)
+                if pos >= 0 and list.__getitem__(self, pos) is item:
+                    return pos
+            return list.index(self, item)
 
     def __fast_add__(self, new_str):
         """adds a structure wthout checking if it already exists for library and object creation only"""
-        list.append(self, new_str)
+        self.__append_indexed__(new_str)
             
     def add(self, item, overwrite = False):
         if item == None:
@@ -269,7 +476,7 @@ class StructureList(TypedList):
                 self[item.name] = item
                 return
             elif not self.__fast_contains__(item.name):
-                list.append(self, item)
+                self.__append_indexed__(item)
         elif isinstance(item, StructureList) or isinstance(item, list) or isinstance(item, set):
             for s in item:
                 self.add(s, overwrite)
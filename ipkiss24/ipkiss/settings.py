@@ -34,6 +34,7 @@ global Default_Library
 Default_Library = None
 __Ipkiss_Current_Library = None
 __Ipkiss_Layer_List = None
+__Ipkiss_Elements_Disk_Cache = None
 
 #----------------------------------------------------------------------------
 #Set library and output
@@ -66,6 +67,15 @@ def clear_current_library():
     if clib != None:
         clib.clear()
 
+def get_elements_disk_cache():
+    """Return the persistent cache for the elements of structures, or None if there is none."""
+    return __Ipkiss_Elements_Disk_Cache
+
+def set_elements_disk_cache(cache):
+    """Sets the persistent cache for the elements of structures (None to disable it)."""
+    global __Ipkiss_Elements_Disk_Cache
+    __Ipkiss_Elements_Disk_Cache = cache
+
 def get_current_layerlist():
     """Retrieve the list of all layers that were created in Ipkiss."""
     k = __Ipkiss_Layer_List
@@ -24,6 +24,8 @@ from ipcore.all import *
 from ..material.material import MaterialProperty, Material
 from ..environment import EnvironmentProperty, DEFAULT_ENVIRONMENT
 from ipkiss.geometry.size_info import SizeInfoProperty
+from ipkiss.geometry.coord import Coord2, Coord3
+import numpy
 
 __all__ = ["GeometryProperty","CartesianGeometry1D","CartesianGeometry2D","CartesianGeometry3D"]
 
@@ -32,6 +34,20 @@ __all__ = ["GeometryProperty","CartesianGeometry1D","CartesianGeometry2D","Carte
 # These geometries returns a material at a given point
 
 
+def __coordinates_array__(coordinates):
+    """ converts a list of coordinates (Coord2, Coord3, tuples or scalars) into a float array, with one row per coordinate """
+    if isinstance(coordinates, numpy.ndarray):
+        return numpy.asarray(coordinates, dtype = numpy.float64)
+    return numpy.array([tuple(c) if isinstance(c, (Coord2, Coord3)) else c for c in coordinates], dtype = numpy.float64)
+
+def __object_array__(items):
+    """ a 1D numpy array of objects (materials, material stacks), which are not unpacked if they are sequences """
+    A = numpy.empty((len(items),), dtype = object)
+    for i, item in enumerate(items):
+        A[i] = item
+    return A
+
+
 class __Geometry__(StrongPropertyInitializer):
     name = StringProperty(allow_none = True)
     
@@ -39,6 +55,11 @@ class __Geometry__(StrongPropertyInitializer):
     def get_material(self, coordinate):
         raise AssertionError, "__Geometry__ instance or subclass should have material(self, coordinate) method"
 
+    def get_materials(self, coordinates):
+        """ returns an array with the material at each of the coordinates. 
+            Subclasses override this to evaluate the whole array at once """
+        return __object_array__([self.get_material(c) for c in coordinates])
+
     def get_environment(self, coordinate):
         raise AssertionError, "__Geometry__ instance or subclass should have environment(self, coordinate) method"
 
@@ -95,6 +116,11 @@ class __UniformMaterialGeometry__(__Geometry__):
     def get_material(self, coordinate):
         return self.material
 
+    def get_materials(self, coordinates):
+        M = numpy.empty((len(coordinates),), dtype = object)
+        M.fill(self.material)
+        return M
+
 class __UniformEnvironmentGeometry__(__Geometry__):
     environment = EnvironmentProperty(default = DEFAULT_ENVIRONMENT)
     
@@ -21,13 +21,27 @@
 
 from ipkiss.all import *
 from .geometry import __Geometry2D__, __UniformEnvironmentGeometry__
+from .geometry import __coordinates_array__, __object_array__
 from ..material.material import MaterialProperty, DEFAULT_MATERIAL
+import numpy
 
 try:
     from dependencies.pil_wrapper.PIL import Image
 except:
     raise AssertionError("PIL must be installed to use geometry.image")
 
+def __pixel_indices__(coordinates, grid, array_shape):
+    """ the indices (X, Y) of the pixels of an array with a given grid at the coordinates. Coordinates 
+        up to one pixel over the border are clipped to the last pixel: some engines will request the material 1 step
+        over the border of the simulation volume """
+    C = __coordinates_array__(coordinates).reshape(-1, 2)
+    X = numpy.minimum((C[:, 0] / grid).astype(int), array_shape[0] - 1)
+    Y = numpy.minimum((C[:, 1] / grid).astype(int), array_shape[1] - 1)
+    if numpy.any(X < -array_shape[0]) or numpy.any(Y < -array_shape[1]):
+        raise IndexError("coordinate outside the geometry: cannot retreive material")
+    return (X % array_shape[0], Y % array_shape[1])
+
+
 class __ImageGeometry2D__(__Geometry2D__):
     center = Coord2Property(required = True)
     size = Size2Property(required = True)
@@ -93,21 +107,14 @@ class __LayerSuperpositionMaterialGeometry2D__(__ImageGeometry2D__):
         
     def get_material(self, coordinate):
         """ at a given coordinate, return the material """
-        pixel_coord = (int(coordinate[0]/self.grid), int(coordinate[1]/self.grid))  
-        try:
-            layers_at_coordinate = self.layer_superposition_array[pixel_coord[0], pixel_coord[1]]
-        except IndexError, e: #some engines will request the material 1 step over the border of the simulation volume
-            if (pixel_coord[0] >= self.len_0):
-                X = self.len_0 - 1
-            else:
-                X = pixel_coord[0]
-            if (pixel_coord[1] >= self.len_1):
-                Y = self.len_1 - 1
-            else:
-                Y = pixel_coord[1]                
-            layers_at_coordinate = self.layer_superposition_array[X,Y]
-        mat = self.__layers_to_material(layers_at_coordinate)
-        return mat
+        return self.get_materials([coordinate])[0]
+
+    def get_materials(self, coordinates):
+        """ returns an array with the material at each of the coordinates. The material is looked up only once for every pixel """
+        X, Y = __pixel_indices__(coordinates, self.grid, (self.len_0, self.len_1))
+        pixels, inverse = numpy.unique(X * self.len_1 + Y, return_inverse = True)
+        materials = [self.__layers_to_material(self.layer_superposition_array[p // self.len_1, p % self.len_1]) for p in pixels]
+        return __object_array__(materials)[inverse]
     
     
     
@@ -125,6 +132,8 @@ class __ProcessSuperpositionMaterialGeometry2D__(__ImageGeometry2D__):
         self.processes.sort()
         self.len_0 = self.process_flags[self.processes[0]].shape[0]
         self.len_1 = self.process_flags[self.processes[0]].shape[1]
+        self.__process_codes = None
+        self.__material_table = dict()
         
     def __processes_to_material(self, processes):
         """ For a given combination of processes (list or tuple), return the corresponding material"""
@@ -136,31 +145,35 @@ class __ProcessSuperpositionMaterialGeometry2D__(__ImageGeometry2D__):
             raise IpkissException("The following superposition of prcoesses does not have a corresponding material : %s"%p)
         return mat
     
-    def __processes_at_coordinate(self, coord):
-        processes_at_coordinate = []
-        for process in self.processes:
-            process_active_at_coord = self.process_flags[process][coord[0], coord[1]]
-            if process_active_at_coord:
-                processes_at_coordinate.append(process)        
-        return processes_at_coordinate
-        
+    def __get_process_codes(self):
+        """ an integer array with in every point of the grid a bitmask of the processes which are active in that point:
+            bit i is set if self.processes[i] is active """
+        if self.__process_codes is None:
+            if len(self.processes) > 62:
+                from ipkiss.exceptions.exc import IpkissException
+                raise IpkissException("Too many processes (%d) to encode the superposition of processes in a bitmask" % len(self.processes))
+            codes = numpy.zeros((self.len_0, self.len_1), dtype = numpy.int64)
+            for i, process in enumerate(self.processes):
+                codes |= (numpy.asarray(self.process_flags[process]) != 0).astype(numpy.int64) << i
+            self.__process_codes = codes
+        return self.__process_codes
+
+    def __code_to_material(self, code):
+        """ the material for a bitmask of processes, from a lookup table which is filled as the bitmasks are encountered """
+        if not code in self.__material_table:
+            processes = [p for i, p in enumerate(self.processes) if (code >> i) & 1]
+            self.__material_table[code] = self.__processes_to_material(processes)
+        return self.__material_table[code]
+
     def get_material(self, coordinate):
         """ at a given coordinate, return the material """
-        pixel_coord = (int(coordinate[0]/self.grid), int(coordinate[1]/self.grid))  
-        try:
-            processes_at_coordinate = self.__processes_at_coordinate(pixel_coord)                    
-        except IndexError, e: #some engines will request the material 1 step over the border of the simulation volume
-            if (pixel_coord[0] >= self.len_0):
-                X = self.len_0 - 1
-            else:
-                X = pixel_coord[0]
-            if (pixel_coord[1] >= self.len_1):
-                Y = self.len_1 - 1
-            else:
-                Y = pixel_coord[1]                
-            processes_at_coordinate = self.__processes_at_coordinate(Coord2(X,Y))                    
-        mat = self.__processes_to_material(processes_at_coordinate)
-        return mat
+        return self.get_materials([coordinate])[0]
+
+    def get_materials(self, coordinates):
+        """ returns an array with the material at each of the coordinates """
+        X, Y = __pixel_indices__(coordinates, self.grid, (self.len_0, self.len_1))
+        codes, inverse = numpy.unique(self.__get_process_codes()[X, Y], return_inverse = True)
+        return __object_array__([self.__code_to_material(int(c)) for c in codes])[inverse]
         
     
                 
@@ -20,9 +20,11 @@
 # Contact: ipkiss@intec.ugent.be
 
 from .geometry import CartesianGeometry1D, CartesianGeometry2D, CartesianGeometry3D
+from .geometry import __coordinates_array__, __object_array__
 from ipcore.all import *
 from ipkiss.all import SizeInfo
 from ipkiss.all import Coord3
+import numpy
 
 __all__ = ["MaterialStackGeometry1D",
            "MaterialStackGeometry2D",
@@ -38,20 +40,24 @@ class MaterialStackGeometry1D(CartesianGeometry1D):
     thickness = LockedProperty()
     
     def get_material(self, coordinate):
-        # slow
         if isinstance(coordinate, (Coord3, tuple)):
             c = coordinate[2] # z-component
         else: 
             c = coordinate # scalar
-        if c < self.origin_z or c > self.origin_z + self.thickness:
-            raise AttributeError("coordinate %f is outside the Geometry: cannot retreive material" % c)
-        
-        z = self.origin_z
-        for m, t in self.materials_thicknesses:
-            z += t
-            if c < z: 
-                break
-        return m
+        return self.get_materials([c])[0]
+
+    def get_materials(self, coordinates):
+        """ returns an array with the material at each of the coordinates (Coord3 objects or z values) """
+        C = __coordinates_array__(coordinates)
+        if C.ndim > 1:
+            C = C[:, 2] # z-component
+        outside = (C < self.origin_z) | (C > self.origin_z + self.thickness)
+        if numpy.any(outside):
+            raise AttributeError("coordinate %f is outside the Geometry: cannot retreive material" % C[outside][0])
+        # top of each layer, accumulated in the same order as the layers are stacked
+        tops = numpy.cumsum([self.origin_z] + [t for m, t in self.materials_thicknesses])[1:]
+        layer_index = numpy.minimum(numpy.searchsorted(tops, C, "right"), len(tops) - 1)
+        return __object_array__([m for m, t in self.materials_thicknesses])[layer_index]
         
     def define_size_info(self):
         return SizeInfo(east = 0.0, west = 0.0, 
@@ -139,25 +145,28 @@ class MaterialStackGeometry2D(CartesianGeometry2D):
     size_info = LockedProperty()
     
     def get_material_stack(self, coordinate):
-        # slow
         if not isinstance(coordinate, (Coord3, tuple)):
             raise AttributeError("coordinate should be a Coord3 object or tuple to retreive material from geometry")
-        cx, cz = coordinate[0], coordinate[2]
-        if cx < self.origin_x or cx > self.origin_x + self.width:
-            raise AttributeError("coordinate %f is outside the Geometry: cannot retreive material" % c)
-        
-        x = self.origin_x
-        for s, w in self.stacks_widths:
-            x += w
-            if cx < x: 
-                break
-        return s
+        return self.get_material_stacks([coordinate])[0]
+
+    def get_material_stacks(self, coordinates):
+        """ returns an array with the material stack at each of the coordinates """
+        C = __coordinates_array__(coordinates)
+        cx = C[:, 0]
+        outside = (cx < self.origin_x) | (cx > self.origin_x + self.width)
+        if numpy.any(outside):
+            raise AttributeError("coordinate %f is outside the Geometry: cannot retreive material" % cx[outside][0])
+        rights = numpy.cumsum([self.origin_x] + [w for s, w in self.stacks_widths])[1:]
+        stack_index = numpy.minimum(numpy.searchsorted(rights, cx, "right"), len(rights) - 1)
+        return __object_array__([s for s, w in self.stacks_widths])[stack_index]
 
     def get_material(self, coordinate):
-        # slow
         m = self.get_material_stack(coordinate)
         return m
 
+    def get_materials(self, coordinates):
+        return self.get_material_stacks(coordinates)
+
     def size_info(self):
         return SizeInfo(west = self.origin_x, 
                         east = self.origin_x + self.width,
@@ -229,28 +238,48 @@ class MaterialStackGeometry3D(CartesianGeometry3D):
     
     def get_material_stack(self, coordinate):
         """ retrieves the material stack at a given coordinate """
-        # reverse iteration
-        c = (coordinate[0], coordinate[1])
-        for s, m in self.shapes_stacks:
-            if s.encloses(c, True):
-                return m
-        return self.background_stack
-    
+        return self.get_material_stacks([(coordinate[0], coordinate[1])])[0]
+
+    def __stacks(self):
+        """ the material stacks of the shapes, followed by the background stack """
+        return [m for s, m in self.shapes_stacks] + [self.background_stack]
+
+    def __stack_indices(self, coordinates):
+        """ index in __stacks() of the first shape which encloses each of the (x, y) coordinates, or of the background stack """
+        n = len(self.shapes_stacks)
+        indices = numpy.empty((len(coordinates),), dtype = int)
+        indices.fill(n)
+        for i, (s, m) in enumerate(self.shapes_stacks):
+            todo = numpy.flatnonzero(indices == n)
+            if len(todo) == 0:
+                break
+            indices[todo[s.encloses_points(coordinates[todo], True)]] = i
+        return indices
+
+    def get_material_stacks(self, coordinates):
+        """ returns an array with the material stack at each of the coordinates """
+        C = __coordinates_array__(coordinates)
+        return __object_array__(self.__stacks())[self.__stack_indices(C[:, 0:2])]
+
     def get_material(self, coordinate):
         """ retrieves the material at a given coordinate """
-        # slow
         if not isinstance(coordinate, (Coord3, tuple)):
             raise AttributeError("coordinate should be a Coord3 object or tuple to retreive material from geometry")
-        #cx, cz = coordinate[0], coordinate[2]
-        #if cx < self.origin_x or cx > self.origin_x + self.width:
-            #raise AttributeError("coordinate %f is outside the Geometry: cannot retreive material" % c)
-        
-        # reverse iteration
-        m = self.get_material_stack(coordinate)
-        if cz >= m.origin_z and cz <= m.origin_z + m.thickness:
-            return m.get_material(cz)
-        else:
-            return self.background_material
+        return self.get_materials([coordinate])[0]
+
+    def get_materials(self, coordinates):
+        """ returns an array with the material at each of the coordinates: the material of the stack at (x, y) 
+            at height z, or the background material outside the stack """
+        C = __coordinates_array__(coordinates)
+        cz = C[:, 2]
+        indices = self.__stack_indices(C[:, 0:2])
+        result = numpy.empty((len(C),), dtype = object)
+        result.fill(self.background_material)
+        for i, m in enumerate(self.__stacks()):
+            in_stack = numpy.flatnonzero((indices == i) & (cz >= m.origin_z) & (cz <= m.origin_z + m.thickness))
+            if len(in_stack):
+                result[in_stack] = m.get_materials(cz[in_stack])
+        return result
 
     def size_info(self):
         return SizeInfo(west = self.origin_x, 
@@ -38,6 +38,7 @@ from pysics.basics.environment import DEFAULT_ENVIRONMENT
 from ipkiss.plugins.photonics.wg.basic import WgElDefinition
 from ipkiss.technology.technology import *
 import cPickle
+import numpy
 from math import cos, sin, pi
 from pysimul.log import PYSIMUL_LOG as LOG
 import logging
@@ -151,25 +152,56 @@ class StructureSimulationVolume2D(__StructureSimulationVolume__, SimulationVolum
             return window_height
 
 
-    def get_material_dataset_for_subset(self, corner, width, height, angle = 0):
+    def __rotated_window_pixels__(self, corner, w_range, h_range, angle, n_o_subsamples = 1):
+        """ indices (X, Y) in the material array of the geometry of the sample points of a window which is rotated 
+            over angle around its corner. Pixel (w, h) of the window is sampled in n_o_subsamples x n_o_subsamples points 
+            on a regular grid in the pixel, so the arrays have shape (len(w_range), len(h_range), n_o_subsamples**2) """
+        total_resolution = self.get_total_resolution()
+        if angle % 90.0 == 0.0:
+            # exact directions, so that windows which are aligned with the grid sample whole pixels
+            c, s = [(1.0, 0.0), (0.0, 1.0), (-1.0, 0.0), (0.0, -1.0)][int(angle / 90.0)]
+        else:
+            c, s = cos(angle * DEG2RAD), sin(angle * DEG2RAD)
+        offsets = (numpy.arange(n_o_subsamples) + 0.5) / n_o_subsamples
+        W = (w_range.reshape(-1, 1, 1, 1) + offsets.reshape(1, 1, -1, 1)).reshape(len(w_range), 1, -1)
+        H = (h_range.reshape(1, -1, 1, 1) + offsets.reshape(1, 1, 1, -1)).reshape(1, len(h_range), -1)
+        # one affine transformation from window pixel units to pixel units of the material array
+        ref_point = corner - self.geometry.size_info.south_west
+        ref_point = (ref_point[0] * total_resolution, ref_point[1] * total_resolution)
+        material_array = self.geometry.get_material_array()
+        # some samples fall over the border of the array when the window is rotated: these take the border value
+        X = numpy.clip(numpy.floor(ref_point[0] + W * c - H * s).astype(int), 0, material_array.shape[0] - 1)
+        Y = numpy.clip(numpy.floor(ref_point[1] + W * s + H * c).astype(int), 0, material_array.shape[1] - 1)
+        return (X, Y)
+
+    def get_material_dataset_for_subset(self, corner, width, height, angle = 0, sampling = "nearest"):
+        """ the material stack ids in a window with its south west corner at corner, rotated over angle around that corner.
+            The result has the integer type of the material array of the geometry: use get_material_palette to look up the 
+            material stacks. For rotated windows, every pixel takes the material at its center (sampling = "nearest"), or the
+            material which covers the largest part of the pixel (sampling = "area") """
+        if not sampling in ["nearest", "area"]:
+            raise PythonSimulateException("Invalid sampling method '%s' for the material dataset: should be 'nearest' or 'area'." % sampling)
         angle = angle % 360.0
-        H = do_hash("%s-%f-%f-%f"%(str(corner),width,height,angle))
-        #cache already requested datasets in a dictionary attribute
+        #cache already requested datasets in a dictionary attribute, on the exact values of the window
+        H = (float(corner[0]), float(corner[1]), float(width), float(height), angle, sampling)
         total_resolution = self.get_total_resolution()
         if not (H in self.material_dataset_dict):
             corner = Coord2(corner[0], corner[1])
-            w_range = numpy.arange(0, numpy.ceil(width*total_resolution))
-            h_range = numpy.arange(0, numpy.ceil(height*total_resolution))
+            w_range = numpy.arange(0, int(numpy.ceil(width*total_resolution)))
+            h_range = numpy.arange(0, int(numpy.ceil(height*total_resolution)))
             LOG.debug("Creating the material matrix with resolution of %i : %i x %i elements." %(total_resolution, len(w_range), len(h_range)))
-            mat = numpy.zeros([len(w_range), len(h_range)], Material)
             if (angle != 0):
-                for w in w_range:
-                    delta_w = float(w) / total_resolution
-                    current_corner = corner.move_polar_copy(delta_w, angle)
-                    for h in h_range:
-                        delta_h = float(h) / total_resolution
-                        point = current_corner.move_polar_copy(delta_h, angle+90)
-                        mat[w,h] = self.geometry.get_material(point)
+                full_material_array = self.geometry.get_material_array()
+                if sampling == "nearest":
+                    (X, Y) = self.__rotated_window_pixels__(corner, w_range, h_range, angle)
+                    mat = full_material_array[X[:, :, 0], Y[:, :, 0]]
+                else:
+                    (X, Y) = self.__rotated_window_pixels__(corner, w_range, h_range, angle, n_o_subsamples = 4)
+                    samples = full_material_array[X, Y]
+                    # majority vote of the subsamples in every pixel
+                    ids = numpy.unique(samples)
+                    counts = numpy.array([(samples == i).sum(axis = 2) for i in ids])
+                    mat = ids[numpy.argmax(counts, axis = 0)]
                 self.material_dataset_dict[H] = mat
             else:
                 #faster implementation for the special case where angle == 0
@@ -185,6 +217,11 @@ class StructureSimulationVolume2D(__StructureSimulationVolume__, SimulationVolum
                 self.material_dataset_dict[H] = mat
         return self.material_dataset_dict[H]
 
+    def get_material_palette(self, material_dataset):
+        """ dictionary with the material stack for each of the material stack ids in the material dataset """
+        factory = self.geometry.material_stack_factory
+        return dict([(i, factory[i]) for i in numpy.unique(material_dataset).tolist()])
+
     def get_material_array(self):
         return self.get_material_dataset_window()
 
@@ -0,0 +1,59 @@
+# IPKISS - Parametric Design Framework
+# Copyright (C) 2002-2012  Ghent University - imec
+# 
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 2
+# of the License, or (at your option) any later version.
+# 
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+# 
+# i-depot BBIE 7396, 7556, 7748
+# 
+# Contact: ipkiss@intec.ugent.be
+
+
+# Scaling benchmark of flattening an ARef of a photonic crystal hole.
+# The points of all the copies of the hole are calculated in one array operation
+# (packed_flat_copy); the Boundary elements are only created by flat_copy.
+
+from ipkiss.all import *
+import sys
+import time
+
+def benchmark(n):
+    hole = Structure(name = "PHC_HOLE_%d" % n, elements = [Circle(Layer(1), (0.0, 0.0), 0.15, angle_step = 30.0)])
+    crystal = Structure(name = "PHC_%d" % n, elements = [ARef(hole, (0.0, 0.0), (0.5, 0.5), (n, n))])
+
+    t0 = time.time()
+    packed = crystal.elements[0].packed_flat_copy()
+    n_o_points = sum([p.points.size for p in packed.packed]) / 2
+    t_packed = time.time() - t0
+
+    if n * n <= 10 ** 5:
+        t0 = time.time()
+        crystal.elements.flat_copy()
+        t_flat = time.time() - t0
+    else:
+        t_flat = None
+    return n_o_points, t_packed, t_flat
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        sizes = [int(a) for a in sys.argv[1:]]
+    else:
+        sizes = [10, 100, 300, 1000]
+    print "%12s %12s %16s %16s" % ("instances", "points", "packed", "flat_copy")
+    for n in sizes:
+        n_o_points, t_packed, t_flat = benchmark(n)
+        if t_flat is None:
+            print "%12d %12d %14.3f s %16s" % (n * n, n_o_points, t_packed, "-")
+        else:
+            print "%12d %12d %14.3f s %14.3f s" % (n * n, n_o_points, t_packed, t_flat)
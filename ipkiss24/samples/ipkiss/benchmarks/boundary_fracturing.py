@@ -0,0 +1,90 @@
+# IPKISS - Parametric Design Framework
+# Copyright (C) 2002-2012  Ghent University - imec
+# 
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 2
+# of the License, or (at your option) any later version.
+# 
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+# 
+# i-depot BBIE 7396, 7556, 7748
+# 
+# Contact: ipkiss@intec.ugent.be
+
+# Benchmark of the cutting of boundaries with too many vertices for GDSII output: the lines of a 
+# focusing grating (annular sectors), the boundary of a spiral waveguide and a disk with a hole which is
+# joined to the outer ring through a zero-width slit (keyhole). Each boundary is cut in slabs with at 
+# most max_vertex_count vertices per piece. The pieces are checked: every piece is a valid polygon with
+# at most max_vertex_count vertices, and together they cover the original boundary.
+
+from technologies.si_photonics.picazzo.default import *
+from ipkiss.all import *
+from ipkiss.primitives.filters.boundary_cut_filter import BoundaryCutFilter
+from dependencies.shapely_wrapper import Polygon, cascaded_union
+import numpy
+import sys
+import time
+
+def grating_line(n_o_points, radius = 50.0, width = 0.3, angle = 120.0):
+    t = numpy.linspace(-0.5 * angle, 0.5 * angle, n_o_points / 2) * DEG2RAD
+    outer = numpy.column_stack(((radius + width) * numpy.cos(t), (radius + width) * numpy.sin(t)))
+    inner = numpy.column_stack((radius * numpy.cos(t), radius * numpy.sin(t)))[::-1]
+    return Shape(numpy.vstack((outer, inner)), closed = True)
+
+def spiral_boundary(n_o_points, n_o_turns = 5, pitch = 5.0, width = 0.45):
+    t = numpy.linspace(0.0, 2 * numpy.pi * n_o_turns, n_o_points / 2)
+    r = 10.0 + pitch * t / (2 * numpy.pi)
+    centerline = Shape(numpy.column_stack((r * numpy.cos(t), r * numpy.sin(t))))
+    return Shape(ShapePath(original_shape = centerline, path_width = width).points, closed = True)
+
+def keyhole(n_o_points, outer_radius = 10.0, inner_radius = 5.0):
+    t = numpy.linspace(0.0, 2 * numpy.pi, n_o_points / 2 - 1)
+    # outer ring counterclockwise, then through the slit along the positive x axis to the hole, clockwise
+    outer = numpy.column_stack((outer_radius * numpy.cos(t), outer_radius * numpy.sin(t)))
+    inner = numpy.column_stack((inner_radius * numpy.cos(t), inner_radius * numpy.sin(t)))[::-1]
+    return Shape(numpy.vstack((outer, inner)), closed = True)
+
+def polygon_area(points):
+    x, y = points[:, 0], points[:, 1]
+    return 0.5 * abs(numpy.dot(x, numpy.roll(y, -1)) - numpy.dot(y, numpy.roll(x, -1)))
+
+def check_pieces(shape, pieces, max_vertex_count):
+    """ checks that the pieces are valid polygons with at most max_vertex_count vertices, which cover the shape 
+        without overlapping: the area of their union and their total area equal the area of the shape """
+    polygons = []
+    for p in pieces:
+        assert len(p.shape) <= max_vertex_count, "piece with %d vertices" % len(p.shape)
+        polygons.append(Polygon(p.shape.points))
+        assert polygons[-1].is_valid, "invalid piece"
+    area = polygon_area(shape.points)
+    for (what, a) in [("total area", sum([P.area for P in polygons])), ("area of the union", cascaded_union(polygons).area)]:
+        assert abs(a - area) < 1e-6 * area, "%s of the pieces %f differs from the area of the boundary %f" % (what, a, area)
+
+def timed(f):
+    t0 = time.time()
+    result = f()
+    return result, time.time() - t0
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        sizes = [int(a) for a in sys.argv[1:]]
+    else:
+        sizes = [10000, 100000, 1000000]
+    F = BoundaryCutFilter(max_vertex_count = 4000)
+    # the number of turns of the spiral grows with the number of vertices, to keep a fixed point density
+    for name, shape_function in [("grating line", grating_line), 
+                                 ("spiral", lambda n: spiral_boundary(n, n_o_turns = max(5, n / 20000))),
+                                 ("keyhole", keyhole)]:
+        for n in sizes:
+            B = Boundary(Layer(0), shape_function(n))
+            pieces, t = timed(lambda: F(B))
+            check_pieces(B.shape, pieces, F.max_vertex_count)
+            print "%12s %8d vertices: %5d pieces, at most %d vertices, %.3f s" % (name, len(B.shape), len(pieces), max([len(p.shape) for p in pieces]), t)
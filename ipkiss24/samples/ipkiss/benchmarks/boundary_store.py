@@ -0,0 +1,119 @@
+# IPKISS - Parametric Design Framework
+# Copyright (C) 2002-2012  Ghent University - imec
+# 
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 2
+# of the License, or (at your option) any later version.
+# 
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+# 
+# i-depot BBIE 7396, 7556, 7748
+# 
+# Contact: ipkiss@intec.ugent.be
+
+
+# Memory and time of flattening a photonic crystal into Boundary elements or into
+# a BoundaryStore, and of writing the flattened structure to GDSII.
+# Every run is done in a separate process, so the peak memory can be compared.
+# Before the runs, a store with explicit datatypes is checked to round-trip through
+# its Boundary elements.
+
+from ipkiss.all import *
+from ipkiss.io.output_gdsii import FileOutputGdsii, MemoryOutputGdsii
+from ipkiss.io import gds_records
+import numpy
+import resource
+import struct
+import subprocess
+import sys
+import time
+
+def benchmark(n, store):
+    hole = Structure(name = "PHC_HOLE", elements = [Circle(Layer(1), (0.0, 0.0), 0.15, angle_step = 30.0)])
+    crystal = Structure(name = "PHC", elements = [ARef(hole, (0.0, 0.0), (0.5, 0.5), (n, n))])
+    m0 = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    t0 = time.time()
+    elements = crystal.elements.flat_copy(store = store)
+    t_flat = time.time() - t0
+    memory = (resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - m0) / 1024.0
+
+    library = Library(name = "BENCHMARK")
+    Structure(name = "PHC_FLAT", elements = elements, library = library)
+    t0 = time.time()
+    FileOutputGdsii("boundary_store_benchmark.gds", binary = True).write(library)
+    t_write = time.time() - t0
+    return memory, t_flat, t_write
+
+def structure_records(gds):
+    """ the records of every structure in a GDSII stream, without its header """
+    structures = dict()
+    name = None
+    i = 0
+    while i < len(gds):
+        (length, record_type) = struct.unpack(">HH", gds[i:i + 4])
+        record = gds[i:i + length]
+        if record_type == gds_records.StrName:
+            name = record[4:].rstrip("\0")
+            structures[name] = []
+        elif record_type == gds_records.EndStr:
+            name = None
+        elif record_type != gds_records.BgnStr and name is not None:
+            structures[name].append(record)
+        i += length
+    return structures
+
+def check_datatypes():
+    """ a store with explicit datatypes keeps them through __getitem__, through a new store
+        filled with its elements, and in the GDSII output of its elements """
+    square = numpy.array([(0.0, 0.0), (1.0, 0.0), (1.0, 1.0), (0.0, 1.0)])
+    store = BoundaryStore()
+    store.add_points(Layer(1), [square, square + (2.0, 0.0)])
+    store.add_points(Layer(1), [square + (0.0, 2.0)], datatype = 3)
+    store.add_points(Layer(2), [square + (2.0, 2.0)], datatype = 0)
+    datatypes = [-1, -1, 3, 0]
+    for i, boundary in enumerate(store):
+        if datatypes[i] < 0:
+            assert boundary.layer is store.layers[store.layer_ids[i]]
+        else:
+            assert isinstance(boundary.layer, DatatypeLayer)
+            assert boundary.layer.layer is store.layers[store.layer_ids[i]]
+            assert boundary.layer.datatype == datatypes[i]
+        assert numpy.all(boundary.shape.points == store.points(i))
+
+    copy = BoundaryStore().extend(store.elements())
+    assert copy.layers == store.layers
+    assert numpy.all(copy.layer_ids == store.layer_ids)
+    assert numpy.all(copy.datatypes == store.datatypes)
+    assert numpy.all(copy.coordinates == store.coordinates)
+
+    library = Library(name = "DATATYPES")
+    Structure(name = "STORE", elements = [store], library = library)
+    Structure(name = "ELEMENTS", elements = store.elements(), library = library)
+    records = structure_records(MemoryOutputGdsii(binary = True).write(library).getvalue())
+    assert records["STORE"] == records["ELEMENTS"]
+    assert records["STORE"].count(struct.pack(">HHh", 6, gds_records.DataType, 3)) == 1
+
+if __name__ == "__main__":
+    if len(sys.argv) == 4 and sys.argv[1] == "--run":
+        memory, t_flat, t_write = benchmark(int(sys.argv[2]), sys.argv[3] == "store")
+        print "%d %f %f %f" % (int(sys.argv[2]) ** 2, memory, t_flat, t_write)
+        sys.exit(0)
+    check_datatypes()
+    if len(sys.argv) > 1:
+        sizes = [int(a) for a in sys.argv[1:]]
+    else:
+        sizes = [30, 100, 300]
+    print "%12s %10s %12s %12s %12s" % ("boundaries", "", "memory", "flat_copy", "write")
+    for n in sizes:
+        for mode in ["elements", "store"]:
+            output = subprocess.check_output([sys.executable, __file__, "--run", str(n), mode]).strip().split("\n")[-1]
+            (n_o_boundaries, memory, t_flat, t_write) = output.split()
+            print "%12s %10s %9.1f MB %10.3f s %10.3f s" % (n_o_boundaries, mode, float(memory), float(t_flat), float(t_write))
@@ -0,0 +1,59 @@
+# IPKISS - Parametric Design Framework
+# Copyright (C) 2002-2012  Ghent University - imec
+# 
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 2
+# of the License, or (at your option) any later version.
+# 
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+# 
+# i-depot BBIE 7396, 7556, 7748
+# 
+# Contact: ipkiss@intec.ugent.be
+
+
+# Content addressed structures: an array of ring resonators in which many rings
+# have identical parameters. With content_addressed_structures, each unique ring
+# is only generated and written once.
+
+from technologies.si_photonics.picazzo.default import *
+from ipkiss.all import *
+from ipkiss.io.output_gdsii import MemoryOutputGdsii
+import time
+
+class RingArray(Structure):
+    n_o_rings = IntProperty(default = 200)
+    n_o_radii = IntProperty(default = 5)
+
+    def define_elements(self, elems):
+        from picazzo.filters.ring import RingRect180DropFilter
+        for i in range(self.n_o_rings):
+            ring = RingRect180DropFilter(bend_radius = 5.0 + 0.5 * (i % self.n_o_radii), straights = (0.0, 0.0), coupler_spacings = [0.67, 0.67])
+            elems += SRef(ring, (50.0 * (i % 20), 50.0 * (i / 20)))
+        return elems
+
+def benchmark(content_addressed):
+    library = Library(name = "RINGS", content_addressed_structures = content_addressed)
+    set_current_library(library)
+    t0 = time.time()
+    array = RingArray(library = library)
+    array.elements
+    t_build = time.time() - t0
+    t0 = time.time()
+    gds = MemoryOutputGdsii(binary = True).write(library).getvalue()
+    t_write = time.time() - t0
+    return len(library.structures), len(gds), t_build, t_write
+
+if __name__ == "__main__":
+    print "%18s %10s %10s %10s %10s" % ("", "structures", "gds bytes", "build", "write")
+    for content_addressed in [False, True]:
+        n, size, t_build, t_write = benchmark(content_addressed)
+        print "%18s %10d %10d %8.2f s %8.2f s" % ("content addressed" if content_addressed else "by name", n, size, t_build, t_write)
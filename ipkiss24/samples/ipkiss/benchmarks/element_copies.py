@@ -0,0 +1,72 @@
+# IPKISS - Parametric Design Framework
+# Copyright (C) 2002-2012  Ghent University - imec
+# 
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 2
+# of the License, or (at your option) any later version.
+# 
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+# 
+# i-depot BBIE 7396, 7556, 7748
+# 
+# Contact: ipkiss@intec.ugent.be
+
+
+
+# Benchmark of the copies of elements, shapes and transforms: deep copies of an element list,
+# transformed copies of elements and shapes, modified copies and concatenated transforms.
+# The copies are cloned from the property values without running the constructors again,
+# and the point arrays of the shapes are shared with their copies until their points are
+# read. A shape and its deep copy can both modify their points in place afterwards.
+
+from technologies.si_photonics.picazzo.default import *
+from ipkiss.all import *
+from copy import copy, deepcopy
+import sys
+import time
+
+def build(n_o_elements):
+    elements = ElementList()
+    for i in range(n_o_elements / 2):
+        elements += Boundary(Layer(1), ShapeRectangle(center = (i, 0.0), box_size = (0.5, 0.5)))
+        elements += Path(Layer(2), [(0.0, i), (5.0, i + 5.0)], 0.1)
+    shapes = [Shape([(0.0, 0.0), (i, 0.0), (i, 1.0), (0.0, 1.0)], closed = True) for i in range(1, n_o_elements + 1)]
+    return elements, shapes
+
+def check_in_place():
+    """ the points of a shape and of its deep copy can be modified in place, independently """
+    b = Boundary(Layer(1), Shape([(0.0, 0.0), (1.0, 0.0), (1.0, 1.0)], closed = True))
+    c = deepcopy(b)
+    b.shape.points[0, 0] = 5.0
+    c.shape.points += 1.0
+    return b.shape.points.tolist() == [[5.0, 0.0], [1.0, 0.0], [1.0, 1.0]] and c.shape.points.tolist() == [[1.0, 1.0], [2.0, 1.0], [2.0, 2.0]]
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        n_o_elements = int(sys.argv[1])
+    else:
+        n_o_elements = 10000
+    elements, shapes = build(n_o_elements)
+    T = Rotation(rotation = 90.0) + Translation((1.0, 2.0))
+    BENCHMARKS = [("deep copy of element list", lambda: deepcopy(elements)),
+                  ("copy of elements", lambda: [copy(e) for e in elements]),
+                  ("transform_copy of elements", lambda: [e.transform_copy(T) for e in elements]),
+                  ("flat_copy of element list", lambda: elements.flat_copy()),
+                  ("transform_copy of shapes", lambda: [s.transform_copy(T) for s in shapes]),
+                  ("modified_copy of shapes", lambda: [s.modified_copy(start_face_angle = 0.0) for s in shapes]),
+                  ("concatenation of transforms", lambda: [T + T for s in shapes]),
+                  ]
+    print "%d elements and shapes" % n_o_elements
+    print "points of copies can be modified in place: %s" % check_in_place()
+    for name, f in BENCHMARKS:
+        t0 = time.time()
+        f()
+        print "%30s %8.3f s" % (name, time.time() - t0)
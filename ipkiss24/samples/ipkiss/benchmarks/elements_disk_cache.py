@@ -0,0 +1,69 @@
+# IPKISS - Parametric Design Framework
+# Copyright (C) 2002-2012  Ghent University - imec
+# 
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 2
+# of the License, or (at your option) any later version.
+# 
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+# 
+# i-depot BBIE 7396, 7556, 7748
+# 
+# Contact: ipkiss@intec.ugent.be
+
+# Persistent element cache: the elements of a set of ring resonators are generated
+# once and stored on disk. A next run of the script, with the same parameters, loads
+# the elements from the cache instead of regenerating them. Each run is done in a
+# separate process, as the generated structure names depend on the process history.
+
+from technologies.si_photonics.picazzo.default import *
+from ipkiss.all import *
+from ipkiss.io.elements_cache import ElementsDiskCache
+import subprocess
+import tempfile
+import shutil
+import time
+import sys
+
+class RingArray(Structure):
+    n_o_rings = IntProperty(default = 40)
+
+    def define_elements(self, elems):
+        from picazzo.filters.ring import RingRect180DropFilter
+        for i in range(self.n_o_rings):
+            ring = RingRect180DropFilter(bend_radius = 5.0 + 0.1 * i, straights = (0.0, 0.0), coupler_spacings = [0.67, 0.67])
+            elems += SRef(ring, (50.0 * (i % 10), 50.0 * (i / 10)))
+        return elems
+
+def benchmark(path):
+    if path:
+        cache = ElementsDiskCache(path = path)
+        set_elements_disk_cache(cache)
+    t0 = time.time()
+    array = RingArray(name = "RING_ARRAY")
+    for s in array.dependencies() + [array]:
+        s.elements
+    t = time.time() - t0
+    if path:
+        return "%8.2f s   (%d hits, %d misses, %d bytes on disk)" % (t, cache.hits, cache.misses, cache.size())
+    return "%8.2f s" % t
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        print benchmark(sys.argv[1] if sys.argv[1] != "-" else None)
+    else:
+        path = tempfile.mkdtemp()
+        try:
+            for (title, arg) in [("no cache", "-"), ("cold cache", path), ("warm cache", path)]:
+                output = subprocess.Popen([sys.executable, __file__, arg], stdout = subprocess.PIPE).communicate()[0]
+                print "%12s %s" % (title, output.strip().split("\n")[-1])
+        finally:
+            shutil.rmtree(path)
@@ -0,0 +1,76 @@
+# IPKISS - Parametric Design Framework
+# Copyright (C) 2002-2012  Ghent University - imec
+# 
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 2
+# of the License, or (at your option) any later version.
+# 
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+# 
+# i-depot BBIE 7396, 7556, 7748
+# 
+# Contact: ipkiss@intec.ugent.be
+
+
+# Benchmark of the element dispatch in the GDSII export: a flat structure with a mix
+# of boundaries and labels is pushed through the default technology filter
+# (TECH.GDSII.FILTER) and through a complete binary export. None of the elements
+# is modified by the filters, so both spend most of their time selecting the 
+# __filter_<class>__ and collect_<class> methods for each element.
+
+from ipkiss.all import *
+from ipkiss.io.gds_layer import AutoGdsiiLayerOutputMap
+import sys
+import tempfile
+import os
+import time
+
+def build(library, n_o_elements):
+    elements = ElementList()
+    n = int(n_o_elements ** 0.5)
+    for i in xrange(n_o_elements):
+        x, y = 2.0 * (i % n), 2.0 * (i / n)
+        k = i % 3
+        if k == 0:
+            elements += Rectangle(Layer(1), (x, y), (1.0, 1.0))
+        elif k == 1:
+            elements += Circle(Layer(2), (x, y), 0.5, angle_step = 30.0)
+        else:
+            elements += Label(Layer(3), "L", coordinate = (x, y))
+    top = Structure(name = "DISPATCH_%d" % n_o_elements, elements = elements, library = library)
+    library += top
+    return top
+
+def benchmark(n_o_elements, filename):
+    library = Library(name = "DISPATCH_%d" % n_o_elements, unit = 1E-6, grid = 1E-9)
+    top = build(library, n_o_elements)
+
+    t0 = time.time()
+    filtered = TECH.GDSII.FILTER(top.elements)
+    t_filter = time.time() - t0
+
+    t0 = time.time()
+    FileOutputGdsii(filename, layer_map = AutoGdsiiLayerOutputMap(), binary = True).write(library)
+    t_export = time.time() - t0
+    return len(filtered), t_filter, t_export, os.path.getsize(filename)
+
+if __name__ == "__main__":
+    # larger sizes, such as 10 ** 6 elements, need several GB of memory: pass them on the command line
+    if len(sys.argv) > 1:
+        sizes = [int(a) for a in sys.argv[1:]]
+    else:
+        sizes = [10 ** 4, 10 ** 5, 2 * 10 ** 5]
+    filename = os.path.join(tempfile.mkdtemp(), "dispatch.gds")
+    print "%12s %12s %14s %14s %12s" % ("elements", "filtered", "filter", "export", "file size")
+    for n in sizes:
+        n_o_filtered, t_filter, t_export, size = benchmark(n, filename)
+        print "%12d %12d %12.3f s %12.3f s %12d" % (n, n_o_filtered, t_filter, t_export, size)
+    os.remove(filename)
@@ -0,0 +1,118 @@
+# IPKISS - Parametric Design Framework
+# Copyright (C) 2002-2012  Ghent University - imec
+# 
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 2
+# of the License, or (at your option) any later version.
+# 
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+# 
+# i-depot BBIE 7396, 7556, 7748
+# 
+# Contact: ipkiss@intec.ugent.be
+
+
+# Benchmark of a clipped, layer filtered GDSII export of a window of a large layout:
+# OutputGdsii with clip_box and layers, which writes the references inside the window as
+# references and only expands the ones on its border, versus flattening the layout, 
+# filtering and clipping the elements and writing the flat structure.
+# A boundary with a hole, connected to its outline as a keyhole, is checked to keep
+# its hole when it is clipped.
+
+from ipkiss.all import *
+from ipkiss.io.gds_layer import AutoGdsiiLayerOutputMap, AutoGdsiiLayerInputMap
+from ipkiss.geometry.shapes.modifiers import ShapePath
+from dependencies.shapely_wrapper import Polygon, flatten_shapely_geom, cascaded_union
+import sys
+import tempfile
+import os
+import time
+
+def build(library, n, m):
+    hole = Structure(name = "CLIP_HOLE_%d_%d" % (n, m), elements = [Circle(Layer(1), (0.0, 0.0), 0.15, angle_step = 30.0)], library = library)
+    cell = Structure(name = "CLIP_CELL_%d_%d" % (n, m), 
+                     elements = [ARef(hole, (0.0, 0.0), (0.5, 0.5), (m, m)), 
+                                 Path(Layer(2), [(-5.0, 0.0), (0.5 * m + 5.0, 0.0)], 0.45),
+                                 Path(Layer(2), [(-5.0, 0.5 * m), (0.5 * m + 5.0, 0.5 * m)], 0.45)], 
+                     library = library)
+    pitch = 0.5 * m + 20.0
+    top = Structure(name = "CLIP_TOP_%d_%d" % (n, m), elements = [ARef(cell, (0.0, 0.0), (pitch, pitch), (n, n))], library = library)
+    library += [hole, cell, top]
+    return top, pitch
+
+def flatten_then_clip(top, window, layers):
+    W = Polygon([(window.west, window.south), (window.east, window.south), (window.east, window.north), (window.west, window.north)])
+    elements = ElementList()
+    for e in top.elements.flat_copy():
+        if not e.layer in layers:
+            continue
+        si = e.size_info()
+        if si.west > window.east or si.east < window.west or si.south > window.north or si.north < window.south:
+            continue
+        if isinstance(e, Path):
+            shape = ShapePath(original_shape = e.shape, path_width = e.line_width, path_type = e.path_type)
+        else:
+            shape = e.shape
+        for g in flatten_shapely_geom(Polygon(shape.points).intersection(W)):
+            if isinstance(g, Polygon) and not g.is_empty:
+                elements += Boundary(e.layer, Shape(list(g.exterior.coords)[:-1], closed = True))
+    return Structure(name = top.name + "_clipped", elements = elements)
+
+def check_keyhole(filename):
+    """ a square ring (outer 0..10, hole 3..7) as a keyhole boundary, clipped to a window which cuts
+        through the ring and its hole: area 10 x 8 - 4 x 4 = 64 """
+    ring = [(0.0, 0.0), (10.0, 0.0), (10.0, 10.0), (0.0, 10.0), (0.0, 5.0), (3.0, 5.0), (3.0, 7.0), 
+            (7.0, 7.0), (7.0, 3.0), (3.0, 3.0), (3.0, 5.0), (0.0, 5.0)]
+    library = Library(name = "CLIP_KEYHOLE", unit = 1E-6, grid = 1E-9)
+    library += Structure(name = "CLIP_KEYHOLE_TOP", elements = [Boundary(Layer(1), ring)])
+    window = SizeInfo(west = -1.0, east = 8.0, south = -1.0, north = 11.0)
+    FileOutputGdsii(filename, layer_map = AutoGdsiiLayerOutputMap(), binary = True, clip_box = window).write(library)
+    clipped = InputGdsii(open(filename, "rb"), layer_map = AutoGdsiiLayerInputMap()).read()["CLIP_KEYHOLE_TOP"]
+    pieces = [Polygon(e.shape.points).buffer(0) for e in clipped.elements]
+    return abs(cascaded_union(pieces).area - 64.0) < 1E-6 and abs(sum([p.area for p in pieces]) - 64.0) < 1E-6
+
+def benchmark(n, m, filename):
+    library = Library(name = "CLIP_%d_%d" % (n, m), unit = 1E-6, grid = 1E-9)
+    top, pitch = build(library, n, m)
+    window = SizeInfo(west = 0.3 * pitch, east = 3.3 * pitch, south = 0.3 * pitch, north = 3.3 * pitch)
+    layers = [Layer(1), Layer(2)]
+
+    t0 = time.time()
+    FileOutputGdsii(filename, layer_map = AutoGdsiiLayerOutputMap(), binary = True, clip_box = window, layers = layers).write(library)
+    t_clipped = time.time() - t0
+    size_clipped = os.path.getsize(filename)
+
+    if n * n * m * m <= 2 * 10 ** 5:
+        t0 = time.time()
+        S = flatten_then_clip(top, window, layers)
+        flat_library = Library(name = "CLIP_FLAT_%d_%d" % (n, m), unit = 1E-6, grid = 1E-9)
+        flat_library += S
+        FileOutputGdsii(filename, layer_map = AutoGdsiiLayerOutputMap(), binary = True).write(flat_library)
+        t_flat = time.time() - t0
+    else:
+        t_flat = None
+    return n * n * (m * m + 2), t_clipped, size_clipped, t_flat
+
+if __name__ == "__main__":
+    if len(sys.argv) > 2:
+        sizes = [(int(sys.argv[1]), int(sys.argv[2]))]
+    else:
+        sizes = [(5, 20), (10, 30), (30, 30), (100, 30)]
+    filename = os.path.join(tempfile.mkdtemp(), "clipped.gds")
+    print "clipped keyhole keeps its hole: %s" % check_keyhole(filename)
+    print "%12s %16s %12s %20s" % ("elements", "clipped export", "file size", "flatten, clip, write")
+    for n, m in sizes:
+        n_o_elements, t_clipped, size_clipped, t_flat = benchmark(n, m, filename)
+        if t_flat is None:
+            print "%12d %14.3f s %12d %20s" % (n_o_elements, t_clipped, size_clipped, "-")
+        else:
+            print "%12d %14.3f s %12d %18.3f s" % (n_o_elements, t_clipped, size_clipped, t_flat)
+    os.remove(filename)
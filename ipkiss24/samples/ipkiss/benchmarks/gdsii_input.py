@@ -0,0 +1,77 @@
+# IPKISS - Parametric Design Framework
+# Copyright (C) 2002-2012  Ghent University - imec
+# 
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 2
+# of the License, or (at your option) any later version.
+# 
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+# 
+# i-depot BBIE 7396, 7556, 7748
+# 
+# Contact: ipkiss@intec.ugent.be
+
+
+# Benchmark of GDSII input: InputGdsii, which parses the complete file, versus
+# FileLazyInputGdsii, which only indexes the structures and decodes a structure
+# when it is accessed. Decoding the top cell, which references cells that are not
+# loaded yet, should not need a rebuild of the structure index.
+
+from ipkiss.all import *
+from ipkiss.io.gds_layer import AutoGdsiiLayerInputMap, AutoGdsiiLayerOutputMap
+import tempfile
+import os
+import time
+
+def write_test_library(filename, n_o_cells, n_o_polygons):
+    library = Library(name = "BENCHMARK", unit = 1E-6, grid = 5E-9)
+    top = Structure(name = "top")
+    for i in range(n_o_cells):
+        cell = Structure(name = "cell_%d" % i, library = library)
+        for j in range(n_o_polygons):
+            cell += Rectangle(layer = Layer(j % 4), center = (j * 10.0, 0.0), box_size = (4.0, 4.0 + 0.001 * i))
+        top += SRef(cell, (0.0, i * 10.0))
+        library += cell
+    library += top
+    FileOutputGdsii(filename, binary = True, layer_map = AutoGdsiiLayerOutputMap()).write(library)
+
+if __name__ == "__main__":
+    filename = os.path.join(tempfile.mkdtemp(), "benchmark.gds")
+    write_test_library(filename, n_o_cells = 1000, n_o_polygons = 20)
+    print "file size                  : %d bytes" % os.path.getsize(filename)
+
+    t0 = time.time()
+    I = InputGdsii(open(filename, "rb"), layer_map = AutoGdsiiLayerInputMap())
+    L = I.read()
+    n = len(L["cell_500"].elements)
+    refs = [(e.reference.name, tuple(e.position)) for e in L["top"].elements]
+    print "InputGdsii, full read      : %.3f s" % (time.time() - t0)
+
+    t0 = time.time()
+    I = FileLazyInputGdsii(filename, layer_map = AutoGdsiiLayerInputMap())
+    n_lazy = len(I.get_structure("cell_500").elements)
+    print "FileLazyInputGdsii, 1 cell : %.3f s" % (time.time() - t0)
+    I.close()
+
+    t0 = time.time()
+    I = FileLazyInputGdsii(filename, layer_map = AutoGdsiiLayerInputMap())
+    refs_lazy = [(e.reference.name, tuple(e.position)) for e in I.get_structure("top").elements]
+    print "FileLazyInputGdsii, top    : %.3f s" % (time.time() - t0)
+    rebuilt = I.__index_verified__
+
+    t0 = time.time()
+    L = I.read()
+    print "FileLazyInputGdsii, index  : %.3f s" % (time.time() - t0)
+    I.close()
+    print "same elements              : %s" % (n == n_lazy)
+    print "same references            : %s" % (refs == refs_lazy)
+    print "index rebuilt              : %s" % rebuilt
+    os.remove(filename)
@@ -0,0 +1,57 @@
+# IPKISS - Parametric Design Framework
+# Copyright (C) 2002-2012  Ghent University - imec
+# 
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 2
+# of the License, or (at your option) any later version.
+# 
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+# 
+# i-depot BBIE 7396, 7556, 7748
+# 
+# Contact: ipkiss@intec.ugent.be
+
+
+# Benchmark of the GDSII writer: hexadecimal records (default) versus
+# records packed directly into a binary buffer (OutputGdsii.binary = True).
+
+from ipkiss.all import *
+from ipkiss.io.output_gdsii import MemoryOutputGdsii
+import time
+
+class ManyPolygons(Structure):
+    n_o_cells = IntProperty(default = 100)
+    n_o_polygons = IntProperty(default = 100)
+
+    def define_elements(self, elems):
+        for i in range(self.n_o_cells):
+            cell = Structure(name = "cell_%d" % i)
+            for j in range(self.n_o_polygons):
+                cell += Circle(layer = Layer(j % 4), center = (j * 10.0, 0.0), radius = 4.0 + 0.001 * i)
+            elems += SRef(cell, (0.0, i * 10.0))
+        return elems
+
+def time_output(library, binary):
+    t0 = time.time()
+    data = MemoryOutputGdsii(binary = binary).write(library).getvalue()
+    return (time.time() - t0, data)
+
+if __name__ == "__main__":
+    layout = ManyPolygons(name = "layout")
+    library = Library(name = "BENCHMARK", unit = 1E-6, grid = 5E-9)
+    library += layout
+    time_output(library, binary = True) # make sure all elements and shapes are generated before timing
+    (t_hex, data_hex) = time_output(library, binary = False)
+    (t_bin, data_bin) = time_output(library, binary = True)
+    print "hexadecimal writer : %.2f s" % t_hex
+    print "binary writer      : %.2f s" % t_bin
+    print "speedup            : %.1fx" % (t_hex / t_bin)
+    print "identical output   : %s" % (data_hex == data_bin)
@@ -0,0 +1,63 @@
+# IPKISS - Parametric Design Framework
+# Copyright (C) 2002-2012  Ghent University - imec
+# 
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 2
+# of the License, or (at your option) any later version.
+# 
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+# 
+# i-depot BBIE 7396, 7556, 7748
+# 
+# Contact: ipkiss@intec.ugent.be
+
+# Scaling benchmark of the boolean operations on generated layers for a structure 
+# with many placements of the same ring resonator. The geometry of the ring is only 
+# evaluated once, so the time for the hierarchical structure scales with the number 
+# of unique cells rather than with the number of instances. The same elements, 
+# flattened, are given for comparison.
+
+from technologies.si_photonics.picazzo.default import *
+from ipkiss.all import *
+from ipkiss.boolean_ops.boolean_ops_elements import get_elements_for_generated_layers
+from picazzo.filters.ring import RingRect180DropFilter
+import sys
+import time
+
+def benchmark(n_o_rings):
+    ring = RingRect180DropFilter(name = "BENCHMARK_RING")
+    elements = ElementList()
+    for i in range(n_o_rings):
+        elements += SRef(ring, (40.0 * (i % 10), 40.0 * (i / 10)), transformation = Rotation(rotation = 90.0 * (i % 4)))
+    # every generated layer refers to the same layers multiple times
+    mapping = {TECH.PPLAYER.WG.ALL : TECH.PPLAYER.WG.TEXT,
+               TECH.PPLAYER.WG.TRENCH | (TECH.PPLAYER.WG.LINE ^ TECH.PPLAYER.WG.LF_AREA) & TECH.PPLAYER.WG.LF_AREA : Layer(100),
+               TECH.PPLAYER.WG.LINE | TECH.PPLAYER.WG.ALL : Layer(101)}
+
+    t0 = time.time()
+    get_elements_for_generated_layers(elements, mapping)
+    t_hierarchical = time.time() - t0
+
+    flat_elements = elements.flat_copy()
+    t0 = time.time()
+    get_elements_for_generated_layers(flat_elements, mapping)
+    t_flat = time.time() - t0
+    return t_hierarchical, t_flat
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        sizes = [int(a) for a in sys.argv[1:]]
+    else:
+        sizes = [1, 10, 50, 200]
+    print "%10s %16s %16s" % ("rings", "hierarchical", "flattened")
+    for n in sizes:
+        t_hierarchical, t_flat = benchmark(n)
+        print "%10d %14.3f s %14.3f s" % (n, t_hierarchical, t_flat)
@@ -0,0 +1,65 @@
+# IPKISS - Parametric Design Framework
+# Copyright (C) 2002-2012  Ghent University - imec
+# 
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 2
+# of the License, or (at your option) any later version.
+# 
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+# 
+# i-depot BBIE 7396, 7556, 7748
+# 
+# Contact: ipkiss@intec.ugent.be
+
+# Benchmark of the tiled evaluation of generated layers on a large layout : a grid of
+# ring resonators and waveguide crossings, with generated layers that combine overlapping
+# layers. The serial evaluation is compared with the tiled evaluation in a pool of
+# worker processes. The speedup with multiple workers depends on the number of
+# available processors.
+
+from technologies.si_photonics.picazzo.default import *
+from ipkiss.all import *
+from ipkiss.boolean_ops.boolean_ops_elements import get_elements_for_generated_layers
+from picazzo.filters.ring import RingRect180DropFilter
+import multiprocessing
+import sys
+import time
+
+def build_elements(n):
+    ring = RingRect180DropFilter(name = "BENCHMARK_RING")
+    elements = ElementList()
+    for i in range(n):
+        for j in range(n):
+            elements += SRef(ring, (25.0 * i, 25.0 * j), transformation = Rotation(rotation = 90.0 * ((i + j) % 4)))
+    for i in range(n):
+        elements += Rectangle(TECH.PPLAYER.WG.TRENCH, (25.0 * i + 12.5, 12.5 * n), (4.0, 25.0 * n))
+        elements += Rectangle(TECH.PPLAYER.WG.TRENCH, (12.5 * n, 25.0 * i + 12.5), (25.0 * n, 4.0))
+    return elements
+
+def benchmark(n, tile_size, workers):
+    elements = build_elements(n)
+    mapping = {TECH.PPLAYER.WG.ALL : TECH.PPLAYER.WG.TEXT,
+               TECH.PPLAYER.WG.TRENCH ^ TECH.PPLAYER.WG.LINE : Layer(100)}
+    t0 = time.time()
+    serial = get_elements_for_generated_layers(elements, mapping)
+    timings = [("serial", time.time() - t0, len(serial))]
+    for w in workers:
+        t0 = time.time()
+        tiled = get_elements_for_generated_layers(elements, mapping, tile_size = tile_size, n_o_workers = w)
+        timings.append(("%d worker(s)" % w, time.time() - t0, len(tiled)))
+    return timings
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 12
+    tile_size = float(sys.argv[2]) if len(sys.argv) > 2 else 100.0
+    print "%d x %d rings, tiles of %.1f um, %d processor(s)" % (n, n, tile_size, multiprocessing.cpu_count())
+    for title, t, n_o_elements in benchmark(n, tile_size, [1, 2, 4]):
+        print "%14s %10.2f s %8d boundaries" % (title, t, n_o_elements)
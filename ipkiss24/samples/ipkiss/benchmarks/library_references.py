@@ -0,0 +1,68 @@
+# IPKISS - Parametric Design Framework
+# Copyright (C) 2002-2012  Ghent University - imec
+# 
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 2
+# of the License, or (at your option) any later version.
+# 
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+# 
+# i-depot BBIE 7396, 7556, 7748
+# 
+# Contact: ipkiss@intec.ugent.be
+
+
+# Scaling benchmark of the reference graph queries of a library: the top-level
+# structure and the referenced structures, and writing the library to GDSII.
+# The test library is a chain of cells in which every cell refers to the previous
+# cell and to a small leaf cell, so the hierarchy is deep.
+
+from ipkiss.all import *
+from ipkiss.io.output_gdsii import MemoryOutputGdsii
+from ipkiss.io.gds_layer import AutoGdsiiLayerOutputMap
+import sys
+import time
+
+def build_library(n_o_structures):
+    library = Library(name = "BENCHMARK_%d" % n_o_structures)
+    leaf = Structure(name = "leaf", elements = [Rectangle(layer = Layer(1), box_size = (1.0, 1.0))], library = library)
+    previous = leaf
+    for i in range(n_o_structures):
+        previous = Structure(name = "cell_%d" % i, 
+                             elements = [SRef(previous, (0.0, 0.0)), SRef(leaf, (2.0, 0.0))], 
+                             library = library)
+    return library
+
+def benchmark(n_o_structures):
+    library = build_library(n_o_structures)
+    t0 = time.time()
+    top = library.top_layout()
+    t_top = time.time() - t0
+
+    t0 = time.time()
+    library.referenced_structures()
+    t_referenced = time.time() - t0
+
+    t0 = time.time()
+    MemoryOutputGdsii(binary = True, layer_map = AutoGdsiiLayerOutputMap()).write(library)
+    t_write = time.time() - t0
+    return t_top, t_referenced, t_write
+
+if __name__ == "__main__":
+    sys.setrecursionlimit(10000)
+    if len(sys.argv) > 1:
+        sizes = [int(a) for a in sys.argv[1:]]
+    else:
+        sizes = [1000, 3000, 10000]
+    print "%10s %12s %22s %12s" % ("structures", "top_layout", "referenced_structures", "write gds")
+    for n in sizes:
+        t_top, t_referenced, t_write = benchmark(n)
+        print "%10d %10.3f s %20.3f s %10.3f s" % (n, t_top, t_referenced, t_write)
@@ -0,0 +1,65 @@
+# IPKISS - Parametric Design Framework
+# Copyright (C) 2002-2012  Ghent University - imec
+# 
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 2
+# of the License, or (at your option) any later version.
+# 
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+# 
+# i-depot BBIE 7396, 7556, 7748
+# 
+# Contact: ipkiss@intec.ugent.be
+
+# Benchmark of the material lookup in a 3D material stack geometry on a grid of points, as done by 
+# simulation engines: a ring resonator defined by a few shapes with many vertices. The materials are 
+# looked up point by point with get_material, and for all points at once with get_materials.
+
+from technologies.si_photonics.picazzo.default import *
+from ipkiss.all import *
+from pysics.basics.material.material import Material
+from pysics.basics.geometry.material_stack import MaterialStackGeometry1D, MaterialStackGeometry3D
+import numpy
+import sys
+import time
+
+def ring_geometry(n_o_points):
+    air = Material(name = "air", solid = False)
+    silicon = Material(name = "silicon")
+    oxide = Material(name = "oxide")
+    background_stack = MaterialStackGeometry1D(name = "oxide", materials_thicknesses = [(oxide, 2.0), (air, 1.0)])
+    core_stack = MaterialStackGeometry1D(name = "core", materials_thicknesses = [(oxide, 2.0), (silicon, 0.22), (air, 0.78)])
+    ring = Shape(ShapeRingSegment(angle_start = 0.0, angle_end = 360.0, inner_radius = 9.775, outer_radius = 10.225, angle_step = 720.0 / n_o_points).points, closed = True)
+    bus = Shape([(-15.0, -10.9), (15.0, -10.9), (15.0, -10.45), (-15.0, -10.45)], closed = True)
+    return MaterialStackGeometry3D(background_material = air, background_stack = background_stack,
+                                   shapes_stacks = [(ring, core_stack), (bus, core_stack)])
+
+def timed(f):
+    t0 = time.time()
+    result = f()
+    return result, time.time() - t0
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        n_o_grid_points = int(sys.argv[1])
+    else:
+        n_o_grid_points = 100
+    G = ring_geometry(1000)
+    x = numpy.linspace(-12.0, 12.0, n_o_grid_points)
+    X, Y = numpy.meshgrid(x, x)
+    C = numpy.column_stack((X.flat, Y.flat, numpy.ones(X.size) * 2.1))
+    M, t_array = timed(lambda: G.get_materials(C))
+    # the point by point lookup is timed on a part of the points only
+    n = min(len(C), 1000)
+    M1, t_points = timed(lambda: [G.get_material(tuple(c)) for c in C[:n]])
+    assert [m.name for m in M1] == [m.name for m in M[:n]]
+    print "%d points: get_materials %.3f s, get_material %.3f s for %d points (%.0f s for all)" % (
+        len(C), t_array, t_points, n, t_points * len(C) / n)
@@ -0,0 +1,58 @@
+# IPKISS - Parametric Design Framework
+# Copyright (C) 2002-2012  Ghent University - imec
+# 
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 2
+# of the License, or (at your option) any later version.
+# 
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+# 
+# i-depot BBIE 7396, 7556, 7748
+# 
+# Contact: ipkiss@intec.ugent.be
+
+
+# Memoization statistics and overhead.
+# Builds a sweep of ring resonators and prints the memoized functions which
+# were evaluated most often, followed by the cost of a cache hit.
+
+from technologies.si_photonics.picazzo.default import *
+from ipkiss.all import *
+from ipcore.caching.cache import cache, cache_statistics, reset_cache_statistics
+import time
+
+class Counter(StrongPropertyInitializer):
+    n = IntProperty(default = 0)
+
+    @cache()
+    def value(self):
+        return self.n + 1
+
+
+if __name__ == "__main__":
+    from picazzo.filters.ring import RingRect180DropFilter
+    reset_cache_statistics()
+    t0 = time.time()
+    for r in [5.0 + 0.5 * i for i in range(20)]:
+        ring = RingRect180DropFilter(bend_radius = r, straights = (0.0, 0.0), coupler_spacings = [0.67, 0.67])
+        ring.size_info()
+    print "ring sweep: %.3f s" % (time.time() - t0)
+    print "most evaluated memoized functions:"
+    for s in cache_statistics()[:10]:
+        print "   %s" % s
+
+    c = Counter()
+    c.value()
+    N = 100000
+    t0 = time.time()
+    for i in xrange(N):
+        c.value()
+    print "cache hit: %.2f us" % (1E6 * (time.time() - t0) / N)
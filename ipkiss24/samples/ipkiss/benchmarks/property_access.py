@@ -0,0 +1,63 @@
+# IPKISS - Parametric Design Framework
+# Copyright (C) 2002-2012  Ghent University - imec
+# 
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 2
+# of the License, or (at your option) any later version.
+# 
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+# 
+# i-depot BBIE 7396, 7556, 7748
+# 
+# Contact: ipkiss@intec.ugent.be
+
+
+# Microbenchmark of the property runtime of ipcore: reading stored, default and calculated
+# property values, assigning properties one by one or with set_bulk, and copying objects.
+# Only ipcore is imported, so the numbers are not influenced by the technology setup of ipkiss.
+
+from ipcore.all import *
+import sys
+import timeit
+
+class Point(StrongPropertyInitializer):
+    x = FloatProperty(default = 0.0)
+    y = FloatProperty(default = 0.0)
+    name = StringProperty(default = "point")
+    size = IntProperty(default = 1, restriction = RESTRICT_POSITIVE)
+    norm = FloatProperty()
+
+    def define_norm(self):
+        return (self.x ** 2 + self.y ** 2) ** 0.5
+
+p = Point(x = 1.0, y = 2.0)
+p.norm
+
+BENCHMARKS = [("read stored value", "p.x"),
+              ("read default value", "p.name"),
+              ("read default value with restriction", "p.size"),
+              ("read calculated value", "p.norm"),
+              ("assign 2 properties", "p.x = p.x + 1.0; p.y = p.y + 1.0"),
+              ("assign 2 properties with set_bulk", "p.set_bulk(x = p.x + 1.0, y = p.y + 1.0)"),
+              ("construct", "Point(x = 1.0, y = 2.0, size = 3)"),
+              ("copy", "copy(p)"),
+              ("modified copy", "p.modified_copy(y = 5.0)"),
+              ]
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        number = int(sys.argv[1])
+    else:
+        number = 100000
+    print "%40s %14s" % ("", "time per call")
+    for name, statement in BENCHMARKS:
+        t = min(timeit.repeat(statement, setup = "from __main__ import p, Point; from copy import copy", number = number, repeat = 3))
+        print "%40s %11.3f us" % (name, 1E6 * t / number)
@@ -0,0 +1,80 @@
+# IPKISS - Parametric Design Framework
+# Copyright (C) 2002-2012  Ghent University - imec
+# 
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 2
+# of the License, or (at your option) any later version.
+# 
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+# 
+# i-depot BBIE 7396, 7556, 7748
+# 
+# Contact: ipkiss@intec.ugent.be
+
+
+# Benchmark of a parameter sweep on a picazzo ring filter: the coupler spacings of a single
+# ring are changed in a loop, and the elements, ports and size of the ring are requested
+# after each change. Only the calculated values which depend on the coupler spacings are
+# recalculated: the coupler structures and the ring shape are reused.
+# The result of the last step is compared with a ring built with the same parameters.
+# An auto taper checks that a getter which only tests __property_was_externally_set__
+# is recalculated when that property is set.
+
+from technologies.si_photonics.picazzo.default import *
+from picazzo.filters.ring import RingRect180DropFilter
+from picazzo.wg.tapers.auto_taper.auto_taper import WgElPortTaperAuto
+from ipkiss.plugins.photonics.port.port import OpticalPort
+from ipkiss.plugins.photonics.wg.basic import WgElDefinition
+from ipkiss.all import *
+import sys
+import time
+
+def signature(structure):
+    result = []
+    for e in structure.elements.flat_copy():
+        if hasattr(e, "shape"):
+            result.append((str(e.layer), tuple([(round(p[0], 6), round(p[1], 6)) for p in e.shape.points])))
+    return sorted(result)
+
+def sweep(n_o_steps):
+    ring = RingRect180DropFilter(name = "SWEPT_RING")
+    ring.elements
+    t0 = time.time()
+    for i in range(n_o_steps):
+        s = 0.5 + 0.01 * i
+        ring.coupler_spacings = [s, s + 0.1]
+        ring.elements
+        ring.ports
+        ring.size_info()
+    t = time.time() - t0
+    reference = RingRect180DropFilter(name = "REFERENCE_RING", coupler_spacings = [s, s + 0.1])
+    return t, ring.property_dependencies(), signature(ring) == signature(reference)
+
+def check_externally_set():
+    """ the taper of an auto taper only passes its length on when the length is set """
+    taper = WgElPortTaperAuto(start_port = OpticalPort(position = (0.0, 0.0), wg_definition = WgElDefinition(wg_width = 0.45), angle = 0.0),
+                              end_wg_def = WgElDefinition(wg_width = 2.0))
+    taper.size_info()
+    taper.length = 50.0
+    return taper.taper.length == 50.0 and taper.size_info().east == 50.0
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        n_o_steps = int(sys.argv[1])
+    else:
+        n_o_steps = 100
+    t, dependencies, identical = sweep(n_o_steps)
+    print "%d steps: %.3f s, %.2f ms per step" % (n_o_steps, t, 1E3 * t / n_o_steps)
+    print "identical to a freshly built ring: %s" % identical
+    print "auto taper follows its length: %s" % check_externally_set()
+    print "dependencies of the calculated values:"
+    for p in sorted(dependencies):
+        print "    %s: %s" % (p, dependencies[p])
@@ -0,0 +1,61 @@
+# IPKISS - Parametric Design Framework
+# Copyright (C) 2002-2012  Ghent University - imec
+# 
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 2
+# of the License, or (at your option) any later version.
+# 
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+# 
+# i-depot BBIE 7396, 7556, 7748
+# 
+# Contact: ipkiss@intec.ugent.be
+
+# Benchmark of the extraction of a rotated window from the material array of a simulation volume, as 
+# done for the mode profile at a tilted port: a window along a waveguide which is tilted over 30 degrees.
+# The samples of the window are transformed to the material array in one pass.
+
+from technologies.si_photonics.picazzo.default import *
+from ipkiss.all import *
+from ipkiss.plugins.simulation import *
+from ipkiss.plugins.photonics.wg.basic import WgElDefinition
+import numpy
+import sys
+import time
+
+def tilted_waveguide(length = 40.0, angle = 30.0):
+    wg_def = WgElDefinition(wg_width = 0.45, trench_width = 2.0)
+    end = (length * numpy.cos(angle * DEG2RAD), length * numpy.sin(angle * DEG2RAD))
+    return Structure(name = "tilted_wg_%d" % int(angle), elements = wg_def(shape = [(0.0, 0.0), end]))
+
+def timed(f):
+    t0 = time.time()
+    result = f()
+    return result, time.time() - t0
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        resolution = int(sys.argv[1])
+    else:
+        resolution = 20
+    angle = 30.0
+    V = StructureSimulationVolume2D(simul_params = {"structure": tilted_waveguide(angle = angle), 
+                                                    "resolution": resolution,
+                                                    "vfabrication_process_flow": TECH.VFABRICATION.PROCESS_FLOW,
+                                                    "material_stack_factory": TECH.MATERIAL_STACKS})
+    full_array, t_full = timed(V.geometry.get_material_array)
+    # a window of 30 x 4 micrometer centered on the waveguide
+    corner = (5.0 * numpy.cos(angle * DEG2RAD) + 2.0 * numpy.sin(angle * DEG2RAD), 5.0 * numpy.sin(angle * DEG2RAD) - 2.0 * numpy.cos(angle * DEG2RAD))
+    for sampling in ["nearest", "area"]:
+        window, t_window = timed(lambda: V.get_material_dataset_for_subset(corner, 30.0, 4.0, angle, sampling = sampling))
+        print "resolution %d, %s sampling: %d x %d window from a %d x %d array in %.3f s (virtual fabrication %.3f s), materials %s" % (
+            resolution, sampling, window.shape[0], window.shape[1], full_array.shape[0], full_array.shape[1], t_window, t_full,
+            ", ".join([m.name for m in V.get_material_palette(window).values()]))
@@ -0,0 +1,63 @@
+# IPKISS - Parametric Design Framework
+# Copyright (C) 2002-2012  Ghent University - imec
+# 
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 2
+# of the License, or (at your option) any later version.
+# 
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+# 
+# i-depot BBIE 7396, 7556, 7748
+# 
+# Contact: ipkiss@intec.ugent.be
+
+
+
+
+# Benchmark of the segment intersection queries on shapes with many vertices: the boundary of a spiral
+# waveguide and a trochoid with many small loops. The segments are swept along one axis, so only the 
+# pairs of segments with overlapping bounding boxes are tested.
+
+from technologies.si_photonics.picazzo.default import *
+from ipkiss.all import *
+import numpy
+import sys
+import time
+
+def spiral_boundary(n_o_points, n_o_turns = 5, pitch = 5.0, width = 0.45):
+    t = numpy.linspace(0.0, 2 * numpy.pi * n_o_turns, n_o_points / 2)
+    r = 10.0 + pitch * t / (2 * numpy.pi)
+    centerline = Shape(numpy.column_stack((r * numpy.cos(t), r * numpy.sin(t))))
+    return Shape(ShapePath(original_shape = centerline, path_width = width).points, closed = True)
+
+def trochoid(n_o_points, n_o_points_per_loop = 100):
+    n_o_loops = n_o_points / n_o_points_per_loop
+    t = numpy.linspace(0.0, 2 * numpy.pi * n_o_loops, n_o_points)
+    return Shape(numpy.column_stack((t - 2.0 * numpy.sin(t), 2.0 * numpy.cos(t))))
+
+def timed(f):
+    t0 = time.time()
+    result = f()
+    return result, time.time() - t0
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        sizes = [int(a) for a in sys.argv[1:]]
+    else:
+        sizes = [100, 1000, 10000, 100000]
+    for n in sizes:
+        S = spiral_boundary(n)
+        X, t_self = timed(S.self_intersections)
+        C, t_other = timed(lambda: S.intersections(S.move_copy((3.0, 0.0))))
+        T = trochoid(n)
+        R, t_loops = timed(lambda: Shape(T).remove_loops())
+        print "%6d vertices: self_intersections %d points %.3f s, intersections with a shifted copy %d points %.3f s, remove_loops %d -> %d points %.3f s" % (
+            n, len(X), t_self, len(C), t_other, len(T), len(R), t_loops)
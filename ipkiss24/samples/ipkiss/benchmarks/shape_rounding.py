@@ -0,0 +1,53 @@
+# IPKISS - Parametric Design Framework
+# Copyright (C) 2002-2012  Ghent University - imec
+# 
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 2
+# of the License, or (at your option) any later version.
+# 
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+# 
+# i-depot BBIE 7396, 7556, 7748
+# 
+# Contact: ipkiss@intec.ugent.be
+
+
+
+# Benchmark of the rounding of the corners of long manhattan routes with ShapeRound, as done
+# for waveguide connectors. The points of all the bends are computed in one pass.
+
+from technologies.si_photonics.picazzo.default import *
+from ipkiss.all import *
+import sys
+import time
+
+def staircase(n_o_corners, step = 20.0):
+    pts = [(0.0, 0.0)]
+    for i in range(n_o_corners + 1):
+        (x, y) = pts[-1]
+        if i % 2 == 0:
+            pts.append((x + step, y))
+        else:
+            pts.append((x, y + step))
+    return Shape(pts)
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        n_o_corners = int(sys.argv[1])
+    else:
+        n_o_corners = 1000
+    route = staircase(n_o_corners)
+    for radius in [5.0, 15.0]:  # with a radius of 15, the radius is reduced to fit the route
+        t0 = time.time()
+        S = ShapeRound(original_shape = route, radius = radius)
+        n_o_points = len(S.points)
+        L = S.length()
+        print "%d corners, radius %.1f: %d points, length %.3f, %.3f s" % (n_o_corners, radius, n_o_points, L, time.time() - t0)
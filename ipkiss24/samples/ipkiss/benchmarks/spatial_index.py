@@ -0,0 +1,75 @@
+# IPKISS - Parametric Design Framework
+# Copyright (C) 2002-2012  Ghent University - imec
+# 
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 2
+# of the License, or (at your option) any later version.
+# 
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+# 
+# i-depot BBIE 7396, 7556, 7748
+# 
+# Contact: ipkiss@intec.ugent.be
+
+
+# Benchmark of region queries on a layout with many instances: a grid of cells, each
+# with an ARef of photonic crystal holes and a few waveguides. elements_in_region uses the
+# spatial index of every structure; the reference is flattening the whole layout and
+# filtering the elements on their bounding box.
+
+from ipkiss.all import *
+import sys
+import time
+
+def build(n, m):
+    hole = Structure(name = "SPI_HOLE_%d_%d" % (n, m), elements = [Circle(Layer(1), (0.0, 0.0), 0.15, angle_step = 30.0)])
+    cell = Structure(name = "SPI_CELL_%d_%d" % (n, m), 
+                     elements = [ARef(hole, (0.0, 0.0), (0.5, 0.5), (m, m)), 
+                                 Path(Layer(2), [(-5.0, 0.0), (0.5 * m + 5.0, 0.0)], 0.45),
+                                 Path(Layer(2), [(-5.0, 0.5 * m), (0.5 * m + 5.0, 0.5 * m)], 0.45)])
+    pitch = 0.5 * m + 20.0
+    top = Structure(name = "SPI_TOP_%d_%d" % (n, m), elements = [ARef(cell, (0.0, 0.0), (pitch, pitch), (n, n))])
+    return top, pitch
+
+def benchmark(n, m, n_o_queries = 20):
+    top, pitch = build(n, m)
+    window = SizeInfo(west = 0.3 * pitch, east = 1.7 * pitch, south = 0.3 * pitch, north = 1.7 * pitch)
+
+    t0 = time.time()
+    E = top.elements_in_region(window)
+    t_first = time.time() - t0
+    t0 = time.time()
+    for i in range(n_o_queries):
+        top.elements_in_region(window, layers = [Layer(2)])
+    t_index = (time.time() - t0) / n_o_queries
+
+    if n * n * m * m <= 10 ** 5:
+        t0 = time.time()
+        F = [e for e in top.elements.flat_copy() 
+             if e.size_info().west <= window.east and e.size_info().east >= window.west 
+             and e.size_info().south <= window.north and e.size_info().north >= window.south]
+        t_flat = time.time() - t0
+    else:
+        t_flat = None
+    return n * n * (m * m + 2), len(E), t_first, t_index, t_flat
+
+if __name__ == "__main__":
+    if len(sys.argv) > 2:
+        sizes = [(int(sys.argv[1]), int(sys.argv[2]))]
+    else:
+        sizes = [(5, 10), (10, 20), (30, 30), (100, 30)]
+    print "%12s %10s %16s %16s %16s" % ("elements", "in window", "first query", "next queries", "flatten+filter")
+    for n, m in sizes:
+        n_o_elements, n_o_found, t_first, t_index, t_flat = benchmark(n, m)
+        if t_flat is None:
+            print "%12d %10d %14.4f s %14.4f s %16s" % (n_o_elements, n_o_found, t_first, t_index, "-")
+        else:
+            print "%12d %10d %14.4f s %14.4f s %14.4f s" % (n_o_elements, n_o_found, t_first, t_index, t_flat)
@@ -0,0 +1,58 @@
+# IPKISS - Parametric Design Framework
+# Copyright (C) 2002-2012  Ghent University - imec
+# 
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 2
+# of the License, or (at your option) any later version.
+# 
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+# 
+# i-depot BBIE 7396, 7556, 7748
+# 
+# Contact: ipkiss@intec.ugent.be
+
+
+# Scaling benchmark of structure creation and lookup in a library.
+# Creating a structure looks up its name in the current library, so the cost
+# per structure should remain constant when the number of structures grows.
+
+from ipkiss.all import *
+import sys
+import time
+
+def benchmark(n_o_structures):
+    library = Library(name = "BENCHMARK_%d" % n_o_structures)
+    t0 = time.time()
+    for i in range(n_o_structures):
+        Structure(name = "cell_%d" % i, library = library)
+    t_create = time.time() - t0
+
+    t0 = time.time()
+    for i in range(0, n_o_structures, 7):
+        library["cell_%d" % i]
+        "cell_%d" % i in library
+        library.structures.index("cell_%d" % i)
+    t_lookup = (time.time() - t0) / len(range(0, n_o_structures, 7))
+
+    t0 = time.time()
+    library.unreferenced_structures()
+    t_unreferenced = time.time() - t0
+    return t_create, t_lookup, t_unreferenced
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        sizes = [int(a) for a in sys.argv[1:]]
+    else:
+        sizes = [1000, 10000, 50000, 200000]
+    print "%10s %16s %16s %22s" % ("structures", "create/struct", "lookup", "unreferenced_structures")
+    for n in sizes:
+        t_create, t_lookup, t_unreferenced = benchmark(n)
+        print "%10d %13.2f us %13.2f us %20.3f s" % (n, 1E6 * t_create / n, 1E6 * t_lookup, t_unreferenced)
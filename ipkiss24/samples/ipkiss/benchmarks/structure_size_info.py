@@ -0,0 +1,64 @@
+# IPKISS - Parametric Design Framework
+# Copyright (C) 2002-2012  Ghent University - imec
+# 
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 2
+# of the License, or (at your option) any later version.
+# 
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+# 
+# i-depot BBIE 7396, 7556, 7748
+# 
+# Contact: ipkiss@intec.ugent.be
+
+
+# Benchmark of size_info() on the top cell of a hierarchy in which every level
+# places the cell below it a number of times with SRefs. The bounding box of every
+# structure is cached, so after the first query a top-level query only transforms the
+# cached boxes of the direct children. Assigning the elements of the leaf cell drops the
+# cached boxes of all the cells above it.
+
+from ipkiss.all import *
+import sys
+import time
+
+def build(n_o_levels, fanout):
+    S = Structure(name = "SI_LEAF_%d_%d" % (n_o_levels, fanout), elements = [Rectangle(Layer(1), (0.0, 0.0), (1.0, 1.0)), Circle(Layer(1), (0.0, 2.0), 0.5)])
+    leaf = S
+    for l in range(n_o_levels):
+        elems = [SRef(S, (3.0 ** (l + 1) * i, 0.0), transformation = Rotation(rotation = 90.0 * (i % 4))) for i in range(fanout)]
+        S = Structure(name = "SI_LEVEL_%d_%d_%d" % (n_o_levels, fanout, l), elements = elems)
+    return leaf, S
+
+def benchmark(n_o_levels, fanout, n_o_queries = 100):
+    leaf, top = build(n_o_levels, fanout)
+    t0 = time.time()
+    top.size_info()
+    t_first = time.time() - t0
+    t0 = time.time()
+    for i in range(n_o_queries):
+        top.size_info()
+    t_cached = (time.time() - t0) / n_o_queries
+    leaf.elements = ElementList([Rectangle(Layer(1), (0.0, 0.0), (2.0, 2.0))])
+    t0 = time.time()
+    top.size_info()
+    t_changed = time.time() - t0
+    return fanout ** n_o_levels, t_first, t_cached, t_changed
+
+if __name__ == "__main__":
+    if len(sys.argv) > 2:
+        n_o_levels, fanout = int(sys.argv[1]), int(sys.argv[2])
+    else:
+        n_o_levels, fanout = 5, 6
+    print "%12s %14s %14s %16s" % ("leaf copies", "first", "cached", "after change")
+    for l in range(1, n_o_levels + 1):
+        n, t_first, t_cached, t_changed = benchmark(l, fanout)
+        print "%12d %12.4f s %12.6f s %14.4f s" % (n, t_first, t_cached, t_changed)
@@ -0,0 +1,78 @@
+# IPKISS - Parametric Design Framework
+# Copyright (C) 2002-2012  Ghent University - imec
+# 
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 2
+# of the License, or (at your option) any later version.
+# 
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+# 
+# i-depot BBIE 7396, 7556, 7748
+# 
+# Contact: ipkiss@intec.ugent.be
+
+# Rasterization of a polygon with a hole into a material array, as done by the
+# virtual fabrication when building the material grid of a simulation volume.
+# The point-in-polygon approach evaluates every pixel center of the bounding box of the
+# polygon (the cartesian product of the x and y pixel coordinates) ; the scanline
+# rasterizer only computes the crossings of the polygon edges with the scanlines.
+
+from technologies.si_photonics.picazzo.default import *
+from ipkiss.plugins.vfabrication.raster import fill_polygon_in_array, add_polygon_coverage_to_array
+import numpy
+import time
+import sys
+
+def ring_rings(size, n_o_points = 512):
+    angles = numpy.linspace(0.0, 2 * numpy.pi, n_o_points)
+    circle = numpy.column_stack([numpy.cos(angles), numpy.sin(angles)])
+    center = 0.5 * size
+    return [center + 0.45 * size * circle, center + 0.25 * size * circle[::-1]]
+
+def point_in_polygon(array, rings, value):
+    # reference : point-in-polygon test on all pixel centers
+    from matplotlib.path import Path
+    x = numpy.arange(array.shape[0]) + 0.5
+    y = numpy.arange(array.shape[1]) + 0.5
+    points = numpy.column_stack([numpy.repeat(x, len(y)), numpy.tile(y, len(x))])
+    inside = Path(rings[0]).contains_points(points)
+    for r in rings[1:]:
+        inside &= numpy.logical_not(Path(r).contains_points(points))
+    inside = inside.reshape(array.shape)
+    array[:] = numpy.where(inside, value, array)
+    return points.nbytes + 2 * inside.nbytes
+
+def benchmark(size):
+    rings = ring_rings(size)
+    array = numpy.zeros((size, size), dtype = numpy.int16)
+    t0 = time.time()
+    temp_bytes = point_in_polygon(array, rings, 3)
+    t_pip = time.time() - t0
+    reference = array.copy()
+
+    array[:] = 0
+    t0 = time.time()
+    fill_polygon_in_array(array, rings, value = 3)
+    t_fill = time.time() - t0
+    differences = (array != reference).sum()
+
+    coverage = numpy.zeros((size, size), dtype = numpy.float64)
+    t0 = time.time()
+    add_polygon_coverage_to_array(coverage, rings, supersampling = 4)
+    t_coverage = time.time() - t0
+    return (t_pip, temp_bytes, t_fill, differences, t_coverage, coverage.sum(), (array != 0).sum())
+
+if __name__ == "__main__":
+    sizes = [int(a) for a in sys.argv[1:]] or [500, 1000, 2000, 4000]
+    print "%8s %12s %12s %12s %12s %12s" % ("pixels", "pip [s]", "pip temp MB", "scanline [s]", "coverage [s]", "differences")
+    for size in sizes:
+        (t_pip, temp_bytes, t_fill, differences, t_coverage, area, n_o_pixels) = benchmark(size)
+        print "%8d %12.3f %12.1f %12.3f %12.3f %12d" % (size, t_pip, temp_bytes / 1e6, t_fill, t_coverage, differences)
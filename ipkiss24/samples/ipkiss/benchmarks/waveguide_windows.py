@@ -0,0 +1,53 @@
+# IPKISS - Parametric Design Framework
+# Copyright (C) 2002-2012  Ghent University - imec
+# 
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 2
+# of the License, or (at your option) any later version.
+# 
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301, USA.
+# 
+# i-depot BBIE 7396, 7556, 7748
+# 
+# Contact: ipkiss@intec.ugent.be
+
+
+
+
+# Benchmark of the extrusion of the windows of waveguides along many routes, as found on routed chips.
+# The miter directions of each centerline are computed once and shared by all windows and terminations.
+
+from technologies.si_photonics.picazzo.default import *
+from ipkiss.all import *
+from ipkiss.plugins.photonics.wg.basic import WgElDefinition
+import sys
+import time
+
+def route(i, step = 20.0):
+    y = 5.0 * i
+    return Shape([(0.0, y), (step, y), (step, y + step), (2 * step, y + step), (2 * step, y + 2 * step), (3 * step, y + 2 * step)])
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        n_o_waveguides = int(sys.argv[1])
+    else:
+        n_o_waveguides = 10000
+    wg_def = WgElDefinition(wg_width = 0.45, trench_width = 2.0)
+    # the rounding itself is not part of this benchmark
+    routes = [Shape(ShapeRound(original_shape = route(i), radius = 5.0).points) for i in range(n_o_waveguides)]
+    
+    t0 = time.time()
+    n_o_points = 0
+    for R in routes:
+        for window_elements in wg_def(shape = R).elements:
+            for e in window_elements:
+                n_o_points += len(e.shape)
+    print "%d waveguides: %d points, %.3f s" % (n_o_waveguides, n_o_points, time.time() - t0)